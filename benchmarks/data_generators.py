@@ -0,0 +1,141 @@
+"""
+LST Periodic Analytics Reporter - Benchmark Data Generators
+Creates synthetic Zoom and Mediasite data shaped like the real API responses.
+Every value is derived from its index and a seed so that runs at the same
+scale produce identical data without holding it all in memory.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import calendar
+import datetime
+import random
+import xml.sax.saxutils
+
+#number of email domains users are spread across
+DOMAIN_COUNT = 50
+
+def email_domain(domain_number):
+    """
+    returns:
+        synthetic email domain for a domain number
+    """
+    return "dept"+str(domain_number)+".example.edu"
+
+def zoom_user(user_number, seed=0):
+    """
+    Creates one user of the Zoom account report.
+
+    arguments:
+        user_number: index of the user
+        seed: seed for the generated values
+
+    returns:
+        dict with the fields of a Zoom account report user
+    """
+    values = random.Random(user_number*7919+seed)
+    return {"user_id":"u"+str(user_number),
+        "email":"user"+str(user_number)+"@"+email_domain(user_number % DOMAIN_COUNT),
+        "meetings":values.randint(0, 40),
+        "participants":values.randint(0, 400),
+        "meeting_minutes":values.randint(0, 2400),
+        "last_client_version":"4.1."+str(values.randint(0, 9999)),
+        "last_login_time":"2026-01-01T00:00:00Z"
+        }
+
+def zoom_user_page(user_count, page_number, page_size, seed=0):
+    """
+    Creates one page of the Zoom account report.
+
+    arguments:
+        user_count: number of users in the whole report
+        page_number: page to create starting from 1
+        page_size: users per page
+        seed: seed for the generated values
+
+    returns:
+        dict shaped like a Zoom account report response
+    """
+    first_user = (page_number-1)*page_size
+    return {"from":"2026-01-01",
+        "to":"2026-01-31",
+        "page_count":max(1, -(-user_count // page_size)),
+        "page_number":page_number,
+        "page_size":page_size,
+        "total_records":user_count,
+        "users":[zoom_user(user_number, seed) for user_number in range(first_user, min(first_user+page_size, user_count))]
+        }
+
+def zoom_daily_report(year_number, month_number, seed=0):
+    """
+    Creates the Zoom daily report of a month.
+
+    arguments:
+        year_number: year of the report
+        month_number: month of the report
+        seed: seed for the generated values
+
+    returns:
+        dict shaped like a Zoom daily report response
+    """
+    values = random.Random(year_number*100+month_number+seed)
+    days = calendar.monthrange(year_number, month_number)[1]
+    return {"year":year_number,
+        "month":month_number,
+        "dates":[{"date":datetime.date(year_number, month_number, day).strftime("%Y-%m-%d"),
+            "new_user":values.randint(0, 50),
+            "meetings":values.randint(0, 500),
+            "participants":values.randint(0, 5000),
+            "meeting_minutes":values.randint(0, 30000)
+            } for day in range(1, days+1)]
+        }
+
+def account_list(exact_emails=100, domains=10, substrings=10):
+    """
+    Creates an account list mixing exact emails, domains and substring patterns.
+
+    arguments:
+        exact_emails: number of full email addresses
+        domains: number of "@domain" entries
+        substrings: number of plain substring entries
+
+    returns:
+        list of account list entries
+    """
+    return (["user"+str(user_number*13)+"@"+email_domain((user_number*13) % DOMAIN_COUNT) for user_number in range(exact_emails)]+
+        ["@"+email_domain(domain_number) for domain_number in range(domains)]+
+        ["user"+str(substring_number)+"9@" for substring_number in range(substrings)])
+
+def write_mediasite_report_xml(xml_filename, presentation_count, seed=0):
+    """
+    Writes a Mediasite presentation report XML file with a ResultSummary and
+    one Presentation row per presentation.
+
+    arguments:
+        xml_filename: path of the file to write
+        presentation_count: number of presentation rows
+        seed: seed for the generated values
+
+    returns:
+        size of the written file in bytes
+    """
+    values = random.Random(presentation_count+seed)
+    total_views = 0
+    with open(xml_filename, "w", encoding="utf-8") as xml_file:
+        xml_file.write('<?xml version="1.0" encoding="utf-8"?>\n<PresentationReportResult>\n<Presentations>\n')
+        for presentation_number in range(presentation_count):
+            views = values.randint(0, 200)
+            total_views += views
+            xml_file.write("<Presentation><Id>p"+str(presentation_number)+"</Id><Title>"+
+                xml.sax.saxutils.escape("Lecture "+str(presentation_number))+"</Title><TotalViews>"+str(views)+
+                "</TotalViews><TotalTimeWatched>"+str(views*60)+"</TotalTimeWatched></Presentation>\n")
+        xml_file.write("</Presentations>\n<ResultSummary>"+
+            "<PresentationsAvailable>"+str(presentation_count)+"</PresentationsAvailable>"+
+            "<PresentationsWatched>"+str(presentation_count*3//4)+"</PresentationsWatched>"+
+            "<TotalViews>"+str(total_views)+"</TotalViews>"+
+            "<TotalUsers>"+str(presentation_count*5)+"</TotalUsers>"+
+            "<PeakConnections>"+str(max(1, presentation_count//10))+"</PeakConnections>"+
+            "<TotalTimeWatched>"+str(total_views//1440)+"."+str((total_views//60) % 24).zfill(2)+":"+
+                str(total_views % 60).zfill(2)+":00</TotalTimeWatched>"+
+            "</ResultSummary>\n</PresentationReportResult>\n")
+        return xml_file.tell()
@@ -0,0 +1,175 @@
+"""
+LST Periodic Analytics Reporter - Benchmark Mock Server
+Local stand-in for the Zoom and Mediasite APIs used by the benchmarks. Serves
+the Zoom daily and paginated account reports, the Mediasite presentation report
+lookup (finding every report named in its filter), Execute and Export requests,
+job links which finish after a set number of polls and report file downloads
+with Range support. Every response can be delayed by a fixed latency.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import os
+import re
+import json
+import time
+import threading
+import itertools
+import urllib.parse
+import http.server
+import benchmarks.data_generators as data_generators
+
+class MockApiHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    #note: headers and body are written separately so without this small responses wait on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body, status=200, content_type="application/json", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        time.sleep(self.server.latency)
+        request_body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = urllib.parse.urlparse(self.path).path
+
+        if path.endswith("/report/getdailyreport"):
+            form = urllib.parse.parse_qs(request_body.decode())
+            self.send_body(data_generators.zoom_daily_report(int(form["year"][0]), int(form["month"][0]), self.server.seed))
+        elif path.endswith("/report/getaccountreport"):
+            form = urllib.parse.parse_qs(request_body.decode())
+            self.send_body(data_generators.zoom_user_page(self.server.user_count,
+                int(form["page_number"][0]), int(form["page_size"][0]), self.server.seed))
+        elif path.endswith("/Execute"):
+            self.send_body({"JobLink":self.server.new_job(), "ResultId":"result-1"})
+        elif path.endswith("/Export"):
+            file_format = json.loads(request_body.decode() or "{}").get("FileFormat", "XML")
+            self.send_body({"JobLink":self.server.new_job(),
+                "DownloadLink":self.server.url+"files/report."+file_format.lower()+".xml"})
+        else:
+            self.send_body({"error":"not found"}, 404)
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        url = urllib.parse.urlparse(self.path)
+        path = url.path
+
+        if path.endswith("/PresentationReports"):
+            #every report named in the filter exists, numbered in the order named
+            report_filter = urllib.parse.parse_qs(url.query).get("$filter", ["Name eq 'Benchmark Report'"])[0]
+            names = [name.replace("''", "'") for name in re.findall(r"Name eq '((?:[^']|'')*)'", report_filter)]
+            self.send_body({"value":[{"Id":"report-"+str(report_number), "Name":name}
+                for report_number, name in enumerate(names, start=1)]})
+        elif "/jobs/" in path:
+            self.send_body({"Status":self.server.poll_job(path.rsplit("/", 1)[1])})
+        elif "/files/" in path:
+            self.send_file()
+        else:
+            self.send_body({"error":"not found"}, 404)
+
+    def send_file(self):
+        """
+        Sends the generated Mediasite report file, honouring a Range header.
+        """
+        file_size = os.path.getsize(self.server.report_filename)
+        start = 0
+        status = 200
+        headers = {}
+        range_match = re.match(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        if range_match:
+            start = min(int(range_match.group(1)), file_size)
+            status = 206
+            headers["Content-Range"] = "bytes "+str(start)+"-"+str(file_size-1)+"/"+str(file_size)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(file_size-start))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        with open(self.server.report_filename, "rb") as report_file:
+            report_file.seek(start)
+            while True:
+                block = report_file.read(1024*1024)
+                if not block:
+                    break
+                self.wfile.write(block)
+
+class MockApiServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, work_dir, user_count=1000, presentation_count=100, latency=0.0, job_polls=2, seed=0):
+        """
+        Creates the server on a free local port along with its report file.
+
+        params:
+            work_dir: directory for the generated Mediasite report file
+            user_count: number of users in the Zoom account report
+            presentation_count: number of presentations in the Mediasite report
+            latency: seconds every response is delayed by
+            job_polls: polls of a Mediasite job before it is successful
+            seed: seed for the generated data
+        """
+        super().__init__(("127.0.0.1", 0), MockApiHandler)
+        self.user_count = user_count
+        self.latency = latency
+        self.job_polls = job_polls
+        self.seed = seed
+        self.url = "http://127.0.0.1:"+str(self.server_address[1])+"/"
+        self.jobs = {}
+        self.job_numbers = itertools.count(1)
+        self.jobs_lock = threading.Lock()
+        self.thread = None
+
+        self.report_filename = os.path.join(work_dir, "mock_mediasite_report.xml")
+        self.report_size = data_generators.write_mediasite_report_xml(self.report_filename, presentation_count, seed)
+
+    def new_job(self):
+        """
+        returns:
+            link of a new Mediasite job
+        """
+        with self.jobs_lock:
+            job_id = str(next(self.job_numbers))
+            self.jobs[job_id] = 0
+        return self.url+"mediasite/jobs/"+job_id
+
+    def poll_job(self, job_id):
+        """
+        returns:
+            status of a job, successful once it has been polled job_polls times
+        """
+        with self.jobs_lock:
+            self.jobs[job_id] = self.jobs.get(job_id, 0)+1
+            return "Successful" if self.jobs[job_id] >= self.job_polls else "Working"
+
+    def start(self):
+        """
+        Serves requests in a background thread.
+
+        returns:
+            the server
+        """
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
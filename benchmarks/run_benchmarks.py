@@ -0,0 +1,298 @@
+"""
+LST Periodic Analytics Reporter - Benchmarks
+Times the Zoom and Mediasite stages (sync and, with aiohttp, async) and full runs of
+run_periodic_analytics_reporter against the local mock server at several
+scales of users so that performance changes show up as numbers before they
+are deployed. Google calls are made against a local stand-in which records
+them without sending anything.
+
+Usage: python -m benchmarks.run_benchmarks --scales 100 10000 1000000 --latency 0.01
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import asyncio
+import argparse
+import datetime
+import tempfile
+import platform
+import benchmarks.data_generators as data_generators
+import benchmarks.mock_server as mock_server
+import integrations.common.instrumentation as instrumentation
+import integrations.common.async_http as async_http
+import integrations.common.resilience as resilience
+import integrations.common.response_cache as response_cache
+import integrations.common.report_window as report_window
+import integrations.zoom.zoom_web_api_client as zoom_web_api_client
+import integrations.zoom.zoom_reporter as zoom_reporter
+import integrations.zoom.zoom_accounts as zoom_accounts
+import integrations.mediasite.mediasite_web_api_client as mediasite_web_api_client
+import integrations.mediasite.mediasite_reporter as mediasite_reporter
+import integrations.mediasite.mediasite_jobs as mediasite_jobs
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+class LocalGoogleClient:
+    def __init__(self):
+        """
+        Stand-in for google_api_client.gclient recording calls rather than
+        sending them so that full runs can be timed without Google credentials.
+        """
+        self.calls = []
+
+    def sheet_insert_request(self, spreadsheet_id, insert_values, sheet_range='A:B'):
+        self.calls.append(("sheet_insert_request", len(insert_values)))
+
+    def sheet_append_rows_request(self, spreadsheet_id, rows, sheet_range='A:B'):
+        self.calls.append(("sheet_append_rows_request", len(rows)))
+
+    def sheet_get_values(self, spreadsheet_id, sheet_range='A:A', value_render_option="FORMATTED_VALUE"):
+        self.calls.append(("sheet_get_values", sheet_range))
+        return []
+
+    def sheet_batch_update_request(self, spreadsheet_id, data):
+        self.calls.append(("sheet_batch_update_request", len(data)))
+
+    def drive_find_request(self, file_name, drive_folder_id):
+        self.calls.append(("drive_find_request", file_name))
+        return []
+
+    def drive_upload_request(self, path_to_source_file, drive_folder_id, resumable=False, chunksize=5*1024*1024, num_retries=0):
+        self.calls.append(("drive_upload_request", os.path.getsize(path_to_source_file)))
+        return "local-"+os.path.basename(path_to_source_file)
+
+    def gmail_send(self, mail_to, mail_reply_to, mail_cc, mail_subject, mail_content):
+        self.calls.append(("gmail_send", len(mail_content)))
+
+    def gmail_send_batch(self, emails, batch_size=10):
+        self.calls.append(("gmail_send_batch", len(emails)))
+        return ["local-"+str(email_number) for email_number in range(len(emails))]
+
+def peak_memory_mb():
+    """
+    returns:
+        peak resident memory of the process in MiB or None where it is not available
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #note: ru_maxrss is in bytes on macOS and kibibytes elsewhere
+    return round(peak/(1024*1024 if platform.system() == "Darwin" else 1024), 1)
+
+def build_clients(server, work_dir):
+    """
+    Creates Zoom and Mediasite clients sending requests to the mock server with
+    retry layers of their own so that counts are not shared between scales.
+
+    returns:
+        dict of clients by stage name
+    """
+    zoom_client = zoom_web_api_client.client(server.url+"zoom/", "key", "secret", "JSON",
+        response_cache=response_cache.ResponseCache(os.path.join(work_dir, "response_cache"), bypass=True),
+        resilient_caller=resilience.ResilientCaller("zoom"))
+    mediasite_client = mediasite_web_api_client.client(server.url+"mediasite/", "key", "user", "pass",
+        resilient_caller=resilience.ResilientCaller("mediasite"))
+    return {"zoom":zoom_client, "mediasite":mediasite_client}
+
+def build_async_clients(server, work_dir):
+    """
+    Creates async Zoom and Mediasite clients sending requests to the mock server.
+
+    returns:
+        dict of async clients by stage name
+    """
+    zoom_client = zoom_web_api_client.async_client(server.url+"zoom/", "key", "secret", "JSON",
+        response_cache=response_cache.ResponseCache(os.path.join(work_dir, "response_cache"), bypass=True),
+        resilient_caller=resilience.ResilientCaller("zoom"))
+    mediasite_client = mediasite_web_api_client.async_client(server.url+"mediasite/", "key", "user", "pass",
+        resilient_caller=resilience.ResilientCaller("mediasite"))
+    return {"zoom":zoom_client, "mediasite":mediasite_client}
+
+def run_async_stages(server, work_dir, export_dir, account_list, polling, window):
+    """
+    Runs the async Zoom user report and Mediasite report together on one event loop.
+    """
+    async def run_stages():
+        clients = build_async_clients(server, work_dir)
+        async with clients["zoom"], clients["mediasite"]:
+            await asyncio.gather(
+                zoom_reporter.run_report_async("monthly", "bench", export_dir,
+                    zoom_accounts.AccountMatcher(account_list), clients["zoom"], window=window),
+                mediasite_reporter.run_report_async("monthly", "bench", export_dir,
+                    "Benchmark Report", clients["mediasite"], mediasite_jobs.PollingStrategy(**polling), window=window)
+                )
+
+    asyncio.run(run_stages())
+
+def time_stage(results, stage_name, stage_function):
+    """
+    Runs a stage recording its duration, the instrument timers and counters
+    recorded while it ran and any error.
+    """
+    instrumentation.instruments = instrumentation.Instruments()
+    start_time = time.perf_counter()
+    try:
+        stage_function()
+        error = None
+    except Exception as e:
+        logging.exception("Benchmark stage "+stage_name+" failed")
+        error = repr(e)
+    snapshot = instrumentation.instruments.snapshot()
+    results[stage_name] = {"seconds":round(time.perf_counter()-start_time, 3),
+        "error":error,
+        "timers":snapshot["timers"],
+        "counters":snapshot["counters"],
+        "peak_memory_mb":peak_memory_mb()
+        }
+
+def run_end_to_end(server, work_dir, export_dir, account_list, polling):
+    """
+    Runs run_periodic_analytics_reporter against the mock server and a local
+    Google stand-in using a configuration written to work_dir.
+    """
+    import main
+
+    with open(os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "config", "example_config.json")) as config_file:
+        config_data = json.load(config_file)
+    config_data.update({"export_destination":export_dir,
+        "recurrence":"monthly",
+        "reporting_prefix":"bench",
+        "metrics_store_path":os.path.join(work_dir, "metrics.sqlite"),
+        "zoom_account_list":account_list,
+        "mediasite_presentation_report_name":"Benchmark Report",
+        "mediasite_job_polling":polling
+        })
+    config_path = os.path.join(work_dir, "benchmark_config.json")
+    with open(config_path, "w") as config_file:
+        json.dump(config_data, config_file)
+
+    clients = build_clients(server, work_dir)
+    clients["google"] = LocalGoogleClient()
+    try:
+        main.run_periodic_analytics_reporter(config_path, os.path.join(work_dir, "benchmark.log"),
+            concurrent_stages=True, clients=clients, upload_log=False, bypass_cache=True)
+    finally:
+        clients["zoom"].close()
+        clients["mediasite"].close()
+
+def run_scale(user_count, latency, job_polls, work_dir, include_end_to_end=True):
+    """
+    Benchmarks every stage at one number of users.
+
+    arguments:
+        user_count: number of users in the Zoom account report
+        latency: seconds the mock server delays every response by
+        job_polls: polls of each Mediasite job before it is successful
+        work_dir: directory for generated and exported files
+        include_end_to_end: whether to also time full runs of the reporter
+
+    returns:
+        dict of stage names to their results
+    """
+    scale_dir = os.path.join(work_dir, str(user_count))
+    export_dir = os.path.join(scale_dir, "exports")
+    os.makedirs(export_dir, exist_ok=True)
+
+    #one presentation for every ten users
+    presentation_count = max(1, user_count//10)
+    account_list = data_generators.account_list()
+    window = report_window.ReportWindow.from_recurrence("monthly")
+    polling = {"initial_interval":0.01, "max_interval":0.05, "jitter":0, "deadline":600}
+
+    results = {}
+    with mock_server.MockApiServer(scale_dir, user_count, presentation_count, latency, job_polls) as server:
+        clients = build_clients(server, scale_dir)
+        try:
+            time_stage(results, "zoom_user_report", lambda: zoom_reporter.run_report("monthly", "bench", export_dir,
+                zoom_accounts.AccountMatcher(account_list), clients["zoom"], window=window))
+            time_stage(results, "zoom_daily_report", lambda: zoom_reporter.run_report("monthly", "bench", export_dir,
+                [], clients["zoom"], window=window))
+            time_stage(results, "mediasite_report", lambda: mediasite_reporter.run_report("monthly", "bench", export_dir,
+                "Benchmark Report", clients["mediasite"], mediasite_jobs.PollingStrategy(**polling), window=window))
+            time_stage(results, "mediasite_reports", lambda: mediasite_reporter.run_reports("monthly", "bench", export_dir,
+                ["Benchmark Report "+str(report_number) for report_number in range(1, 5)], clients["mediasite"],
+                mediasite_jobs.PollingStrategy(**polling), window=window))
+        finally:
+            clients["zoom"].close()
+            clients["mediasite"].close()
+
+        #note: async stages need the optional aiohttp package
+        if async_http.aiohttp is not None:
+            time_stage(results, "async_reports", lambda: run_async_stages(server, scale_dir, export_dir,
+                account_list, polling, window))
+
+        if include_end_to_end:
+            time_stage(results, "end_to_end", lambda: run_end_to_end(server, scale_dir, export_dir, account_list, polling))
+
+        results["mediasite_report_bytes"] = server.report_size
+
+    return results
+
+def print_results(all_results):
+    """
+    Prints a table of stage durations by scale.
+    """
+    print("{:>10}  {:<20} {:>10} {:>12}  {}".format("users", "stage", "seconds", "peak MiB", "error"))
+    for user_count, results in all_results["scales"].items():
+        for stage_name, stage_result in results.items():
+            if isinstance(stage_result, dict):
+                print("{:>10}  {:<20} {:>10.3f} {:>12}  {}".format(user_count, stage_name, stage_result["seconds"],
+                    str(stage_result["peak_memory_mb"]), stage_result["error"] or ""))
+
+if __name__ == "__main__":
+    """
+    args:
+        --scales: numbers of users to benchmark with
+        --latency: seconds the mock server delays every response by
+        --job-polls: polls of each Mediasite job before it is successful
+        --output: JSON file to write the results to
+        --skip-end-to-end: only time the Zoom and Mediasite stages
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales',type=int,nargs='+',default=[100, 10000, 100000, 1000000],
+        help='Numbers of Zoom users to benchmark with')
+    parser.add_argument('--latency',type=float,default=0.0,
+        help='Seconds the mock server delays every response by')
+    parser.add_argument('--job-polls',type=int,default=2,
+        help='Polls of each Mediasite job before it is successful')
+    parser.add_argument('--output',
+        help='JSON file to write the results to')
+    parser.add_argument('--skip-end-to-end',action='store_true',
+        help='Only time the Zoom and Mediasite stages')
+    parser.add_argument('--keep-files',action='store_true',
+        help='Keep the generated and exported files')
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.WARNING)
+
+    work_dir = tempfile.mkdtemp(prefix="lst_benchmarks_")
+    all_results = {"started_at":datetime.datetime.now().isoformat(timespec="seconds"),
+        "python":sys.version.split()[0],
+        "platform":platform.platform(),
+        "latency":args.latency,
+        "job_polls":args.job_polls,
+        "scales":{}
+        }
+    try:
+        for user_count in args.scales:
+            all_results["scales"][user_count] = run_scale(user_count, args.latency, args.job_polls,
+                work_dir, not args.skip_end_to_end)
+    finally:
+        if args.keep_files:
+            print("Benchmark files kept in "+work_dir)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_results(all_results)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(all_results, output_file, indent=4)
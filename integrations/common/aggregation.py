@@ -0,0 +1,92 @@
+"""
+LST Periodic Analytics Reporter - Aggregation
+Running totals of report rows shared by the Zoom reporters. Rows are added
+to the totals one at a time as they are written so that no report is held in
+memory to compute its totals row.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+def email_domain(email):
+    """
+    Finds the domain of an email address for grouping rows by domain.
+
+    params:
+        email: email address string
+
+    returns:
+        lowercase domain of the email address or an empty string when there is none
+    """
+    return str(email).rpartition("@")[2].lower() if email and "@" in str(email) else ""
+
+def to_int(value):
+    """
+    Converts a cell to an integer, empty cells counting as zero.
+
+    params:
+        value: int, float or string value of a cell
+
+    returns:
+        integer value of the cell
+    """
+    if value is None or value == "":
+        return 0
+    if isinstance(value, int):
+        return value
+    return int(float(value)) if isinstance(value, str) and "." in value else int(value)
+
+class RunningTotals:
+    def __init__(self, sum_columns, group_column=None, group_key=None):
+        """
+        Creates totals which are updated one row at a time for rows which are
+        written as they arrive.
+
+        params:
+            sum_columns: names of the numeric columns to sum
+            group_column: optional column to also sum the rows by
+            group_key: optional function applied to the group column value to find
+                the group, for ex. email_domain
+        """
+        self.sum_columns = list(sum_columns)
+        self.group_column = group_column
+        self.group_key = group_key
+        self.row_count = 0
+        self.sums = {column:0 for column in self.sum_columns}
+        self.groups = {}
+
+    def add(self, row):
+        """
+        Adds a row to the totals.
+
+        params:
+            row: dict of column names to values
+        """
+        self.row_count += 1
+        values = [to_int(row.get(column)) for column in self.sum_columns]
+        for column, value in zip(self.sum_columns, values):
+            self.sums[column] += value
+
+        if self.group_column is not None:
+            group = row.get(self.group_column)
+            if self.group_key is not None:
+                group = self.group_key(group)
+            group_sums = self.groups.get(group)
+            if group_sums is None:
+                group_sums = self.groups[group] = {column:0 for column in self.sum_columns}
+            for column, value in zip(self.sum_columns, values):
+                group_sums[column] += value
+
+    def totals_row(self, label_column, label="totals"):
+        """
+        Creates the totals row written at the bottom of report files.
+
+        params:
+            label_column: column in which the label is written
+            label: text identifying the row as totals
+
+        returns:
+            dict of the label and column sums
+        """
+        totals = {label_column:label}
+        totals.update(self.sums)
+        return totals
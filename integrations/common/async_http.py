@@ -0,0 +1,110 @@
+"""
+Functions for creating pooled aiohttp sessions used by the async API clients,
+the asyncio counterpart of http_session. Sessions keep connections alive
+between requests and count the connections opened and requests sent in the
+same counters as http_session. Requires the optional aiohttp package.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import integrations.common.instrumentation as instrumentation
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+def connection_errors():
+    """
+    returns:
+        tuple of aiohttp exception classes raised when a service could not be
+        reached or the response was cut short, for the retry layer
+    """
+    if aiohttp is None:
+        return ()
+    return (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)
+
+class AsyncResponse:
+    def __init__(self, status_code, headers, url, content):
+        """
+        Response of an async request whose body has been read, shaped like a
+        requests response so that it can be handled by the retry layer.
+
+        params:
+            status_code: HTTP status of the response
+            headers: headers of the response
+            url: URL of the request
+            content: bytes of the response body
+        """
+        self.status_code = status_code
+        self.headers = headers
+        self.url = url
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def close(self):
+        pass
+
+async def read_response(rsp):
+    """
+    Reads the body of an aiohttp response and releases its connection.
+
+    returns:
+        AsyncResponse with the status, headers and body of rsp
+    """
+    try:
+        return AsyncResponse(rsp.status, rsp.headers, str(rsp.url), await rsp.read())
+    finally:
+        rsp.release()
+
+def counting_trace_config(counters):
+    """
+    Creates an aiohttp trace config recording opened connections and sent requests.
+
+    params:
+        counters: http_session.ConnectionCounters to record the counts in
+
+    returns:
+        aiohttp.TraceConfig
+    """
+    async def on_request_start(session, context, params):
+        counters.sent()
+        instrumentation.count("http.requests")
+
+    async def on_connection_create_end(session, context, params):
+        counters.opened()
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    return trace_config
+
+def build_session(counters, pool_size=10, timeout=(10, 60), keep_alive=True, verify=False, headers=None):
+    """
+    Creates an aiohttp session with a connection pool shared by all requests.
+    Must be called while an event loop is running.
+
+    params:
+        counters: http_session.ConnectionCounters to record connections and requests in
+        pool_size: number of connections to keep open, which also limits the
+            number of requests in flight at once
+        timeout: (connect, read) timeout in seconds for requests
+        keep_alive: whether to keep connections open between requests
+        verify: whether to verify TLS certificates
+        headers: optional headers sent with every request
+
+    returns:
+        aiohttp.ClientSession
+    """
+    if aiohttp is None:
+        raise ImportError("aiohttp is required for the async API clients")
+
+    connector = aiohttp.TCPConnector(limit=pool_size, ssl=None if verify else False, force_close=not keep_alive)
+    return aiohttp.ClientSession(connector=connector,
+        timeout=aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1]),
+        headers=headers,
+        trace_configs=[counting_trace_config(counters)]
+        )
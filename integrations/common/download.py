@@ -0,0 +1,227 @@
+"""
+Functions for streaming large files from APIs to disk. Files are written
+through a buffer to a temporary file which is renamed into place once the
+download is complete and verified, and interrupted downloads are resumed with
+HTTP Range requests when the server supports them.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import os
+import time
+import hashlib
+import logging
+import requests
+
+#default size of the chunks read from responses and of the write buffer
+DEFAULT_CHUNK_SIZE = 1024*1024
+
+class DownloadError(Exception):
+    """
+    Raised when a download could not be completed or failed verification.
+    """
+
+def file_checksum(filename, algorithm="sha256", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Computes checksum of a file on disk.
+
+    params:
+        filename: path to file to compute checksum for
+        algorithm: hashlib algorithm name, for ex. "sha256" or "md5"
+        chunk_size: number of bytes to read at a time
+
+    returns:
+        hex digest of the file contents
+    """
+    digest = hashlib.new(algorithm)
+    with open(filename, "rb") as handle:
+        for block in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def expected_length(rsp, offset):
+    """
+    Finds the full size of the file being downloaded from response headers.
+
+    params:
+        rsp: streaming response for the download
+        offset: number of bytes already downloaded when resuming
+
+    returns:
+        full size of the file in bytes or None if the server did not say
+    """
+    content_range = rsp.headers.get("Content-Range")
+    if content_range and "/" in content_range and not content_range.endswith("/*"):
+        return int(content_range.rsplit("/", 1)[1])
+    if rsp.headers.get("Content-Length") is not None and "Content-Encoding" not in rsp.headers:
+        return offset + int(rsp.headers["Content-Length"])
+    return None
+
+def remove_partial(temp_filename):
+    """
+    Removes a partial download file if one exists.
+    """
+    try:
+        os.remove(temp_filename)
+    except FileNotFoundError:
+        pass
+
+def download_stream(open_stream, download_filename, chunk_size=DEFAULT_CHUNK_SIZE, expected_size=None, expected_checksum=None, checksum_algorithm="sha256", max_attempts=3):
+    """
+    Function for downloading a file from a streaming response to disk.
+
+    params:
+        open_stream: function taking a dict of extra request headers and returning
+            a streaming requests response for the file
+        download_filename: name of the resulting downloaded file
+        chunk_size: number of bytes to read from the response and buffer per write
+        expected_size: optional size in bytes the file must have
+        expected_checksum: optional hex digest the file must have
+        checksum_algorithm: hashlib algorithm name used for expected_checksum
+        max_attempts: number of attempts to make, resuming from partial downloads
+
+    returns:
+        number of bytes in the downloaded file
+
+    raises:
+        DownloadError: when the download fails or does not match the expected size or checksum
+    """
+    temp_filename = download_filename+".part"
+    start_time = time.perf_counter()
+    bytes_transferred = 0
+    attempt = 0
+
+    #partial files left by an earlier run belong to another export of the file so are not resumed
+    remove_partial(temp_filename)
+
+    while True:
+        attempt += 1
+
+        #resume from the partial download of an earlier attempt if one exists
+        offset = os.path.getsize(temp_filename) if os.path.exists(temp_filename) else 0
+        headers = {"Range":"bytes="+str(offset)+"-"} if offset else {}
+
+        try:
+            rsp = open_stream(headers)
+            try:
+                rsp.raise_for_status()
+
+                #the server does not support ranges and has sent the whole file again
+                if offset and rsp.status_code != 206:
+                    offset = 0
+
+                if expected_size is None:
+                    expected_size = expected_length(rsp, offset)
+
+                #only open the file once the request has succeeded
+                with open(temp_filename, "ab" if offset else "wb", buffering=chunk_size) as handle:
+                    for block in rsp.iter_content(chunk_size):
+                        handle.write(block)
+                        bytes_transferred += len(block)
+
+                #the connection closed early so try again from where we left off
+                if expected_size is not None and os.path.getsize(temp_filename) < expected_size:
+                    raise DownloadError("Download of "+download_filename+" ended early")
+            finally:
+                rsp.close()
+            break
+        except (requests.exceptions.RequestException, OSError, DownloadError) as e:
+            if attempt >= max_attempts:
+                raise DownloadError("Download of "+download_filename+" failed after "+str(attempt)+" attempts: "+repr(e)) from e
+            logging.warning("Download of "+download_filename+" interrupted, resuming: "+repr(e))
+
+    return finish_download(temp_filename, download_filename, expected_size, expected_checksum,
+        checksum_algorithm, start_time, bytes_transferred)
+
+async def download_stream_async(open_stream, download_filename, chunk_size=DEFAULT_CHUNK_SIZE, expected_size=None, expected_checksum=None, checksum_algorithm="sha256", max_attempts=3, connection_errors=()):
+    """
+    Function for downloading a file from a streaming aiohttp response to disk in
+    the same way as download_stream.
+
+    params:
+        open_stream: function taking a dict of extra request headers and returning
+            an awaitable of a streaming aiohttp response for the file
+        connection_errors: exception classes of the async HTTP library raised when a
+            download is interrupted, for ex. aiohttp.ClientConnectionError
+        see download_stream for the other params
+
+    returns:
+        number of bytes in the downloaded file
+
+    raises:
+        DownloadError: when the download fails or does not match the expected size or checksum
+    """
+    temp_filename = download_filename+".part"
+    start_time = time.perf_counter()
+    bytes_transferred = 0
+    attempt = 0
+
+    #partial files left by an earlier run belong to another export of the file so are not resumed
+    remove_partial(temp_filename)
+
+    while True:
+        attempt += 1
+
+        #resume from the partial download of an earlier attempt if one exists
+        offset = os.path.getsize(temp_filename) if os.path.exists(temp_filename) else 0
+        headers = {"Range":"bytes="+str(offset)+"-"} if offset else {}
+
+        try:
+            rsp = await open_stream(headers)
+            try:
+                if rsp.status >= 400:
+                    raise DownloadError("Download of "+download_filename+" failed with status "+str(rsp.status))
+
+                #the server does not support ranges and has sent the whole file again
+                if offset and rsp.status != 206:
+                    offset = 0
+
+                if expected_size is None:
+                    expected_size = expected_length(rsp, offset)
+
+                #only open the file once the request has succeeded
+                with open(temp_filename, "ab" if offset else "wb", buffering=chunk_size) as handle:
+                    async for block in rsp.content.iter_chunked(chunk_size):
+                        handle.write(block)
+                        bytes_transferred += len(block)
+
+                #the connection closed early so try again from where we left off
+                if expected_size is not None and os.path.getsize(temp_filename) < expected_size:
+                    raise DownloadError("Download of "+download_filename+" ended early")
+            finally:
+                rsp.release()
+            break
+        except (OSError, DownloadError)+tuple(connection_errors) as e:
+            if attempt >= max_attempts:
+                raise DownloadError("Download of "+download_filename+" failed after "+str(attempt)+" attempts: "+repr(e)) from e
+            logging.warning("Download of "+download_filename+" interrupted, resuming: "+repr(e))
+
+    return finish_download(temp_filename, download_filename, expected_size, expected_checksum,
+        checksum_algorithm, start_time, bytes_transferred)
+
+def finish_download(temp_filename, download_filename, expected_size, expected_checksum, checksum_algorithm, start_time, bytes_transferred):
+    """
+    Verifies a completed download and moves it into place.
+
+    returns:
+        number of bytes in the downloaded file
+
+    raises:
+        DownloadError: when the file does not match the expected size or checksum
+    """
+    #verify the download before moving it into place
+    file_size = os.path.getsize(temp_filename)
+    if expected_size is not None and file_size != expected_size:
+        os.remove(temp_filename)
+        raise DownloadError("Downloaded "+str(file_size)+" bytes for "+download_filename+" but expected "+str(expected_size))
+    if expected_checksum is not None and file_checksum(temp_filename, checksum_algorithm) != expected_checksum.lower():
+        os.remove(temp_filename)
+        raise DownloadError("Checksum of "+download_filename+" does not match "+expected_checksum)
+
+    os.replace(temp_filename, download_filename)
+
+    duration = time.perf_counter() - start_time
+    logging.info("Downloaded "+str(file_size)+" bytes to "+download_filename+" in "+"{:.2f}".format(duration)+
+        " seconds ("+"{:.0f}".format(bytes_transferred/duration if duration else 0)+" bytes/sec)")
+
+    return file_size
@@ -0,0 +1,78 @@
+"""
+Compiled email templates and rendering of report emails. Templates are
+compiled once per distinct text and kept by their text so that
+many configurations sharing a template, for ex. in a batch, reuse one compiled
+template rather than building it again for every report.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import threading
+from string import Template
+
+class TemplateCache:
+    def __init__(self):
+        """
+        Creates an empty cache of compiled templates.
+        """
+        self.lock = threading.Lock()
+        self.templates = {}
+        self.hits = 0
+
+    def get(self, template_text):
+        """
+        Finds the compiled template for template_text, compiling it the first
+        time the text is seen.
+
+        params:
+            template_text: text of the template
+
+        returns:
+            string.Template for the text
+        """
+        #note: strings cache their hash so looking up the same text again is cheap
+        #and the lock is only taken when a template is added (hits may undercount across threads)
+        template = self.templates.get(template_text)
+        if template is not None:
+            self.hits += 1
+            return template
+        with self.lock:
+            return self.templates.setdefault(template_text, Template(template_text))
+
+    def __len__(self):
+        return len(self.templates)
+
+#templates shared by the whole process
+templates = TemplateCache()
+
+def compile_template(template_text):
+    """
+    returns:
+        compiled string.Template for template_text from the shared cache
+    """
+    return templates.get(template_text)
+
+def render_email(config_data, all_results):
+    """
+    Renders the report email of a configuration.
+
+    params:
+        config_data: dict of configuration data with the email addresses and templates
+        all_results: dict of report results substituted into the body, including
+            "email_report_date_string" used by the subject
+
+    returns:
+        dict with the "to", "reply_to", "cc", "subject" and "body" of the email
+    """
+    #body templates may be provided as a list of lines in the config file
+    body_template = config_data["email_body_template"]
+    if not isinstance(body_template, str):
+        body_template = "".join(body_template)
+
+    return {"to":config_data["email_to"],
+        "reply_to":config_data["email_reply_to"],
+        "cc":config_data["email_cc"],
+        "subject":compile_template(config_data["email_subj_template"]).safe_substitute(
+            email_report_date_string=all_results["email_report_date_string"]),
+        "body":compile_template(body_template).safe_substitute(all_results)
+        }
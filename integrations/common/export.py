@@ -0,0 +1,138 @@
+"""
+LST Periodic Analytics Reporter - Export
+Writes report rows to csv, gzip compressed csv or parquet files one row at a
+time as they are produced, keeping running totals which are written as the
+last row. Parquet requires the optional pyarrow package.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import csv
+import gzip
+import integrations.common.aggregation as aggregation
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+#export formats along with the file extension used for each
+EXPORT_FORMATS = {
+    "csv":".csv",
+    "csv.gz":".csv.gz",
+    "parquet":".parquet"
+    }
+
+#rows gathered into each parquet row group
+PARQUET_BATCH_SIZE = 10000
+
+def export_filename(filename_base, export_format="csv"):
+    """
+    Creates the file name of an export from a name without extension.
+
+    params:
+        filename_base: path of the file without an extension
+        export_format: one of the EXPORT_FORMATS
+
+    returns:
+        path of the file with the extension of the format
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError("Unknown export format: "+str(export_format))
+    return filename_base+EXPORT_FORMATS[export_format]
+
+def write_rows(filename, rows, columns, totals=None, label_column=None, export_format="csv"):
+    """
+    Writes rows to a file as they are produced, adding each to the running
+    totals and writing the totals row at the end.
+
+    params:
+        filename: path of the file to write
+        rows: iterable of dicts, keys which are not in columns are ignored
+        columns: ordered list of columns to write
+        totals: optional RunningTotals to add each row to and write as the last row
+        label_column: column in which to label the totals row
+        export_format: one of the EXPORT_FORMATS
+
+    returns:
+        number of rows written, not counting the totals row
+    """
+    if totals is not None:
+        rows = counted_rows(rows, totals)
+
+    if export_format == "parquet":
+        return write_parquet(filename, rows, columns, totals, label_column)
+
+    if export_format == "csv.gz":
+        export_file = gzip.open(filename, 'wt', newline='')
+    elif export_format == "csv":
+        export_file = open(filename, 'w', newline='')
+    else:
+        raise ValueError("Unknown export format: "+str(export_format))
+
+    row_count = 0
+    with export_file:
+        writer = csv.DictWriter(export_file, delimiter=',', fieldnames=columns, restval='', extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            row_count += 1
+        if totals is not None:
+            writer.writerow(totals.totals_row(label_column))
+
+    return row_count
+
+def counted_rows(rows, totals):
+    """
+    Generator adding rows to running totals as they pass through.
+    """
+    for row in rows:
+        totals.add(row)
+        yield row
+
+def write_parquet(filename, rows, columns, totals=None, label_column=None):
+    """
+    Writes rows to a parquet file in row groups of PARQUET_BATCH_SIZE rows.
+    Columns holding only integers are written as integers and all others as
+    strings.
+
+    params:
+        filename: path of the file to write
+        rows: iterable of dicts
+        columns: ordered list of columns to write
+        totals: optional RunningTotals to write as the last row
+        label_column: column in which to label the totals row
+
+    returns:
+        number of rows written, not counting the totals row
+    """
+    if pyarrow is None:
+        raise ImportError("pyarrow is required to export parquet files")
+
+    integer_columns = set(totals.sum_columns) if totals is not None else set()
+    schema = pyarrow.schema([(column, pyarrow.int64() if column in integer_columns else pyarrow.string())
+        for column in columns])
+
+    def batch_table(batch):
+        return pyarrow.Table.from_pydict({column:[
+            aggregation.to_int(row.get(column)) if column in integer_columns else
+                (None if row.get(column) is None else str(row.get(column)))
+            for row in batch] for column in columns}, schema=schema)
+
+    row_count = 0
+    with pyarrow.parquet.ParquetWriter(filename, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == PARQUET_BATCH_SIZE:
+                writer.write_table(batch_table(batch))
+                row_count += len(batch)
+                batch = []
+        row_count += len(batch)
+        if totals is not None:
+            batch.append(totals.totals_row(label_column))
+        if batch:
+            writer.write_table(batch_table(batch))
+
+    return row_count
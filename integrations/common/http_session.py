@@ -0,0 +1,120 @@
+"""
+Functions for creating long-lived pooled HTTP sessions used by API clients.
+Sessions keep connections alive between requests and count how many
+connections were opened and how many requests reused an open connection.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import threading
+import requests
+import requests.adapters
+import integrations.common.instrumentation as instrumentation
+
+class ConnectionCounters:
+    def __init__(self):
+        """
+        Creates counters for connections opened and requests sent through a session.
+        """
+        self.lock = threading.Lock()
+        self.connections_opened = 0
+        self.requests_sent = 0
+
+    def opened(self):
+        with self.lock:
+            self.connections_opened += 1
+
+    def sent(self):
+        with self.lock:
+            self.requests_sent += 1
+
+    def stats(self):
+        """
+        returns:
+            dict with counts of connections opened, requests sent and connections reused
+        """
+        with self.lock:
+            return {"connections_opened":self.connections_opened,
+                "requests_sent":self.requests_sent,
+                "connections_reused":max(0, self.requests_sent - self.connections_opened)
+                }
+
+def counting_pool_class(base_pool_class, counters):
+    """
+    Creates a urllib3 connection pool class which counts new connections.
+
+    params:
+        base_pool_class: urllib3 connection pool class to extend
+        counters: ConnectionCounters to record opened connections in
+
+    returns:
+        connection pool class
+    """
+    class CountingConnectionPool(base_pool_class):
+        def _new_conn(self):
+            counters.opened()
+            return super()._new_conn()
+
+    return CountingConnectionPool
+
+class PooledHTTPAdapter(requests.adapters.HTTPAdapter):
+    def __init__(self, pool_size=10, timeout=(10, 60), **kwargs):
+        """
+        params:
+            pool_size: number of connections to keep open per host
+            timeout: default (connect, read) timeout in seconds for requests
+        """
+        self.counters = ConnectionCounters()
+        self.timeout = timeout
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme:counting_pool_class(pool_class, self.counters)
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+            }
+
+    def send(self, request, timeout=None, **kwargs):
+        self.counters.sent()
+        instrumentation.count("http.requests")
+        if timeout is None:
+            timeout = self.timeout
+        return super().send(request, timeout=timeout, **kwargs)
+
+def build_session(pool_size=10, timeout=(10, 60), keep_alive=True, verify=False):
+    """
+    Creates a requests session with a connection pool shared by all requests.
+
+    params:
+        pool_size: number of connections to keep open per host
+        timeout: default (connect, read) timeout in seconds for requests
+        keep_alive: whether to keep connections open between requests
+        verify: whether to verify TLS certificates
+
+    returns:
+        requests.Session using a PooledHTTPAdapter for http and https
+    """
+    session = requests.Session()
+    session.verify = verify
+
+    adapter = PooledHTTPAdapter(pool_size, timeout)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+
+    return session
+
+def connection_stats(session):
+    """
+    Gathers connection counters for a session created by build_session.
+
+    params:
+        session: requests.Session created by build_session
+
+    returns:
+        dict with counts of connections opened, requests sent and connections reused
+    """
+    return session.get_adapter("https://").counters.stats()
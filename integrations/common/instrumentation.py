@@ -0,0 +1,186 @@
+"""
+Lightweight timers and counters for seeing where the time of a run goes.
+Stages are timed with the timed context manager and amounts such as requests
+or bytes are added with count. Everything recorded during the process can be
+written as a JSON run report, a Prometheus textfile or sent to StatsD.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import os
+import re
+import json
+import time
+import socket
+import logging
+import datetime
+import threading
+import contextlib
+
+class Instruments:
+    def __init__(self):
+        """
+        Creates empty timers and counters.
+        """
+        self.lock = threading.Lock()
+        self.started_at = datetime.datetime.now()
+        self.timers = {}
+        self.counters = {}
+
+    def record_time(self, name, seconds):
+        """
+        Records one run of a timed stage.
+
+        params:
+            name: name of the stage, for ex. "zoom.account_report_page"
+            seconds: duration of the run
+        """
+        with self.lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                timer = self.timers[name] = {"count":0, "total_seconds":0.0, "max_seconds":0.0}
+            timer["count"] += 1
+            timer["total_seconds"] += seconds
+            timer["max_seconds"] = max(timer["max_seconds"], seconds)
+
+    @contextlib.contextmanager
+    def timed(self, name):
+        """
+        Context manager recording the time spent within it under name, whether
+        or not the work within it raises.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_time(name, time.perf_counter() - start_time)
+
+    def count(self, name, value=1):
+        """
+        Adds value to a counter.
+
+        params:
+            name: name of the counter, for ex. "mediasite.download_bytes"
+            value: amount to add
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self):
+        """
+        returns:
+            dict with the start of the run, its duration so far and copies of the timers and counters
+        """
+        with self.lock:
+            timers = {name:{"count":timer["count"],
+                "total_seconds":round(timer["total_seconds"], 3),
+                "max_seconds":round(timer["max_seconds"], 3)
+                } for name, timer in self.timers.items()}
+            counters = dict(self.counters)
+        return {"started_at":self.started_at.isoformat(timespec="seconds"),
+            "duration_seconds":round((datetime.datetime.now() - self.started_at).total_seconds(), 3),
+            "timers":timers,
+            "counters":counters
+            }
+
+#instruments shared by the whole process
+instruments = Instruments()
+
+def timed(name):
+    """
+    Context manager timing the work within it in the shared instruments.
+    """
+    return instruments.timed(name)
+
+def count(name, value=1):
+    """
+    Adds value to a counter of the shared instruments.
+    """
+    instruments.count(name, value)
+
+def write_run_report(report_path, extra=None):
+    """
+    Writes the shared instruments to a JSON file.
+
+    params:
+        report_path: path of the JSON file to write
+        extra: optional dict of more data to include, for ex. request retry counts
+
+    returns:
+        the report written
+    """
+    report = instruments.snapshot()
+    report.update(extra or {})
+    with open(report_path, "w") as report_file:
+        json.dump(report, report_file, indent=4, default=str)
+    return report
+
+def metric_name(*parts):
+    """
+    returns:
+        name made only of the characters allowed in Prometheus and StatsD metric names
+    """
+    return re.sub(r"[^a-zA-Z0-9_]", "_", "_".join(str(part) for part in parts if part))
+
+def flatten_report(report):
+    """
+    Finds the numeric values of a run report along with their metric names.
+
+    params:
+        report: dict written by write_run_report
+
+    returns:
+        list of (name, value, kind) where kind is "counter" or "gauge"
+    """
+    metrics = [("run_duration_seconds", report["duration_seconds"], "gauge")]
+    for name, timer in sorted(report["timers"].items()):
+        metrics.append((metric_name(name, "seconds_total"), timer["total_seconds"], "counter"))
+        metrics.append((metric_name(name, "count"), timer["count"], "counter"))
+        metrics.append((metric_name(name, "seconds_max"), timer["max_seconds"], "gauge"))
+    for name, value in sorted(report["counters"].items()):
+        metrics.append((metric_name(name, "total"), value, "counter"))
+    for service_name, stats in sorted(report.get("request_resilience", {}).items()):
+        for name, value in sorted(stats.items()):
+            metrics.append((metric_name(service_name, "requests", name), value, "counter"))
+    return metrics
+
+def write_prometheus_textfile(textfile_path, report, prefix="lst_periodic"):
+    """
+    Writes a run report in the Prometheus text format for the node exporter
+    textfile collector. The file is written next to its destination first so
+    that the collector never reads a partial file.
+
+    params:
+        textfile_path: path of the .prom file to write
+        report: dict written by write_run_report
+        prefix: prefix of every metric name
+    """
+    lines = []
+    for name, value, kind in flatten_report(report):
+        full_name = metric_name(prefix, name)
+        lines.append("# TYPE "+full_name+" "+kind)
+        lines.append(full_name+" "+str(value))
+
+    temp_path = textfile_path+".tmp"
+    with open(temp_path, "w") as textfile:
+        textfile.write("\n".join(lines)+"\n")
+    os.replace(temp_path, textfile_path)
+
+def send_statsd(address, report, prefix="lst_periodic"):
+    """
+    Sends a run report to a StatsD server over UDP, counters as counts and
+    everything else as gauges. Failures are logged rather than raised.
+
+    params:
+        address: "host:port" of the StatsD server
+        report: dict written by write_run_report
+        prefix: prefix of every metric name
+    """
+    host, _, port = address.rpartition(":")
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as statsd_socket:
+            for name, value, kind in flatten_report(report):
+                statsd_socket.sendto((prefix+"."+name+":"+str(value)+"|"+("c" if kind == "counter" else "g")).encode(),
+                    (host or "localhost", int(port)))
+    except (OSError, ValueError) as e:
+        logging.warning("Unable to send metrics to StatsD at "+address+": "+repr(e))
@@ -0,0 +1,160 @@
+"""
+Class for reading the records of one array within a JSON object response as
+they arrive rather than decoding the whole response at once. Only the record
+being decoded and the unread part of the current chunk are held in memory.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import json
+import codecs
+
+#whitespace allowed between JSON tokens
+WHITESPACE = " \t\n\r"
+
+#unread text kept before the buffer is trimmed
+TRIM_SIZE = 64*1024
+
+class JsonArrayError(KeyError):
+    """
+    Raised when a JSON object response has an error value or does not include
+    the array being read, for ex. an error returned with a successful status.
+    """
+
+class JsonArrayStream:
+    def __init__(self, chunks, array_key, on_close=None):
+        """
+        Creates a stream of the records of array_key within a JSON object.
+
+        params:
+            chunks: iterable of bytes or str chunks making up the JSON object,
+                for ex. the iter_content of a streamed response
+            array_key: top level key of the array whose records are to be read
+            on_close: optional function called once the stream is finished, for ex.
+                to release the connection of a streamed response
+        """
+        self.chunks = iter(chunks)
+        self.array_key = array_key
+        self.on_close = on_close
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.position = 0
+        self.finished_reading = False
+
+        #other top level values of the object, complete once the records are read
+        self.fields = {}
+
+    def read_more(self):
+        """
+        Adds the next chunk to the buffer.
+
+        returns:
+            whether more text was added
+        """
+        if self.position > TRIM_SIZE:
+            self.buffer = self.buffer[self.position:]
+            self.position = 0
+
+        for chunk in self.chunks:
+            text = self.text_decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                self.buffer += text
+                return True
+
+        if not self.finished_reading:
+            self.finished_reading = True
+            self.buffer += self.text_decoder.decode(b"", final=True)
+        return False
+
+    def next_character(self):
+        """
+        Skips whitespace and returns the next character without consuming it.
+
+        returns:
+            next non-whitespace character or an empty string at the end of the text
+        """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer) or not self.read_more():
+                return self.buffer[self.position:self.position+1]
+
+    def expect(self, characters):
+        """
+        Consumes the next character, which must be one of characters.
+
+        returns:
+            the character consumed
+        """
+        character = self.next_character()
+        if not character or character not in characters:
+            raise json.JSONDecodeError("Expecting one of "+repr(characters), self.buffer, self.position)
+        self.position += 1
+        return character
+
+    def decode_value(self):
+        """
+        Decodes the next complete JSON value, reading more chunks while the
+        value is incomplete. A value ending with the buffer is only accepted at
+        the end of the text since a number may continue in the next chunk.
+
+        returns:
+            the decoded value
+        """
+        self.next_character()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                if end < len(self.buffer) or self.finished_reading:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.finished_reading:
+                    raise
+            self.read_more()
+
+    def __iter__(self):
+        """
+        Generator of the records of the array, reading the rest of the object
+        into fields once the records are finished.
+
+        yields:
+            each decoded record of the array in order
+
+        raises:
+            JsonArrayError: when the object has a top level error value or ends
+                without the array
+        """
+        try:
+            self.expect("{")
+            found_array = False
+            if self.next_character() == "}":
+                self.position += 1
+            else:
+                while True:
+                    key = self.decode_value()
+                    self.expect(":")
+                    if key == self.array_key and self.next_character() == "[":
+                        found_array = True
+                        self.position += 1
+                        if self.next_character() == "]":
+                            self.position += 1
+                        else:
+                            while True:
+                                yield self.decode_value()
+                                if self.expect(",]") == "]":
+                                    break
+                    else:
+                        self.fields[key] = self.decode_value()
+                        if key == "error":
+                            raise JsonArrayError("Response includes an error: "+json.dumps(self.fields[key]))
+                    if self.expect(",}") == "}":
+                        break
+
+            if not found_array:
+                raise JsonArrayError("Response does not include "+repr(self.array_key))
+        finally:
+            if self.on_close is not None:
+                self.on_close()
+                self.on_close = None
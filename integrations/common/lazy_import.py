@@ -0,0 +1,47 @@
+"""
+Deferred loading of modules with heavy imports. A LazyModule stands in for a
+module and only imports it the first time one of its attributes is used, so
+that a run which never uses an integration (for ex. --help, --dry-run or
+--only zoom) does not pay for importing it or its dependencies.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import sys
+import importlib
+import threading
+
+class LazyModule:
+    def __init__(self, module_name):
+        """
+        params:
+            module_name: full name of the module to import when first used,
+                for ex. "integrations.google.google_archiver"
+        """
+        self._module_name = module_name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """
+        returns:
+            the module, importing it the first time it is needed
+        """
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._module_name)
+        return self._module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        return "<lazy module "+repr(self._module_name)+(" (loaded)>" if self._module is not None else ">")
+
+def loaded_module(module_name):
+    """
+    returns:
+        the module if it has already been imported, otherwise None
+    """
+    return sys.modules.get(module_name)
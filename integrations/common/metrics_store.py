@@ -0,0 +1,231 @@
+"""
+Class for storing Zoom and Mediasite metrics locally in an embedded SQLite
+database so that reports can be computed from stored rows and only data
+missing from the store needs to be requested from the APIs.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import os
+import time
+import sqlite3
+import datetime
+import threading
+
+#columns of the Zoom daily report which are stored as integers
+ZOOM_DAILY_COLUMNS = ["new_user", "meetings", "participants", "meeting_minutes"]
+
+#columns of the Zoom account report which are stored as integers
+ZOOM_USER_COLUMNS = ["meetings", "meeting_minutes", "participants"]
+
+#rows inserted into the store at a time while a report is written
+STORE_BATCH_SIZE = 10000
+
+#fields of the Mediasite ResultSummary which are stored
+MEDIASITE_SUMMARY_COLUMNS = ["PresentationsAvailable", "TotalTimeWatched", "PresentationsWatched",
+    "TotalViews", "TotalUsers", "PeakConnections"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS zoom_daily (
+    date TEXT PRIMARY KEY,
+    new_user INTEGER, meetings INTEGER, participants INTEGER, meeting_minutes INTEGER,
+    final INTEGER NOT NULL, fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS zoom_user_periods (
+    prefix TEXT, accounts TEXT, period_start TEXT, period_end TEXT,
+    final INTEGER NOT NULL, fetched_at REAL NOT NULL,
+    PRIMARY KEY (prefix, accounts, period_start, period_end)
+);
+CREATE TABLE IF NOT EXISTS zoom_user (
+    prefix TEXT, accounts TEXT, period_start TEXT, period_end TEXT, row_number INTEGER,
+    user_id TEXT, email TEXT, meetings INTEGER, meeting_minutes INTEGER, participants INTEGER,
+    PRIMARY KEY (prefix, accounts, period_start, period_end, row_number)
+);
+CREATE TABLE IF NOT EXISTS mediasite_summary (
+    prefix TEXT, report_name TEXT, date TEXT,
+    PresentationsAvailable TEXT, TotalTimeWatched TEXT, PresentationsWatched TEXT,
+    TotalViews TEXT, TotalUsers TEXT, PeakConnections TEXT,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (prefix, report_name, date)
+);
+CREATE TABLE IF NOT EXISTS archived_periods (
+    prefix TEXT, spreadsheet_id TEXT, period_start TEXT, period_end TEXT,
+    archived_at REAL NOT NULL,
+    PRIMARY KEY (prefix, spreadsheet_id, period_start, period_end)
+);
+"""
+
+class MetricsStore:
+    def __init__(self, database_path):
+        """
+        params:
+            database_path: path to SQLite database file, created if it does not exist
+        """
+        if os.path.dirname(database_path):
+            os.makedirs(os.path.dirname(database_path), exist_ok=True)
+
+        #one connection shared between threads with access serialized by a lock
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(database_path, timeout=30, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.lock, self.connection:
+            #Zoom user rows stored before they were kept per account list are dropped
+            #and requested again since the accounts they were filtered by are unknown
+            zoom_user_columns = [row[1] for row in self.connection.execute("PRAGMA table_info(zoom_user_periods)")]
+            if zoom_user_columns and "accounts" not in zoom_user_columns:
+                self.connection.execute("DROP TABLE zoom_user_periods")
+                self.connection.execute("DROP TABLE IF EXISTS zoom_user")
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def query(self, sql, parameters=()):
+        with self.lock:
+            return [dict(row) for row in self.connection.execute(sql, parameters)]
+
+    def missing_zoom_daily_dates(self, dates):
+        """
+        Finds dates which are not stored or were stored before the day was over.
+
+        params:
+            dates: list of "YYYY-MM-DD" date strings
+
+        returns:
+            list of date strings which need to be requested from the API
+        """
+        if not dates:
+            return []
+        stored = {row["date"] for row in self.query(
+            "SELECT date FROM zoom_daily WHERE final = 1 AND date BETWEEN ? AND ?",
+            (min(dates), max(dates)))}
+        return [date for date in dates if date not in stored]
+
+    def add_zoom_daily_rows(self, rows):
+        """
+        Stores rows from the Zoom daily report, replacing any stored for the same date.
+        Rows for days which are not over yet are marked so they are fetched again.
+
+        params:
+            rows: list of dicts from the "dates" list of the Zoom daily report
+        """
+        today = datetime.date.today().strftime("%Y-%m-%d")
+        fetched_at = time.time()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO zoom_daily (date, "+", ".join(ZOOM_DAILY_COLUMNS)+", final, fetched_at) "+
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [[str(row["date"])]+[int(row.get(column, 0) or 0) for column in ZOOM_DAILY_COLUMNS]+
+                    [int(str(row["date"]) < today), fetched_at] for row in rows]
+                )
+
+    def zoom_daily_rows(self, start_date_string, end_date_string):
+        """
+        returns:
+            list of stored Zoom daily report row dicts between the dates inclusive
+        """
+        return self.query("SELECT date, "+", ".join(ZOOM_DAILY_COLUMNS)+" FROM zoom_daily "+
+            "WHERE date BETWEEN ? AND ? ORDER BY date", (start_date_string, end_date_string))
+
+    def has_zoom_user_period(self, prefix, accounts, start_date_string, end_date_string):
+        """
+        returns:
+            whether rows for a closed period of the Zoom account report are stored
+            for the account list
+        """
+        return len(self.query("SELECT 1 FROM zoom_user_periods WHERE prefix = ? AND accounts = ? "+
+            "AND period_start = ? AND period_end = ? AND final = 1",
+            (prefix, accounts, start_date_string, end_date_string))) > 0
+
+    def storing_zoom_user_rows(self, prefix, accounts, start_date_string, end_date_string, rows):
+        """
+        Generator storing rows from the Zoom account report for a period as
+        they pass through, replacing any previously stored for the same prefix,
+        account list and period. Rows are inserted in batches of STORE_BATCH_SIZE
+        and the period is only recorded once every row has passed so that an
+        interrupted report is requested again.
+
+        params:
+            prefix: the prefix of the report, for ex. "BBA"
+            accounts: key of the account list the rows were matched by, see AccountMatcher.key
+            start_date_string: first date of the period, "YYYY-MM-DD"
+            end_date_string: last date of the period, "YYYY-MM-DD"
+            rows: iterable of user dicts from the Zoom account report
+
+        yields:
+            each row after it has been added to a batch
+        """
+        final = int(end_date_string < datetime.date.today().strftime("%Y-%m-%d"))
+        period = (prefix, accounts, start_date_string, end_date_string)
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM zoom_user WHERE prefix = ? AND accounts = ? "+
+                "AND period_start = ? AND period_end = ?", period)
+            self.connection.execute("DELETE FROM zoom_user_periods WHERE prefix = ? AND accounts = ? "+
+                "AND period_start = ? AND period_end = ?", period)
+
+        batch = []
+        for row_number, row in enumerate(rows):
+            batch.append(period+(row_number, row.get("user_id"), row.get("email"))+
+                tuple(int(row.get(column, 0) or 0) for column in ZOOM_USER_COLUMNS))
+            if len(batch) == STORE_BATCH_SIZE:
+                with self.lock, self.connection:
+                    self.connection.executemany("INSERT INTO zoom_user VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                batch = []
+            yield row
+
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT INTO zoom_user VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            self.connection.execute("INSERT OR REPLACE INTO zoom_user_periods VALUES (?, ?, ?, ?, ?, ?)",
+                period+(final, time.time()))
+
+    def zoom_user_rows(self, prefix, accounts, start_date_string, end_date_string):
+        """
+        returns:
+            list of stored Zoom account report row dicts for a prefix, account list and period
+        """
+        return self.query("SELECT user_id, email, "+", ".join(ZOOM_USER_COLUMNS)+" FROM zoom_user "+
+            "WHERE prefix = ? AND accounts = ? AND period_start = ? AND period_end = ? ORDER BY row_number",
+            (prefix, accounts, start_date_string, end_date_string))
+
+    def add_mediasite_summary(self, prefix, report_name, date_string, result_summary):
+        """
+        Stores the ResultSummary of a Mediasite report.
+
+        params:
+            prefix: the prefix of the report, for ex. "BBA"
+            report_name: presentation report name within Mediasite
+            date_string: date of the report, "YYYY-MM-DD"
+            result_summary: dict of ResultSummary field names to their text
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO mediasite_summary VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (prefix, report_name, date_string)+
+                    tuple(result_summary.get(column) for column in MEDIASITE_SUMMARY_COLUMNS)+
+                    (time.time(),)
+                )
+
+    def is_period_archived(self, prefix, spreadsheet_id, start_date_string, end_date_string):
+        """
+        returns:
+            whether a period was already archived to the spreadsheet for a prefix
+        """
+        return len(self.query("SELECT 1 FROM archived_periods WHERE prefix = ? AND spreadsheet_id = ? "+
+            "AND period_start = ? AND period_end = ?",
+            (prefix, spreadsheet_id, start_date_string, end_date_string))) > 0
+
+    def mark_periods_archived(self, prefix, spreadsheet_id, periods):
+        """
+        Records periods which have been archived to the spreadsheet for a prefix.
+
+        params:
+            prefix: the prefix of the report, for ex. "BBA"
+            spreadsheet_id: ID of Google spreadsheet the periods were archived to
+            periods: list of (start_date_string, end_date_string) pairs
+        """
+        archived_at = time.time()
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO archived_periods VALUES (?, ?, ?, ?, ?)",
+                [(prefix, spreadsheet_id, start_date_string, end_date_string, archived_at)
+                    for start_date_string, end_date_string in periods])
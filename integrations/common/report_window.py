@@ -0,0 +1,184 @@
+"""
+Class for the date window a report covers. Shared by every module so that
+weekly, monthly and explicit start/end reports use the same dates, labels and
+file names.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import datetime
+
+class ReportWindow:
+    def __init__(self, start_date, end_date, recurrence="custom"):
+        """
+        params:
+            start_date: first datetime.date covered by the report
+            end_date: last datetime.date covered by the report (inclusive)
+            recurrence: the period of the report, for ex. "weekly", "monthly" or "custom"
+        """
+        if end_date < start_date:
+            raise ValueError("Report window end "+str(end_date)+" is before start "+str(start_date))
+        self.start_date = start_date
+        self.end_date = end_date
+        self.recurrence = recurrence
+
+    def __repr__(self):
+        return "ReportWindow("+self.start_string+", "+self.end_string+", "+self.recurrence+")"
+
+    @classmethod
+    def from_recurrence(cls, recurrence, today=None):
+        """
+        Creates window for a recurrence relative to today. Weekly windows are
+        the 7 days ending today and monthly windows are the previous month.
+
+        params:
+            recurrence: the period of the report, for ex. "weekly", "monthly"
+            today: optional datetime.date to use in place of today
+
+        returns:
+            ReportWindow
+        """
+        if today is None:
+            today = datetime.date.today()
+
+        if recurrence == "weekly":
+            return cls(today - datetime.timedelta(days=6), today, recurrence)
+        elif recurrence == "monthly":
+            last_day_of_previous_month = today.replace(day=1) - datetime.timedelta(days=1)
+            return cls(last_day_of_previous_month.replace(day=1), last_day_of_previous_month, recurrence)
+
+        raise ValueError("Unknown recurrence: "+str(recurrence))
+
+    @classmethod
+    def from_strings(cls, start_string, end_string):
+        """
+        Creates window from explicit dates. Windows covering exactly one calendar
+        month are labeled as monthly so they match monthly reports.
+
+        params:
+            start_string: first date covered by the report, "YYYY-MM-DD"
+            end_string: last date covered by the report, "YYYY-MM-DD"
+
+        returns:
+            ReportWindow
+        """
+        start_date = datetime.datetime.strptime(start_string, "%Y-%m-%d").date()
+        end_date = datetime.datetime.strptime(end_string, "%Y-%m-%d").date()
+        window = cls(start_date, end_date)
+        if start_date.day == 1 and (end_date + datetime.timedelta(days=1)).day == 1 and \
+            (start_date.year, start_date.month) == (end_date.year, end_date.month):
+            window.recurrence = "monthly"
+        return window
+
+    @classmethod
+    def for_month(cls, year_number, month_number):
+        """
+        Creates monthly window covering one calendar month.
+
+        params:
+            year_number: year of the month
+            month_number: month number from 1 to 12
+
+        returns:
+            ReportWindow
+        """
+        start_date = datetime.date(year_number, month_number, 1)
+        next_month = (start_date.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        return cls(start_date, next_month - datetime.timedelta(days=1), "monthly")
+
+    @property
+    def start_string(self):
+        return self.start_date.strftime("%Y-%m-%d")
+
+    @property
+    def end_string(self):
+        return self.end_date.strftime("%Y-%m-%d")
+
+    @property
+    def file_string(self):
+        """
+        Date string used in the names of exported files.
+        """
+        return self.end_date.strftime("%m-%d-%Y")
+
+    @property
+    def email_date_string(self):
+        """
+        Date string used in report emails, for ex. "9/6/2017" or "8/2017".
+        """
+        if self.recurrence == "monthly":
+            return self.end_date.strftime("%m/%Y").lstrip("0")
+        elif self.recurrence == "weekly":
+            return '{dt.month}/{dt.day}/{dt.year}'.format(dt = self.end_date)
+        return self.sheet_date_string
+
+    @property
+    def sheet_date_string(self):
+        """
+        Date string used to label the period in the analytics spreadsheet,
+        for ex. "8/31/2017-9/6/2017" or "Aug 2017".
+        """
+        if self.recurrence == "monthly":
+            return self.end_date.strftime("%b")+" "+self.end_date.strftime("%Y")
+        return '{dt.month}/{dt.day}/{dt.year}'.format(dt = self.start_date)+"-"+\
+            '{dt.month}/{dt.day}/{dt.year}'.format(dt = self.end_date)
+
+    def dates(self):
+        """
+        returns:
+            list of "YYYY-MM-DD" date strings covered by the window
+        """
+        return [(self.start_date + datetime.timedelta(days=x)).strftime("%Y-%m-%d")
+            for x in range((self.end_date - self.start_date).days + 1)]
+
+    def months(self):
+        """
+        returns:
+            list of (year, month) number pairs overlapping the window in order
+        """
+        months = []
+        year, month = self.start_date.year, self.start_date.month
+        while (year, month) <= (self.end_date.year, self.end_date.month):
+            months.append((year, month))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return months
+
+    def is_closed(self, today=None):
+        """
+        returns:
+            whether the window ended before today so its data will no longer change
+        """
+        return self.end_date < (today or datetime.date.today())
+
+    def split(self, period):
+        """
+        Splits the window into consecutive periods. Monthly periods follow
+        calendar months and weekly periods are 7 days from the window start,
+        with the first and last periods trimmed to the window.
+
+        params:
+            period: the period to split into, "weekly" or "monthly"
+
+        returns:
+            list of ReportWindow
+        """
+        windows = []
+        period_start = self.start_date
+        while period_start <= self.end_date:
+            if period == "monthly":
+                next_month = (period_start.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+                period_end = next_month - datetime.timedelta(days=1)
+            elif period == "weekly":
+                period_end = period_start + datetime.timedelta(days=6)
+            else:
+                raise ValueError("Unknown period: "+str(period))
+
+            period_end = min(period_end, self.end_date)
+            window = ReportWindow(period_start, period_end, period)
+            #trimmed periods are not full weeks or months
+            if (period == "weekly" and (period_end - period_start).days != 6) or \
+                (period == "monthly" and not (period_start.day == 1 and (period_end + datetime.timedelta(days=1)).day == 1)):
+                window.recurrence = "custom"
+            windows.append(window)
+            period_start = period_end + datetime.timedelta(days=1)
+        return windows
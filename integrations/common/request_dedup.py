@@ -0,0 +1,113 @@
+"""
+Class for de-duplicating identical upstream API requests made while running
+several reports in one process. The first caller for a request performs it and
+any other caller asking for the same request while it is in flight shares the
+result. Results are not kept once the request finishes so that responses, for
+ex. every page of a large account report, are not held for the whole run.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import json
+import asyncio
+import threading
+import concurrent.futures
+
+def request_key(*request_parts):
+    """
+    Creates a hashable key for a request from its parts.
+
+    params:
+        request_parts: values which identify the request, for ex. resource and parameters
+
+    returns:
+        String which is identical for identical requests
+    """
+    return json.dumps(request_parts, sort_keys=True, default=str)
+
+class RequestDeduplicator:
+    def __init__(self):
+        """
+        Creates an empty store of requests in flight shared between callers.
+        """
+        self.lock = threading.Lock()
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+
+    def claim(self, key):
+        """
+        Finds the future of a key, creating it when the key is not in flight.
+
+        returns:
+            tuple of the future and whether the caller is to perform the request
+        """
+        with self.lock:
+            future = self.results.get(key)
+            if future is None:
+                future = concurrent.futures.Future()
+                self.results[key] = future
+                self.misses += 1
+                return future, True
+            self.hits += 1
+            return future, False
+
+    def finish(self, key, future, result=None, exception=None):
+        """
+        Removes a key from the requests in flight and passes its result or
+        exception to the callers waiting on it.
+        """
+        with self.lock:
+            del self.results[key]
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def call(self, key, request_function):
+        """
+        Performs request_function once for the callers of a key in flight and
+        shares the result. Callers asking for a key which is still in flight wait
+        for the first caller, later callers perform the request again.
+
+        params:
+            key: key identifying the request, see request_key
+            request_function: function without arguments performing the request
+
+        returns:
+            result of request_function for the key
+        """
+        future, owner = self.claim(key)
+        if owner:
+            try:
+                result = request_function()
+            except BaseException as e:
+                self.finish(key, future, exception=e)
+                raise
+            self.finish(key, future, result)
+
+        return future.result()
+
+    async def call_async(self, key, request_function):
+        """
+        Performs the request of an async client once per key in the same way as
+        call, sharing results with both threaded and async callers.
+
+        params:
+            key: key identifying the request, see request_key
+            request_function: function without arguments returning an awaitable
+                performing the request
+
+        returns:
+            result of request_function for the key
+        """
+        future, owner = self.claim(key)
+        if owner:
+            try:
+                result = await request_function()
+            except BaseException as e:
+                self.finish(key, future, exception=e)
+                raise
+            self.finish(key, future, result)
+
+        return await asyncio.wrap_future(future)
@@ -0,0 +1,534 @@
+"""
+Retry, rate limiting and circuit breaking shared by the outbound API clients.
+Each service (for ex. "zoom", "mediasite", "google") has one ResilientCaller
+per process so that its rate limit holds across every thread and client
+making requests to it, and its retry and throttle counts are kept as metrics.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+import email.utils
+import requests
+
+#statuses which are retried, 429 and 503 meaning the request was not processed
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+NOT_PROCESSED_STATUSES = (429, 503)
+
+class ApiRequestError(requests.exceptions.HTTPError):
+    def __init__(self, service_name, status_code, url=None, body=None, response=None):
+        """
+        Raised when a request to an API does not succeed.
+
+        params:
+            service_name: name of the service the request was made to
+            status_code: HTTP status of the response
+            url: URL of the request if known
+            body: start of the response body if known
+            response: response object if known
+        """
+        self.service_name = service_name
+        self.status_code = status_code
+        self.url = url
+        self.body = body
+        super().__init__(service_name+" request failed with status "+str(status_code)+
+            (" for "+url if url else "")+(": "+body if body else ""), response=response)
+
+class CircuitOpenError(Exception):
+    def __init__(self, service_name, retry_in):
+        """
+        Raised when a request is not sent because the circuit for the service is open.
+
+        params:
+            service_name: name of the service
+            retry_in: seconds until a request will be let through again
+        """
+        self.service_name = service_name
+        self.retry_in = retry_in
+        super().__init__("Requests to "+service_name+" are paused after repeated failures, retrying in "+
+            str(round(retry_in, 1))+" seconds")
+
+class ResilienceMetrics:
+    def __init__(self):
+        """
+        Creates counters for the requests made to a service.
+        """
+        self.lock = threading.Lock()
+        self.counts = {"attempts":0,
+            "successes":0,
+            "failures":0,
+            "retries":0,
+            "retry_after_honoured":0,
+            "throttled":0,
+            "throttle_wait_seconds":0.0,
+            "circuit_opened":0,
+            "circuit_rejected":0
+            }
+
+    def add(self, name, value=1):
+        with self.lock:
+            self.counts[name] += value
+
+    def stats(self):
+        """
+        returns:
+            dict of counter names to their values
+        """
+        with self.lock:
+            stats = dict(self.counts)
+        stats["throttle_wait_seconds"] = round(stats["throttle_wait_seconds"], 3)
+        return stats
+
+class TokenBucket:
+    def __init__(self, rate=None, capacity=None):
+        """
+        Rate limiter letting through rate requests per second on average with
+        bursts of up to capacity requests.
+
+        params:
+            rate: requests per second or None for no limit
+            capacity: largest burst of requests, defaults to rate rounded up
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, int(rate or 1))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        """
+        Takes a token if one is available.
+
+        returns:
+            0 when a token was taken, otherwise seconds until one will be available
+        """
+        if not self.rate:
+            return 0.0
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens+(now-self.updated)*self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1-self.tokens)/self.rate
+
+    def acquire(self):
+        """
+        Takes a token waiting until one is available.
+
+        returns:
+            seconds waited for a token
+        """
+        waited = 0.0
+        wait = self.take()
+        while wait:
+            time.sleep(wait)
+            waited += wait
+            wait = self.take()
+        return waited
+
+    async def acquire_async(self):
+        """
+        Takes a token waiting until one is available without blocking the event loop.
+
+        returns:
+            seconds waited for a token
+        """
+        waited = 0.0
+        wait = self.take()
+        while wait:
+            await asyncio.sleep(wait)
+            waited += wait
+            wait = self.take()
+        return waited
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        """
+        Stops requests to a service after failure_threshold failures in a row.
+        Once reset_timeout seconds pass one trial request is let through, closing
+        the circuit again when it succeeds.
+
+        params:
+            failure_threshold: failures in a row which open the circuit, None to never open
+            reset_timeout: seconds the circuit stays open before a trial request
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        """
+        returns:
+            None when a request may be sent, otherwise seconds until the circuit
+            lets a trial request through
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return None
+            retry_in = self.opened_at+self.reset_timeout-time.monotonic()
+            if retry_in <= 0 and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return None
+            return max(retry_in, 0)
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def release_trial(self):
+        """
+        Lets another trial request through when a trial ended without an answer
+        from the service, for ex. when it was interrupted or cancelled.
+        """
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        """
+        returns:
+            whether this failure opened the circuit
+        """
+        with self.lock:
+            self.failures += 1
+            was_open = self.opened_at is not None
+            if self.trial_in_flight or (self.failure_threshold and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self.trial_in_flight = False
+                return not was_open
+            return False
+
+def response_status(value):
+    """
+    Finds the HTTP status of a response or of the response of an exception,
+    for ex. a requests Response, requests HTTPError or googleapiclient HttpError.
+
+    returns:
+        integer status or None when there is no response
+    """
+    for candidate in (value, getattr(value, "response", None), getattr(value, "resp", None)):
+        if candidate is None:
+            continue
+        status = getattr(candidate, "status_code", None)
+        if status is None:
+            status = getattr(candidate, "status", None)
+        if status is not None:
+            return int(status)
+    return None
+
+def response_body(response, limit=200):
+    """
+    returns:
+        the start of the body of a response for error messages
+    """
+    try:
+        return (getattr(response, "text", "") or "")[:limit]
+    except Exception:
+        return ""
+
+def retry_after_seconds(value):
+    """
+    Reads the Retry-After header of a response or of the response of an exception.
+
+    returns:
+        seconds to wait or None when there is no header
+    """
+    for candidate in (value, getattr(value, "response", None), getattr(value, "resp", None)):
+        if candidate is None:
+            continue
+        headers = getattr(candidate, "headers", None)
+        if headers is None and isinstance(candidate, dict):
+            headers = candidate
+        if not headers:
+            continue
+        retry_after = headers.get("Retry-After", headers.get("retry-after"))
+        if retry_after is None:
+            continue
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, email.utils.parsedate_to_datetime(retry_after).timestamp()-time.time())
+            except (TypeError, ValueError):
+                return None
+    return None
+
+class ResilientCaller:
+    def __init__(self, service_name, max_attempts=4, backoff=0.5, max_backoff=30, jitter=0.1,
+        max_retry_after=120, rate_limit=None, burst=None, failure_threshold=5, reset_timeout=30):
+        """
+        params:
+            service_name: name of the service used in errors and metrics
+            max_attempts: attempts made for a request before giving up
+            backoff: seconds waited before the first retry, doubling for each retry after
+            max_backoff: longest wait between retries in seconds
+            jitter: fraction of the wait added or removed at random
+            max_retry_after: longest Retry-After in seconds which is honoured
+            rate_limit: requests per second allowed to the service or None for no limit
+            burst: largest burst of requests allowed by the rate limit
+            failure_threshold: failures in a row which pause requests to the service
+            reset_timeout: seconds requests are paused after failure_threshold failures
+        """
+        self.service_name = service_name
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.max_retry_after = max_retry_after
+        self.rate_limiter = TokenBucket(rate_limit, burst)
+        self.circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.metrics = ResilienceMetrics()
+
+    def retry_delay(self, attempt, value):
+        """
+        Finds the wait before retrying, honouring Retry-After when provided.
+
+        params:
+            attempt: number of the attempt which failed starting from 1
+            value: response or exception of the failed attempt
+
+        returns:
+            seconds to wait
+        """
+        delay = min(self.max_backoff, self.backoff*(2**(attempt-1)))
+        delay = max(0.0, delay+delay*random.uniform(-self.jitter, self.jitter))
+
+        retry_after = retry_after_seconds(value)
+        if retry_after is not None:
+            self.metrics.add("retry_after_honoured")
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+    def is_retryable(self, status, error, idempotent, connection_errors=()):
+        """
+        Decides whether a failed attempt may be retried. Requests which are not
+        idempotent are only retried when they were known not to be processed.
+        """
+        if status is not None:
+            return status in RETRY_STATUSES and (idempotent or status in NOT_PROCESSED_STATUSES)
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        return idempotent and isinstance(error, (requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout, ConnectionError, TimeoutError)+tuple(connection_errors))
+
+    def record_failure(self, status):
+        """
+        Records a failed attempt, only server errors and unanswered requests
+        counting towards opening the circuit.
+        """
+        if status is None or status >= 500 or status == 429:
+            if self.circuit_breaker.record_failure():
+                self.metrics.add("circuit_opened")
+                logging.warning("Pausing requests to "+self.service_name+" after repeated failures")
+
+    def before_attempt(self, failed_error):
+        """
+        Checks the circuit before an attempt. When the circuit opens while
+        retrying the last failure is raised.
+
+        params:
+            failed_error: exception of the last failed attempt or None
+        """
+        retry_in = self.circuit_breaker.before_call()
+        if retry_in is not None:
+            self.metrics.add("circuit_rejected")
+            if failed_error is not None:
+                self.metrics.add("failures")
+                raise failed_error
+            raise CircuitOpenError(self.service_name, retry_in)
+
+    def record_throttle(self, waited):
+        if waited:
+            self.metrics.add("throttled")
+            self.metrics.add("throttle_wait_seconds", waited)
+
+    def attempt_raised(self, attempt, error, idempotent, connection_errors=()):
+        """
+        Handles an attempt which raised, raising error again unless it is retried.
+
+        returns:
+            error when the attempt is to be retried
+        """
+        status = response_status(error)
+        if status is not None and status < 400:
+            self.circuit_breaker.record_success()
+            raise error
+        #errors which did not come from the service are not retried
+        if status is None and not isinstance(error, (requests.exceptions.RequestException, OSError)+tuple(connection_errors)):
+            self.circuit_breaker.record_success()
+            raise error
+        self.record_failure(status)
+        if attempt == self.max_attempts or not self.is_retryable(status, error, idempotent, connection_errors):
+            self.metrics.add("failures")
+            #client errors show the service is answering
+            if status is not None and status < 500 and status != 429:
+                self.circuit_breaker.record_success()
+            raise error
+        return error
+
+    def attempt_returned(self, attempt, result, idempotent):
+        """
+        Handles the response of an attempt, raising ApiRequestError for an error
+        status which is not retried.
+
+        returns:
+            None when the response succeeded, otherwise the ApiRequestError of the
+            response when the attempt is to be retried
+        """
+        status = response_status(result)
+        if status is None or status < 400:
+            self.circuit_breaker.record_success()
+            self.metrics.add("successes")
+            return None
+        self.record_failure(status)
+        failed_error = ApiRequestError(self.service_name, status, str(getattr(result, "url", "")) or None,
+            response_body(result), result)
+        if attempt == self.max_attempts or not self.is_retryable(status, None, idempotent):
+            self.metrics.add("failures")
+            #client errors show the service is answering
+            if status < 500 and status != 429:
+                self.circuit_breaker.record_success()
+            raise failed_error
+        return failed_error
+
+    def before_retry(self, attempt, failed):
+        """
+        Logs a retry and releases the failed response.
+
+        params:
+            attempt: number of the attempt which failed starting from 1
+            failed: response or exception of the failed attempt
+
+        returns:
+            seconds to wait before retrying
+        """
+        status = response_status(failed)
+        delay = self.retry_delay(attempt, failed)
+        self.metrics.add("retries")
+        logging.info("Retrying "+self.service_name+" request in "+str(round(delay, 2))+
+            " seconds after "+(("status "+str(status)) if status is not None else type(failed).__name__))
+        if hasattr(failed, "close"):
+            failed.close()
+        return delay
+
+    def call(self, request_function, idempotent=True):
+        """
+        Performs a request through the rate limiter and circuit breaker, retrying
+        failures with backoff.
+
+        params:
+            request_function: function making the request, returning a response or
+                raising an exception with a response
+            idempotent: whether the request may safely be sent more than once
+
+        returns:
+            the successful response or result of request_function
+
+        raises:
+            ApiRequestError: when a response has an error status after all attempts
+            CircuitOpenError: when requests to the service are paused
+        """
+        failed_error = None
+        for attempt in range(1, self.max_attempts+1):
+            self.before_attempt(failed_error)
+            self.record_throttle(self.rate_limiter.acquire())
+
+            self.metrics.add("attempts")
+            try:
+                result = request_function()
+            except Exception as e:
+                failed = failed_error = self.attempt_raised(attempt, e, idempotent)
+            except BaseException:
+                self.circuit_breaker.release_trial()
+                raise
+            else:
+                failed_error = self.attempt_returned(attempt, result, idempotent)
+                if failed_error is None:
+                    return result
+                failed = result
+
+            time.sleep(self.before_retry(attempt, failed))
+
+    async def call_async(self, request_function, idempotent=True, connection_errors=()):
+        """
+        Performs a request of an async client in the same way as call, waiting
+        without blocking the event loop.
+
+        params:
+            request_function: function without arguments returning an awaitable which
+                makes the request, returning a response or raising an exception
+            idempotent: whether the request may safely be sent more than once
+            connection_errors: exception classes of the async HTTP library raised when
+                the service could not be reached, for ex. aiohttp.ClientConnectionError
+
+        returns:
+            the successful response or result of request_function
+
+        raises:
+            ApiRequestError: when a response has an error status after all attempts
+            CircuitOpenError: when requests to the service are paused
+        """
+        failed_error = None
+        for attempt in range(1, self.max_attempts+1):
+            self.before_attempt(failed_error)
+            self.record_throttle(await self.rate_limiter.acquire_async())
+
+            self.metrics.add("attempts")
+            try:
+                result = await request_function()
+            except Exception as e:
+                failed = failed_error = self.attempt_raised(attempt, e, idempotent, connection_errors)
+            except BaseException:
+                #note: includes the request being cancelled
+                self.circuit_breaker.release_trial()
+                raise
+            else:
+                failed_error = self.attempt_returned(attempt, result, idempotent)
+                if failed_error is None:
+                    return result
+                failed = result
+
+            await asyncio.sleep(self.before_retry(attempt, failed))
+
+#one caller per service shared by every client in the process
+_callers = {}
+_callers_lock = threading.Lock()
+
+def for_service(service_name, settings=None):
+    """
+    Finds the ResilientCaller of a service, creating it from settings the first
+    time the service is used.
+
+    params:
+        service_name: name of the service, for ex. "zoom"
+        settings: optional dict of ResilientCaller arguments, for ex. from the
+            "resilience" entry of an API configuration file
+
+    returns:
+        ResilientCaller shared by every client of the service
+    """
+    with _callers_lock:
+        caller = _callers.get(service_name)
+        if caller is None:
+            caller = _callers[service_name] = ResilientCaller(service_name, **(settings or {}))
+        return caller
+
+def service_metrics():
+    """
+    returns:
+        dict of service names to the retry, throttle and circuit counts of each
+    """
+    with _callers_lock:
+        callers = dict(_callers)
+    return {service_name:caller.metrics.stats() for service_name, caller in callers.items()}
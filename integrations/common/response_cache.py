@@ -0,0 +1,189 @@
+"""
+Class for caching API responses on disk. Entries are content-addressed by
+the namespace of the cache (for ex. the account whose data is requested) and
+the endpoint and parameters of the request, may expire after a TTL or never,
+and the least recently used entries are evicted once the cache grows past
+its size limit.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import integrations.common.request_dedup as request_dedup
+
+#file extension used for cache entries
+ENTRY_EXTENSION = ".cache"
+
+class ResponseCache:
+    def __init__(self, cache_dir, max_bytes=256*1024*1024, bypass=False, namespace=""):
+        """
+        params:
+            cache_dir: directory to store cached responses in
+            max_bytes: size the cache is trimmed back to after each store
+            bypass: when set responses are neither read from nor stored in the cache
+            namespace: identity of the account the responses belong to so that
+                caches of several accounts may share cache_dir, for ex. the API URL and key
+        """
+        self.cache_dir = cache_dir
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def entry_path(self, endpoint, params):
+        """
+        returns:
+            path of the cache entry for a request
+        """
+        key = hashlib.sha256((self.namespace+"\n"+request_dedup.request_key(endpoint, params)).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key+ENTRY_EXTENSION)
+
+    def get(self, endpoint, params):
+        """
+        Gets cached response for a request.
+
+        params:
+            endpoint: API endpoint of the request, for ex. "report/getdailyreport"
+            params: dict of parameters of the request
+
+        returns:
+            cached response text or None when not cached or expired
+        """
+        if self.bypass:
+            return None
+
+        path = self.entry_path(endpoint, params)
+        try:
+            with open(path, encoding="utf-8") as entry_file:
+                entry_meta = json.loads(entry_file.readline())
+                if entry_meta["expires_at"] is not None and entry_meta["expires_at"] < time.time():
+                    return None
+                content = entry_file.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+        #mark the entry as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return content
+
+    def set(self, endpoint, params, content, ttl=None):
+        """
+        Stores response for a request.
+
+        params:
+            endpoint: API endpoint of the request, for ex. "report/getdailyreport"
+            params: dict of parameters of the request
+            content: response text to store
+            ttl: seconds until the entry expires or None to never expire
+        """
+        if self.bypass:
+            return
+
+        path = self.entry_path(endpoint, params)
+        entry_meta = {"endpoint":endpoint,
+            "stored_at":time.time(),
+            "expires_at":None if ttl is None else time.time() + ttl
+            }
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = path+"."+str(threading.get_ident())+".tmp"
+            with open(temp_path, "w", encoding="utf-8") as entry_file:
+                entry_file.write(json.dumps(entry_meta)+"\n")
+                entry_file.write(content)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning("Unable to store cached response: "+repr(e))
+            return
+
+        self.evict()
+
+    def fetch(self, endpoint, params, request_function, ttl=None, validate=None):
+        """
+        Gets cached response for a request, performing and storing the request
+        when it is not cached.
+
+        params:
+            endpoint: API endpoint of the request, for ex. "report/getdailyreport"
+            params: dict of parameters of the request
+            request_function: function without arguments performing the request
+            ttl: seconds until a stored entry expires or None to never expire
+            validate: optional function returning whether a response may be stored,
+                for ex. so that error responses are not cached
+
+        returns:
+            response text
+        """
+        content = self.get(endpoint, params)
+        if content is not None:
+            with self.lock:
+                self.hits += 1
+            logging.info("Using cached response for "+endpoint+" "+json.dumps(params, sort_keys=True))
+            return content
+
+        with self.lock:
+            self.misses += 1
+        content = request_function()
+        if validate is None or validate(content):
+            self.set(endpoint, params, content, ttl)
+        return content
+
+    async def fetch_async(self, endpoint, params, request_function, ttl=None, validate=None):
+        """
+        Gets cached response for a request of an async client in the same way as fetch.
+
+        params:
+            request_function: function without arguments returning an awaitable
+                performing the request
+
+        returns:
+            response text
+        """
+        content = self.get(endpoint, params)
+        if content is not None:
+            with self.lock:
+                self.hits += 1
+            logging.info("Using cached response for "+endpoint+" "+json.dumps(params, sort_keys=True))
+            return content
+
+        with self.lock:
+            self.misses += 1
+        content = await request_function()
+        if validate is None or validate(content):
+            self.set(endpoint, params, content, ttl)
+        return content
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache is within max_bytes.
+        """
+        with self.lock:
+            try:
+                entries = []
+                for entry in os.scandir(self.cache_dir):
+                    if entry.name.endswith(ENTRY_EXTENSION):
+                        entry_stat = entry.stat()
+                        entries.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+            except OSError:
+                return
+
+            total_bytes = sum(entry_size for _, entry_size, _ in entries)
+            for _, entry_size, entry_path in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.remove(entry_path)
+                    total_bytes -= entry_size
+                except OSError:
+                    pass
@@ -11,6 +11,8 @@ import os
 import sys
 import logging
 import base64
+import hashlib
+import threading
 from email.mime.text import MIMEText
 from os.path import basename
 from apiclient import discovery
@@ -21,15 +23,71 @@ from oauth2client import tools
 from oauth2client.file import Storage
 from oauth2client.client import flow_from_clientsecrets
 from oauth2client.service_account import ServiceAccountCredentials
+import integrations.common.resilience as resilience
+import integrations.common.instrumentation as instrumentation
+
+def get_run_path():
+    """
+    Finds the directory holding the Google configuration and credential files.
+
+    returns:
+        path to the directory
+    """
+    if getattr(sys, 'frozen', False):
+        # frozen
+        return os.path.dirname(sys._MEIPASS)
+    else:
+        # unfrozen
+        return os.path.dirname(os.path.realpath(__file__))
+
+class DiscoveryFileCache:
+    def __init__(self, cache_dir):
+        """
+        On-disk cache of Google API discovery documents used when building services.
+
+        params:
+            cache_dir: directory to store cached discovery documents in
+        """
+        self.cache_dir = cache_dir
+
+    def cache_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest()+".json")
+
+    def get(self, url):
+        """
+        returns:
+            cached discovery document for url or None if not cached
+        """
+        try:
+            with open(self.cache_path(url), encoding="utf-8") as cache_file:
+                return cache_file.read()
+        except OSError:
+            return None
+
+    def set(self, url, content):
+        """
+        Stores discovery document for url, writing to a temporary file first so
+        that readers never see a partial document.
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = self.cache_path(url)+"."+str(threading.get_ident())+".tmp"
+            with open(temp_path, "w", encoding="utf-8") as cache_file:
+                cache_file.write(content)
+            os.replace(temp_path, self.cache_path(url))
+        except OSError as e:
+            logging.warning("Unable to cache Google API discovery document: "+repr(e))
 
 class gclient:
-    def __init__(self, scopes, client_secret_file, application_name, delegate):
+    def __init__(self, scopes, client_secret_file, application_name, delegate, resilient_caller=None):
         """
         params:
             scopes: Google API scopes to use
             client_secret_file: filename of secret file downloaded from Google
             application_name: name of application utilizing the Google API
             delegate: for use with delegate accounts
+            resilient_caller: optional ResilientCaller retrying and rate limiting requests,
+                defaults to the one shared by all Google clients
         """
         # If modifying these scopes, delete your previously saved credentials
         # at ~/.credentials/
@@ -39,7 +97,73 @@ class gclient:
         self.application_name = application_name
         self.delegate = delegate
 
+        #credentials are loaded once and services are built once per thread
+        #note: httplib2.Http objects are not thread-safe so they are not shared between threads
+        self.credentials = None
+        self.credentials_lock = threading.Lock()
+        self.services = threading.local()
+        self.discovery_cache = DiscoveryFileCache(get_run_path()+"/"+".discovery_cache")
+        self.resilience = resilient_caller if resilient_caller is not None else resilience.for_service("google")
+
+    def execute(self, request, idempotent=True):
+        """
+        Executes a Google API request through the shared retry, rate limit and
+        circuit breaker layer.
+
+        params:
+            request: googleapiclient HttpRequest to execute
+            idempotent: whether the request may safely be sent more than once
+
+        returns:
+            the result of the request
+        """
+        return self.resilience.call(request.execute, idempotent)
+
     def get_credentials(self):
+        """
+        Gets valid user credentials, loading them from storage the first time
+        and refreshing the access token only once it has expired.
+
+        Returns:
+            Credentials, the obtained credential.
+        """
+        with self.credentials_lock:
+            if self.credentials is None or self.credentials.invalid:
+                self.credentials = self.load_credentials()
+            elif self.credentials.access_token_expired:
+                logging.info("Refreshing expired Google API access token")
+                self.credentials.refresh(httplib2.Http())
+            return self.credentials
+
+    def get_service(self, service_name, version, discovery_url=None):
+        """
+        Gets Google API service object, building it the first time it is needed
+        within the current thread. Discovery documents are read from an on-disk
+        cache so building a service needs no network round trip once cached.
+
+        params:
+            service_name: name of Google API service, for ex. "drive"
+            version: version of Google API service, for ex. "v3"
+            discovery_url: optional discovery service URL for the API
+
+        returns:
+            Google API service object
+        """
+        service_key = (service_name, version, discovery_url)
+        services = getattr(self.services, "by_key", None)
+        if services is None:
+            services = self.services.by_key = {}
+
+        if service_key not in services:
+            http = self.get_credentials().authorize(httplib2.Http())
+            build_kwargs = {"http":http, "cache":self.discovery_cache}
+            if discovery_url is not None:
+                build_kwargs["discoveryServiceUrl"] = discovery_url
+            services[service_key] = discovery.build(service_name, version, **build_kwargs)
+
+        return services[service_key]
+
+    def load_credentials(self):
         """
         Gets valid user credentials from storage.
 
@@ -49,12 +173,7 @@ class gclient:
         Returns:
             Credentials, the obtained credential.
         """
-        if getattr(sys, 'frozen', False):
-            # frozen
-            run_path = os.path.dirname(sys._MEIPASS)
-        else:
-            # unfrozen
-            run_path = os.path.dirname(os.path.realpath(__file__))
+        run_path = get_run_path()
         credential_path = run_path+"/"+'.googleapis_config.json'
 
         store = Storage(credential_path)
@@ -82,11 +201,9 @@ class gclient:
             insert_values: values to insert into Google spreadsheet
             sheet_range: range to use when inserting the values into Google spreadsheet
         """
-        #Creates a Sheets API service object
-        credentials = self.get_credentials()
-        http = credentials.authorize(httplib2.Http())
+        #Gets a Sheets API service object
         discoveryUrl = ('https://sheets.googleapis.com/$discovery/rest?version=v4')
-        service = discovery.build('sheets', 'v4', http=http, discoveryServiceUrl=discoveryUrl)
+        service = self.get_service('sheets', 'v4', discoveryUrl)
 
         #create dummy range and var for data to insert
         append_data = {"values":[insert_values]}
@@ -94,25 +211,99 @@ class gclient:
         logging.info("Appending row of data to Google spreadsheet with id: "+spreadsheet_id)
 
         #send the data to be appended
-        result = service.spreadsheets().values().append(
-            spreadsheetId=spreadsheet_id, valueInputOption="USER_ENTERED", range=sheet_range, body=append_data).execute()
+        #note: appends are not idempotent so they are only retried when known not to be processed
+        with instrumentation.timed("google.sheets_append"):
+            result = self.execute(service.spreadsheets().values().append(
+                spreadsheetId=spreadsheet_id, valueInputOption="USER_ENTERED", range=sheet_range, body=append_data), False)
+
+    #for appending several rows of data to specified Google sheet by ID in one request
+    def sheet_append_rows_request(self, spreadsheet_id, rows, sheet_range='A:B'):
+        """
+        Appends several new rows into Google spreadsheet with a single request.
+
+        params:
+            spreadsheet_id: ID of Google spreadsheet to insert values into
+            rows: list of lists of values to insert into Google spreadsheet
+            sheet_range: range to use when inserting the values into Google spreadsheet
+        """
+        #Gets a Sheets API service object
+        discoveryUrl = ('https://sheets.googleapis.com/$discovery/rest?version=v4')
+        service = self.get_service('sheets', 'v4', discoveryUrl)
+
+        logging.info("Appending "+str(len(rows))+" rows of data to Google spreadsheet with id: "+spreadsheet_id)
+
+        #send the data to be appended
+        with instrumentation.timed("google.sheets_append"):
+            result = self.execute(service.spreadsheets().values().append(
+                spreadsheetId=spreadsheet_id, valueInputOption="USER_ENTERED", range=sheet_range, body={"values":rows}), False)
+
+    #for reading a range of values from specified Google sheet by ID
+    def sheet_get_values(self, spreadsheet_id, sheet_range='A:A', value_render_option="FORMATTED_VALUE"):
+        """
+        Reads the values of a range of a Google spreadsheet.
+
+        params:
+            spreadsheet_id: ID of Google spreadsheet to read values from
+            sheet_range: range of the values to read
+            value_render_option: how values are read, for ex. "UNFORMATTED_VALUE" to read
+                dates as serial numbers rather than as they are displayed
+
+        returns:
+            list of rows, each a list of the values of the row
+        """
+        #Gets a Sheets API service object
+        discoveryUrl = ('https://sheets.googleapis.com/$discovery/rest?version=v4')
+        service = self.get_service('sheets', 'v4', discoveryUrl)
+
+        with instrumentation.timed("google.sheets_get"):
+            result = self.execute(service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id, range=sheet_range,
+                valueRenderOption=value_render_option, dateTimeRenderOption="SERIAL_NUMBER"))
+        return result.get("values", [])
+
+    #for writing several ranges of values to specified Google sheet by ID in one request
+    def sheet_batch_update_request(self, spreadsheet_id, data):
+        """
+        Writes values to several ranges of a Google spreadsheet with a single request.
+
+        params:
+            spreadsheet_id: ID of Google spreadsheet to write values into
+            data: list of dicts with the "range" to write and its "values", a list of rows
+        """
+        #Gets a Sheets API service object
+        discoveryUrl = ('https://sheets.googleapis.com/$discovery/rest?version=v4')
+        service = self.get_service('sheets', 'v4', discoveryUrl)
+
+        logging.info("Updating "+str(len(data))+" ranges of Google spreadsheet with id: "+spreadsheet_id)
+
+        #note: writing values to fixed ranges may safely be repeated so updates are retried
+        with instrumentation.timed("google.sheets_batch_update"):
+            result = self.execute(service.spreadsheets().values().batchUpdate(
+                spreadsheetId=spreadsheet_id, body={"valueInputOption":"USER_ENTERED", "data":data}))
 
     #for uploading files to Google Drive using source filepath and Google Drive folder ID
-    def drive_upload_request(self, path_to_source_file, drive_folder_id):
+    def drive_upload_request(self, path_to_source_file, drive_folder_id, resumable=False, chunksize=5*1024*1024, num_retries=0):
         """
         Uploads file to Google Drive folder based on ID
 
         params:
             path_to_source_file: path to file which will be uploaded to Google Drive
             drive_folder_id: ID of Google Drive folder to upload file to
+            resumable: whether to upload the file in chunks which can be retried
+            chunksize: bytes per chunk for resumable uploads (multiple of 256 KiB)
+            num_retries: times to retry a failed request or chunk with backoff
+
+        returns:
+            ID of the created Google Drive file
         """
-        #Creates a Drive API service object
-        credentials = self.get_credentials()
-        http = credentials.authorize(httplib2.Http())
-        service = discovery.build('drive', 'v3', http=http)
+        #Gets a Drive API service object
+        service = self.get_service('drive', 'v3')
 
         #create MediaFileUpload object for file to upload
-        media_body = MediaFileUpload(path_to_source_file)
+        if resumable:
+            media_body = MediaFileUpload(path_to_source_file, chunksize=chunksize, resumable=True)
+        else:
+            media_body = MediaFileUpload(path_to_source_file)
 
         #create meta data for file to upload
         body = {
@@ -123,12 +314,46 @@ class gclient:
         logging.info("Uploading "+basename(path_to_source_file)+" to Google Drive folder with id: "+drive_folder_id)
 
         #upload the file
-        file = service.files().create(body=body, media_body=media_body).execute()
+        #note: chunks of resumable uploads continue from where the upload stopped so they may be retried
+        request = service.files().create(body=body, media_body=media_body, fields='id')
+        with instrumentation.timed("google.drive_upload"):
+            if resumable:
+                file = None
+                while file is None:
+                    status, file = self.resilience.call(lambda: request.next_chunk(num_retries=num_retries))
+                    if status:
+                        logging.info("Uploaded "+str(int(status.progress()*100))+"% of "+basename(path_to_source_file))
+            else:
+                file = self.resilience.call(lambda: request.execute(num_retries=num_retries), idempotent=False)
+        instrumentation.count("google.drive_upload_bytes", os.path.getsize(path_to_source_file))
 
-    #for sending content through email automatically (uses gmail)
-    def gmail_send(self, mail_to, mail_reply_to, mail_cc, mail_subject, mail_content):
+        return file['id']
+
+    #for finding files by name within a Google Drive folder
+    def drive_find_request(self, file_name, drive_folder_id):
         """
-        Function for sending Gmail email based on provided information in params
+        Finds files in Google Drive folder with the provided name.
+
+        params:
+            file_name: name of the file to find
+            drive_folder_id: ID of Google Drive folder to search in
+
+        returns:
+            list of dicts with the id and md5Checksum of each matching file
+        """
+        #Gets a Drive API service object
+        service = self.get_service('drive', 'v3')
+
+        query = "name = '"+file_name.replace("\\", "\\\\").replace("'", "\\'")+"' and '"+\
+            drive_folder_id+"' in parents and trashed = false"
+        result = self.execute(service.files().list(q=query, fields='files(id, md5Checksum)'))
+
+        return result.get('files', [])
+
+    #for building the body of a Gmail send request
+    def gmail_message(self, mail_to, mail_reply_to, mail_cc, mail_subject, mail_content):
+        """
+        Creates the raw message sent by the Gmail API.
 
         params:
             mail_to: what email adddresses to send to delimited by commas
@@ -136,14 +361,10 @@ class gclient:
             mail_cc: what emails adddresses to cc to delimited by commas
             mail_subject: email subject line
             mail_content: email body content
-        """
-        #Creates a Drive API service object
-        credentials = self.get_credentials()
-        #delegated_credentials = credentials.create_delegated(self.delegate)
-        http = credentials.authorize(httplib2.Http())
-        service = discovery.build('gmail', 'v1', http=http)
 
-        logging.info("Building email message")
+        returns:
+            dict with the base64 encoded message for the Gmail API
+        """
         #Create a message for an email - uses html formatting for better spacing options
         message = MIMEText(mail_content, 'html')
         message['to'] = mail_to
@@ -151,8 +372,71 @@ class gclient:
         message['reply-to'] = mail_reply_to
         message['from'] = self.delegate
         message['subject'] = mail_subject
-        message_content = {'raw': base64.urlsafe_b64encode(message.as_string().encode()).decode('utf-8')}
+        return {'raw': base64.urlsafe_b64encode(message.as_string().encode()).decode('utf-8')}
+
+    #for sending many emails through one Gmail service using batch requests
+    def gmail_send_batch(self, emails, batch_size=10):
+        """
+        Sends emails using Gmail batch HTTP requests. Each batch holds up to
+        batch_size sends which Gmail processes at once, bounding how many sends
+        are in flight, and batches are sent one after another.
+
+        params:
+            emails: list of dicts with "to", "reply_to", "cc", "subject" and "body"
+            batch_size: most sends in one batch request
+
+        returns:
+            list with the id of each sent message or the exception raised sending it,
+            a batch which fails recording its exception for each of its messages
+        """
+        service = self.get_service('gmail', 'v1')
+        results = [None]*len(emails)
+
+        def record_result(request_id, response, exception):
+            results[int(request_id)] = exception if exception is not None else response.get('id')
+
+        for batch_start in range(0, len(emails), max(1, batch_size)):
+            batch = service.new_batch_http_request(callback=record_result)
+            for email_number in range(batch_start, min(batch_start+max(1, batch_size), len(emails))):
+                email = emails[email_number]
+                batch.add(service.users().messages().send(userId=self.delegate,
+                    body=self.gmail_message(email["to"], email["reply_to"], email["cc"], email["subject"], email["body"])),
+                    request_id=str(email_number))
+
+            logging.info("Sending batch of "+str(min(batch_size, len(emails)-batch_start))+" email messages")
+            #note: sends are not idempotent so the batch is only retried when known not to be processed
+            try:
+                with instrumentation.timed("google.gmail_send"):
+                    self.resilience.call(batch.execute, idempotent=False)
+            except Exception as e:
+                #only the sends of this batch without a result are failed, earlier batches were delivered
+                logging.error("Sending batch of email messages failed: "+repr(e))
+                for email_number in range(batch_start, min(batch_start+max(1, batch_size), len(emails))):
+                    if results[email_number] is None:
+                        results[email_number] = e
+
+        return results
+
+    #for sending content through email automatically (uses gmail)
+    def gmail_send(self, mail_to, mail_reply_to, mail_cc, mail_subject, mail_content):
+        """
+        Function for sending Gmail email based on provided information in params
+
+        params:
+            mail_to: what email adddresses to send to delimited by commas
+            mail_reply_to: who the email reply-to should be set as
+            mail_cc: what emails adddresses to cc to delimited by commas
+            mail_subject: email subject line
+            mail_content: email body content
+        """
+        #Gets a Gmail API service object
+        #delegated_credentials = credentials.create_delegated(self.delegate)
+        service = self.get_service('gmail', 'v1')
+
+        logging.info("Building email message")
+        message_content = self.gmail_message(mail_to, mail_reply_to, mail_cc, mail_subject, mail_content)
 
         logging.info("Sending email message")
         #Send an email message.
-        sent_message = (service.users().messages().send(userId=self.delegate, body=message_content).execute())
+        with instrumentation.timed("google.gmail_send"):
+            sent_message = self.execute(service.users().messages().send(userId=self.delegate, body=message_content), False)
@@ -11,66 +11,164 @@ import ntpath
 import sys
 import logging
 import time
-import datetime
 import json
+import functools
 import integrations.google.google_api_client as google_api_client
+import integrations.google.google_uploader as google_uploader
+import integrations.google.google_sheet_writer as google_sheet_writer
+import integrations.common.resilience as resilience
+import integrations.common.report_window as report_window
 
-def run_archiver(recurrence, google_spreadsheet_id, google_mediasite_archive_folder_id, google_zoom_archive_folder_id, google_spreadsheet_data_elements, all_results ):
+@functools.lru_cache(maxsize=None)
+def load_client_config():
     """
-    Primary function to store data in central spreadsheet and archive data result files
-    on Google Drive.
+    Loads the Google client configuration file. The file is only read once per
+    process no matter how many reports are run.
 
-    params:
-        recurrence: the period of the report, for ex. "weekly", "monthly"
-        google_spreadsheet_id: ID of Google Docs spreadsheet to store data in
-        google_mediasite_archive_folder_id: ID of Google Drive folder to store Mediasite result files
-        google_zoom_archive_folder_id: ID of Google Drive folder to store Zoom result files
-        google_spreadsheet_data_elements: data to store from various reports
+    returns:
+        client_data: dict of Google client configuration data
     """
     run_path = os.path.dirname(os.path.realpath(__file__))
 
     #open config file with api key/secret information
-    client_config_file = open(run_path+"/"+".google_client_config")
-    client_data = json.load(client_config_file)
+    with open(run_path+"/"+".google_client_config") as client_config_file:
+        client_data = json.load(client_config_file)
+
+    return client_data
+
+def build_client():
+    """
+    Builds client for Google APIs using the Google client configuration file.
+
+    returns:
+        client: google_api_client.gclient ready for making requests
+    """
+    client_data = load_client_config()
 
     #create Google api client
     client = google_api_client.gclient(
         client_data["auth_scope"],
         client_data["auth_secret"],
         client_data["app_name"],
-        client_data["delegate"]
+        client_data["delegate"],
+        resilience.for_service("google", client_data.get("resilience"))
         )
 
-    #gather date labeling for the reports based on the recurrence
-    if recurrence == "weekly":
-        current_date_string = '{dt.month}/{dt.day}/{dt.year}'.format(dt = datetime.datetime.now())
-        week_ago_date_string = '{week_ago.month}/{week_ago.day}/{week_ago.year}'.format(week_ago = datetime.date.today() - datetime.timedelta(days=7))
-        date_string = week_ago_date_string+"-"+current_date_string
-    elif recurrence == "monthly":
-        last_day_of_previous_month = datetime.date.today().replace(day=1) - datetime.timedelta(days=1)
-        last_month_abbr = last_day_of_previous_month.strftime("%b")
-        last_month_year = last_day_of_previous_month.strftime("%Y")
-        date_string = last_month_abbr+" "+last_month_year
+    return client
+
+@functools.lru_cache(maxsize=None)
+def get_session():
+    """
+    Gets the Google client shared by every Google call made during the run so
+    that credentials and service objects are only loaded and built once.
+
+    returns:
+        client: google_api_client.gclient shared for the run
+    """
+    return build_client()
+
+def run_archiver(recurrence, google_spreadsheet_id, google_mediasite_archive_folder_id, google_zoom_archive_folder_id, google_spreadsheet_data_elements, all_results, client=None, window=None, sheet_writer=None, sheet_range='A:B'):
+    """
+    Primary function to store data in central spreadsheet and archive data result files
+    on Google Drive.
+
+    params:
+        recurrence: the period of the report, for ex. "weekly", "monthly"
+        google_spreadsheet_id: ID of Google Docs spreadsheet to store data in
+        google_mediasite_archive_folder_id: ID of Google Drive folder to store Mediasite result files
+        google_zoom_archive_folder_id: ID of Google Drive folder to store Zoom result files
+        google_spreadsheet_data_elements: data to store from various reports
+        all_results: composite dict of results from the various reports
+        client: optional pre-built gclient, for ex. shared by several reports
+        window: optional ReportWindow of the report, defaults to the window of recurrence
+        sheet_writer: optional BufferedSheetWriter the row is added to, for ex. shared by
+            several reports and flushed once they finish, otherwise the row is written now
+        sheet_range: range of the spreadsheet table the row is written to
+
+    returns:
+        drive_links: dict of links to the uploaded files, for ex. "zoom_results_csv_drive_link"
+    """
+    #create Google api client
+    if client is None:
+        client = get_session()
+
+    #gather row of data for the spreadsheet labeled by the report window
+    if window is None:
+        window = report_window.ReportWindow.from_recurrence(recurrence)
+    spreadsheet_data = build_spreadsheet_row(window, google_spreadsheet_data_elements, all_results)
+
+    #add data to specified Google spreadsheet, updating the row of the period if it exists
+    if sheet_writer is not None:
+        sheet_writer.add(google_spreadsheet_id, spreadsheet_data, sheet_range)
+    else:
+        logging.info("Sending data to analytics spreadsheet")
+        sheet_writer = google_sheet_writer.BufferedSheetWriter(client)
+        sheet_writer.add(google_spreadsheet_id, spreadsheet_data, sheet_range)
+        sheet_writer.flush()
+
+    #upload exported data files to Google Drive
+    return upload_result_files(google_mediasite_archive_folder_id, google_zoom_archive_folder_id, all_results, client)
+
+def build_spreadsheet_row(window, google_spreadsheet_data_elements, all_results):
+    """
+    Function for building the row of data stored in the central spreadsheet.
+
+    params:
+        window: ReportWindow of the report used to label the row
+        google_spreadsheet_data_elements: data to store from various reports
+        all_results: composite dict of results from the various reports
 
+    returns:
+        spreadsheet_data: list of values beginning with the date label of the window, None
+            for results which were not gathered
+    """
     #prepend the date string to the beginning of the google_spreadsheet_data_elements
-    spreadsheet_data = [date_string]
+    #note: results which were not gathered (for ex. during a backfill or a run of only some
+    #stages) are None, which the Sheets API skips so that values already in the row are kept
+    spreadsheet_data = [window.sheet_date_string]
     for elem in google_spreadsheet_data_elements:
         if elem != "":
-            spreadsheet_data.append(all_results[elem])
+            spreadsheet_data.append(all_results.get(elem))
         else:
             spreadsheet_data.append("")
 
-    #append data to specified Google spreadsheet
-    logging.info("Sending data to analytics spreadsheet")
-    client.sheet_insert_request(google_spreadsheet_id, spreadsheet_data)
+    return spreadsheet_data
 
-    #upload exported data files to Google Drive
-    logging.info("Uploading data export files to Google Drive")
-    client.drive_upload_request(all_results["mediasite_results_excel_filepath"],google_mediasite_archive_folder_id)
-    client.drive_upload_request(all_results["mediasite_results_xml_filepath"],google_mediasite_archive_folder_id)
-    client.drive_upload_request(all_results["zoom_results_csv_filepath"],google_zoom_archive_folder_id)
+def upload_result_files(google_mediasite_archive_folder_id, google_zoom_archive_folder_id, all_results, client=None):
+    """
+    Function for uploading the exported data files to Google Drive.
+
+    params:
+        google_mediasite_archive_folder_id: ID of Google Drive folder to store Mediasite result files
+        google_zoom_archive_folder_id: ID of Google Drive folder to store Zoom result files
+        all_results: composite dict of results from the various reports
+        client: optional pre-built gclient, for ex. shared by several reports
 
-def mailto(mail_to, mail_reply_to, mail_cc, mail_subject, mail_content):
+    returns:
+        drive_links: dict of links to the uploaded files, for ex. "zoom_results_csv_drive_link"
+    """
+    #create Google api client
+    if client is None:
+        client = get_session()
+
+    #upload exported data files to Google Drive, skipping files which were not created
+    logging.info("Uploading data export files to Google Drive")
+    uploads = {
+        "mediasite_results_excel":(all_results.get("mediasite_results_excel_filepath"),google_mediasite_archive_folder_id),
+        "mediasite_results_xml":(all_results.get("mediasite_results_xml_filepath"),google_mediasite_archive_folder_id),
+        "zoom_results_csv":(all_results.get("zoom_results_csv_filepath"),google_zoom_archive_folder_id)
+        }
+    uploads = {result_name:upload for result_name, upload in uploads.items() if upload[0]}
+    file_ids = google_uploader.UploadManager(client).upload_all(uploads.values())
+
+    #create links to the uploaded files for use in the email
+    drive_links = {}
+    for result_name, (path_to_source_file, drive_folder_id) in uploads.items():
+        drive_links[result_name+"_drive_link"] = google_uploader.DRIVE_FILE_LINK.format(file_id=file_ids[path_to_source_file])
+
+    return drive_links
+
+def mailto(mail_to, mail_reply_to, mail_cc, mail_subject, mail_content, client=None):
     """
     Function for sending Gmail email based on provided information in params
 
@@ -80,45 +178,48 @@ def mailto(mail_to, mail_reply_to, mail_cc, mail_subject, mail_content):
         mail_cc: what emails adddresses to cc to delimited by commas
         mail_subject: email subject line
         mail_content: email body content
+        client: optional pre-built gclient, for ex. shared by several reports
     """
-    run_path = os.path.dirname(os.path.realpath(__file__))
+    #create Google api client
+    if client is None:
+        client = get_session()
 
-    #open config file with api key/secret information
-    client_config_file = open(run_path+"/"+".google_client_config")
-    client_data = json.load(client_config_file)
+    client.gmail_send(mail_to, mail_reply_to, mail_cc, mail_subject, mail_content)
+
+def send_emails(emails, client=None, batch_size=10):
+    """
+    Function for sending many Gmail emails at once using batch requests
 
+    params:
+        emails: list of dicts with "to", "reply_to", "cc", "subject" and "body"
+        client: optional pre-built gclient, for ex. shared by several reports
+        batch_size: most emails sent in one batch request
+
+    returns:
+        list with the id of each sent message or the exception raised sending it
+    """
     #create Google api client
-    client = google_api_client.gclient(
-        client_data["auth_scope"],
-        client_data["auth_secret"],
-        client_data["app_name"],
-        client_data["delegate"]
-        )
+    if client is None:
+        client = get_session()
 
-    client.gmail_send(mail_to, mail_reply_to, mail_cc, mail_subject, mail_content)
+    return client.gmail_send_batch(emails, batch_size)
 
-def log_upload(log_filepath, google_log_folder_id):
+def log_upload(log_filepath, google_log_folder_id, client=None):
     """
     Function for uploading log file to Google Drive folder
 
     params:
         log_filepath: filepath for the log to be uploaded
         google_log_folder_id: ID of Google Drive folder where log to be uploaded
-    """
-    run_path = os.path.dirname(os.path.realpath(__file__))
-
-    #open config file with api key/secret information
-    client_config_file = open(run_path+"/"+".google_client_config")
-    client_data = json.load(client_config_file)
+        client: optional pre-built gclient, for ex. shared by several reports
 
+    returns:
+        ID of the uploaded Google Drive file
+    """
     #create Google api client
-    client = google_api_client.gclient(
-        client_data["auth_scope"],
-        client_data["auth_secret"],
-        client_data["app_name"],
-        client_data["delegate"]
-        )
+    if client is None:
+        client = get_session()
 
     #perform the upload of the file
     logging.info("Uploading log file to Google Drive")
-    client.drive_upload_request(log_filepath, google_log_folder_id)
+    return google_uploader.UploadManager(client).upload(log_filepath, google_log_folder_id)
@@ -0,0 +1,164 @@
+"""
+LST Periodic Analytics Reporter - Google Sheet Writer
+Buffers the analytics spreadsheet rows of many reports, for ex. every period
+of a backfill or every configuration of a batch, and writes them with as few
+Sheets API requests as possible. Rows are keyed by their first value (the date
+label of the period) so that a period which is already in the spreadsheet has
+its row updated rather than a duplicate row added. Labels which the spreadsheet
+parses into dates, for ex. "Aug 2017", are compared as dates.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import re
+import logging
+import datetime
+import threading
+import collections
+
+def range_parts(sheet_range):
+    """
+    Splits a range such as "A:B" or "Data!A:J" into its sheet prefix and first column.
+
+    returns:
+        tuple of the sheet prefix (for ex. "Data!" or "") and the first column letters
+    """
+    sheet_name, separator, cells = sheet_range.rpartition("!")
+    column = re.match(r"[A-Za-z]*", cells).group(0).upper() or "A"
+    return sheet_name+separator, column
+
+#formats of date labels which the spreadsheet may store as dates
+LABEL_DATE_FORMATS = ["%b %Y", "%B %Y", "%m/%d/%Y", "%Y-%m-%d"]
+
+#date of serial number 0 in spreadsheet date values
+SERIAL_EPOCH = datetime.date(1899, 12, 30)
+
+def row_key(value):
+    """
+    Finds the key of a row from its date label, either as added or as read
+    unformatted from the spreadsheet. Labels stored as dates are read as serial
+    numbers and are keyed by the date along with labels in a date format.
+
+    params:
+        value: first value of the row
+
+    returns:
+        the date of the label as "YYYY-MM-DD" or otherwise the label text
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (SERIAL_EPOCH+datetime.timedelta(days=int(value))).strftime("%Y-%m-%d")
+    text = str(value).strip()
+    for date_format in LABEL_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    return text
+
+class BufferedSheetWriter:
+    def __init__(self, client):
+        """
+        params:
+            client: gclient used to read and write the spreadsheets
+        """
+        self.client = client
+        self.lock = threading.Lock()
+        #rows by (spreadsheet ID, range) and then by date key, keeping the order they were added
+        self.rows = collections.OrderedDict()
+
+    def add(self, spreadsheet_id, row, sheet_range='A:B'):
+        """
+        Buffers a row for the spreadsheet, replacing any buffered row with the same key.
+
+        params:
+            spreadsheet_id: ID of Google spreadsheet the row belongs to
+            row: list of values beginning with the date label of the period
+            sheet_range: range of the spreadsheet table the row belongs to
+        """
+        with self.lock:
+            self.rows.setdefault((spreadsheet_id, sheet_range), collections.OrderedDict())[row_key(row[0])] = row
+
+    def pending(self):
+        """
+        returns:
+            number of buffered rows which have not been written
+        """
+        with self.lock:
+            return sum(len(rows) for rows in self.rows.values())
+
+    def flush(self):
+        """
+        Writes the buffered rows. For each spreadsheet table the column of date
+        keys is read once, rows whose key is found are updated in one batchUpdate
+        and the remaining rows are added in one append. Rows of a table which
+        fails to be written stay buffered and the first error is raised once
+        every table has been tried.
+
+        returns:
+            dict of spreadsheet IDs to the number of rows "updated" and "appended"
+        """
+        with self.lock:
+            tables = list(self.rows.items())
+
+        results = {}
+        first_error = None
+        for (spreadsheet_id, sheet_range), rows in tables:
+            try:
+                updated, appended = self.write_table(spreadsheet_id, sheet_range, list(rows.values()))
+            except Exception as e:
+                logging.exception("Unable to write rows to Google spreadsheet with id: "+spreadsheet_id)
+                first_error = first_error or e
+                continue
+
+            with self.lock:
+                #rows added while writing are kept for the next flush
+                buffered = self.rows.get((spreadsheet_id, sheet_range), {})
+                for key, row in list(rows.items()):
+                    if buffered.get(key) is row:
+                        del buffered[key]
+                if not buffered:
+                    self.rows.pop((spreadsheet_id, sheet_range), None)
+
+            totals = results.setdefault(spreadsheet_id, {"updated":0, "appended":0})
+            totals["updated"] += updated
+            totals["appended"] += appended
+
+        if first_error is not None:
+            raise first_error
+        return results
+
+    def write_table(self, spreadsheet_id, sheet_range, rows):
+        """
+        Writes rows to one spreadsheet table.
+
+        returns:
+            tuple of the number of rows updated and appended
+        """
+        sheet_prefix, column = range_parts(sheet_range)
+
+        #find the row number of each date key already in the spreadsheet
+        #note: values are read unformatted so that the display format of labels the
+        #spreadsheet parsed into dates does not keep them from matching
+        row_numbers = {}
+        for row_number, values in enumerate(self.client.sheet_get_values(spreadsheet_id,
+            sheet_prefix+column+":"+column, "UNFORMATTED_VALUE"), start=1):
+            if values:
+                row_numbers.setdefault(row_key(values[0]), row_number)
+
+        updates = []
+        new_rows = []
+        for row in rows:
+            row_number = row_numbers.get(row_key(row[0]))
+            if row_number is not None:
+                updates.append({"range":sheet_prefix+column+str(row_number), "values":[row]})
+            else:
+                new_rows.append(row)
+
+        if updates:
+            self.client.sheet_batch_update_request(spreadsheet_id, updates)
+        if new_rows:
+            self.client.sheet_append_rows_request(spreadsheet_id, new_rows, sheet_range)
+
+        logging.info("Wrote "+str(len(updates))+" updated and "+str(len(new_rows))+
+            " new rows to Google spreadsheet with id: "+spreadsheet_id)
+        return len(updates), len(new_rows)
@@ -0,0 +1,76 @@
+"""
+LST Periodic Analytics Reporter - Google Uploader
+Intended for uploading several files to Google Drive at once. Large files are
+uploaded in resumable chunks with retries and files which were already
+uploaded (same name and checksum in the same folder) are skipped.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import os
+import logging
+import concurrent.futures
+import integrations.common.download as download
+
+#link used for viewing uploaded files by their Google Drive file ID
+DRIVE_FILE_LINK = "https://drive.google.com/file/d/{file_id}/view"
+
+class UploadManager:
+    def __init__(self, client, max_workers=4, resumable_threshold=5*1024*1024, chunksize=5*1024*1024, num_retries=5):
+        """
+        params:
+            client: google_api_client.gclient used for making requests
+            max_workers: maximum number of uploads to run at once
+            resumable_threshold: files of at least this many bytes are uploaded resumably
+            chunksize: bytes per chunk for resumable uploads (multiple of 256 KiB)
+            num_retries: times to retry a failed request or chunk with backoff
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.resumable_threshold = resumable_threshold
+        self.chunksize = chunksize
+        self.num_retries = num_retries
+
+    def upload(self, path_to_source_file, drive_folder_id):
+        """
+        Uploads file to Google Drive folder unless a file with the same name and
+        checksum already exists there.
+
+        params:
+            path_to_source_file: path to file which will be uploaded to Google Drive
+            drive_folder_id: ID of Google Drive folder to upload file to
+
+        returns:
+            ID of the created or already existing Google Drive file
+        """
+        file_name = os.path.basename(path_to_source_file)
+        local_checksum = download.file_checksum(path_to_source_file, "md5")
+
+        for existing_file in self.client.drive_find_request(file_name, drive_folder_id):
+            if existing_file.get("md5Checksum") == local_checksum:
+                logging.info("Skipping upload of "+file_name+" which already exists in Google Drive folder with id: "+drive_folder_id)
+                return existing_file["id"]
+
+        return self.client.drive_upload_request(path_to_source_file, drive_folder_id,
+            resumable=os.path.getsize(path_to_source_file) >= self.resumable_threshold,
+            chunksize=self.chunksize,
+            num_retries=self.num_retries
+            )
+
+    def upload_all(self, uploads):
+        """
+        Uploads several files to Google Drive concurrently.
+
+        params:
+            uploads: list of (path_to_source_file, drive_folder_id) pairs
+
+        returns:
+            file_ids: dict of Google Drive file ID by path_to_source_file
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers,
+            thread_name_prefix="upload") as executor:
+            upload_futures = {path_to_source_file:executor.submit(self.upload, path_to_source_file, drive_folder_id)
+                for path_to_source_file, drive_folder_id in uploads}
+
+        return {path_to_source_file:upload_future.result()
+            for path_to_source_file, upload_future in upload_futures.items()}
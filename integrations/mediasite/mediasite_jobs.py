@@ -0,0 +1,230 @@
+"""
+LST Periodic Analytics Reporter - Mediasite Jobs
+Functions for waiting on jobs within the Mediasite system (for ex. report
+Execute and Export jobs) using an adaptive polling strategy.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import json
+import time
+import random
+import asyncio
+import logging
+
+#job statuses which mean the job will not complete successfully
+FAILED_JOB_STATUSES = ["Disabled", "Failed", "Cancelled"]
+
+class MediasiteJobError(Exception):
+    """
+    Base exception for jobs which could not be waited on to completion.
+    """
+    def __init__(self, message, job_link_url):
+        super().__init__(message)
+        self.job_link_url = job_link_url
+
+class MediasiteJobFailed(MediasiteJobError):
+    """
+    Raised when a job finishes with a failed status, for ex. "Failed" or "Cancelled".
+    """
+    def __init__(self, job_link_url, status):
+        super().__init__("Job "+job_link_url+" did not complete successfully. Job status: "+status, job_link_url)
+        self.status = status
+
+class MediasiteJobTimeout(MediasiteJobError):
+    """
+    Raised when a job has not finished before the deadline or max poll count.
+    """
+
+class MediasiteJobWaitCancelled(MediasiteJobError):
+    """
+    Raised when waiting on a job is cancelled through the provided stop event.
+    """
+
+class PollingStrategy:
+    def __init__(self, initial_interval=1, max_interval=30, multiplier=2, jitter=0.1, deadline=3600, max_polls=None):
+        """
+        params:
+            initial_interval: seconds to wait after the first poll
+            max_interval: most seconds to wait between polls
+            multiplier: factor the interval grows by after each poll
+            jitter: fraction of the interval to randomly add or remove
+            deadline: most seconds to wait for the jobs overall, None for no deadline
+            max_polls: most polling rounds to perform, None for no limit
+        """
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.deadline = deadline
+        self.max_polls = max_polls
+
+    def intervals(self):
+        """
+        Generator of seconds to wait between polls using exponential backoff with jitter.
+        """
+        interval = self.initial_interval
+        while True:
+            yield max(0, interval * (1 + random.uniform(-self.jitter, self.jitter)))
+            interval = min(self.max_interval, interval * self.multiplier)
+
+def record_job_status(job_link_url, job_result, job_results, pending):
+    """
+    Records the status of a polled job, removing it from pending once successful.
+
+    returns:
+        True when the job was successful, otherwise False
+
+    raises:
+        MediasiteJobFailed: when the job finished with a failed status
+    """
+    job_result_status = job_result["Status"]
+
+    #if successful we no longer wait on the job
+    if job_result_status == "Successful":
+        logging.info("Job was successful")
+        job_results[job_link_url] = job_result
+        pending.remove(job_link_url)
+        return True
+
+    #if the job fails or is canceled for some reason raise
+    elif job_result_status in FAILED_JOB_STATUSES:
+        logging.error("Job "+job_link_url+" did not complete successfully. Job status: "+job_result_status)
+        raise MediasiteJobFailed(job_link_url, job_result_status)
+
+    #if the job is queued or working we wait for the job to finish or fail
+    logging.info("Waiting for job to complete. Job status: "+job_result_status)
+    return False
+
+def next_wait(strategy, intervals, polls, start_time, pending):
+    """
+    Finds the seconds to wait before the next polling round.
+
+    raises:
+        MediasiteJobTimeout: when the deadline or max poll count is reached
+    """
+    #stop waiting when the strategy limits have been reached
+    if strategy.max_polls is not None and polls >= strategy.max_polls:
+        raise MediasiteJobTimeout("Jobs not complete after "+str(polls)+" polls", pending[0])
+
+    interval = next(intervals)
+    if strategy.deadline is not None:
+        remaining = strategy.deadline - (time.monotonic() - start_time)
+        if remaining <= 0:
+            raise MediasiteJobTimeout("Jobs not complete after "+str(strategy.deadline)+" seconds", pending[0])
+        interval = min(interval, remaining)
+    return interval
+
+def wait_for_jobs_to_complete(job_link_urls, client, strategy=None, stop_event=None, on_success=None):
+    """
+    Function for waiting on the completion of one or more jobs in the Mediasite
+    system in a single polling loop. Each round polls every unfinished job and
+    then waits for the next interval from the strategy.
+
+    arguments:
+        job_link_urls: list of unique links to Mediasite jobs used for gathering status
+        client: pre-configured Mediasite API client to be provided for making requests
+        strategy: PollingStrategy to use, defaults to PollingStrategy()
+        stop_event: optional threading.Event which cancels waiting when set
+        on_success: optional function of a job link and its final job data called as
+            each job succeeds which returns links of further jobs to wait on (if any),
+            for ex. the Export jobs of a report as soon as its Execute job is complete
+
+    returns:
+        job_results: dict of final job data by job link
+
+    raises:
+        MediasiteJobFailed: when a job finishes with a failed status
+        MediasiteJobTimeout: when the deadline or max poll count is reached
+        MediasiteJobWaitCancelled: when stop_event is set while waiting
+    """
+    if strategy is None:
+        strategy = PollingStrategy()
+
+    pending = list(job_link_urls)
+    job_results = {}
+    intervals = strategy.intervals()
+    start_time = time.monotonic()
+    polls = 0
+
+    while pending:
+        #gather information on the status of each unfinished job
+        started_jobs = False
+        for job_link_url in list(pending):
+            if record_job_status(job_link_url, json.loads(client.do_request("get job", job_link_url, "", "")),
+                job_results, pending) and on_success is not None:
+                new_job_link_urls = on_success(job_link_url, job_results[job_link_url])
+                if new_job_link_urls:
+                    pending.extend(new_job_link_urls)
+                    started_jobs = True
+
+        polls += 1
+        if not pending:
+            break
+
+        #jobs which have just started are polled from the initial interval again
+        if started_jobs:
+            intervals = strategy.intervals()
+
+        interval = next_wait(strategy, intervals, polls, start_time, pending)
+        if stop_event is not None:
+            if stop_event.wait(interval):
+                raise MediasiteJobWaitCancelled("Waiting on jobs was cancelled", pending[0])
+        else:
+            time.sleep(interval)
+
+    return job_results
+
+async def wait_for_jobs_to_complete_async(job_link_urls, client, strategy=None, on_success=None):
+    """
+    Function for waiting on the completion of one or more jobs in the same way
+    as wait_for_jobs_to_complete using an async Mediasite API client. Every
+    unfinished job is polled at once in each round and waiting does not block
+    the event loop, so many jobs may be waited on together. Waiting is cancelled
+    by cancelling the task awaiting it.
+
+    arguments:
+        job_link_urls: list of unique links to Mediasite jobs used for gathering status
+        client: pre-configured async Mediasite API client to be provided for making requests
+        strategy: PollingStrategy to use, defaults to PollingStrategy()
+        on_success: optional coroutine function used in the same way as the
+            on_success function of wait_for_jobs_to_complete
+
+    returns:
+        job_results: dict of final job data by job link
+
+    raises:
+        MediasiteJobFailed: when a job finishes with a failed status
+        MediasiteJobTimeout: when the deadline or max poll count is reached
+    """
+    if strategy is None:
+        strategy = PollingStrategy()
+
+    pending = list(job_link_urls)
+    job_results = {}
+    intervals = strategy.intervals()
+    start_time = time.monotonic()
+    polls = 0
+
+    while pending:
+        #gather information on the status of every unfinished job together
+        polled = await asyncio.gather(*[client.do_request("get job", job_link_url, "", "") for job_link_url in pending])
+        started_jobs = False
+        for job_link_url, job_result in zip(list(pending), polled):
+            if record_job_status(job_link_url, json.loads(job_result), job_results, pending) and on_success is not None:
+                new_job_link_urls = await on_success(job_link_url, job_results[job_link_url])
+                if new_job_link_urls:
+                    pending.extend(new_job_link_urls)
+                    started_jobs = True
+
+        polls += 1
+        if not pending:
+            break
+
+        #jobs which have just started are polled from the initial interval again
+        if started_jobs:
+            intervals = strategy.intervals()
+
+        await asyncio.sleep(next_wait(strategy, intervals, polls, start_time, pending))
+
+    return job_results
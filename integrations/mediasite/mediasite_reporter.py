@@ -9,16 +9,91 @@ By: Dave Bunten
 """
 
 import os
+import re
 import logging
 import json
-import time
-import datetime
-import sys
 import urllib.request
-import xml.etree.ElementTree
+import asyncio
+import functools
+import concurrent.futures
 import integrations.mediasite.mediasite_web_api_client as mediasite_web_api_client
+import integrations.mediasite.mediasite_jobs as mediasite_jobs
+import integrations.mediasite.mediasite_xml as mediasite_xml
+import integrations.common.download as download
+import integrations.common.async_http as async_http
+import integrations.common.resilience as resilience
+import integrations.common.instrumentation as instrumentation
+import integrations.common.report_window as report_window
+
+@functools.lru_cache(maxsize=None)
+def load_api_config():
+    """
+    Loads the Mediasite API configuration file. The file is only read once per
+    process no matter how many reports are run.
+
+    returns:
+        api_data: dict of Mediasite API configuration data
+    """
+    run_path = os.path.dirname(os.path.realpath(__file__))
+
+    #open config file with api key/secret information
+    with open(run_path+"/"+".mediasite_api_config") as api_config_file:
+        api_data = json.load(api_config_file)
+
+    return api_data
 
-def run_report(recurrence, report_prefix, export_destination, presentation_report_entry):
+def build_client(deduplicator=None):
+    """
+    Builds client for Mediasite API using the Mediasite API configuration file.
+
+    params:
+        deduplicator: optional RequestDeduplicator shared between report runs
+
+    returns:
+        client: mediasite_web_api_client ready for making requests
+    """
+    api_data = load_api_config()
+
+    #create mediasite api client
+    client = mediasite_web_api_client.client(
+        api_data["base_url"],
+        api_data["api_secret"],
+        api_data["api_user"],
+        api_data["api_pass"],
+        deduplicator,
+        api_data.get("pool_size", 10),
+        tuple(api_data.get("timeout", (10, 60))),
+        api_data.get("keep_alive", True),
+        resilience.for_service("mediasite", api_data.get("resilience"))
+        )
+
+    return client
+
+def build_async_client(deduplicator=None):
+    """
+    Builds async client for Mediasite API using the Mediasite API configuration file.
+
+    params:
+        deduplicator: optional RequestDeduplicator shared between report runs
+
+    returns:
+        client: mediasite_web_api_client.async_client ready for making requests
+    """
+    api_data = load_api_config()
+
+    return mediasite_web_api_client.async_client(
+        api_data["base_url"],
+        api_data["api_secret"],
+        api_data["api_user"],
+        api_data["api_pass"],
+        deduplicator,
+        api_data.get("pool_size", 10),
+        tuple(api_data.get("timeout", (10, 60))),
+        api_data.get("keep_alive", True),
+        resilience.for_service("mediasite", api_data.get("resilience"))
+        )
+
+def run_report(recurrence, report_prefix, export_destination, presentation_report_entry, client=None, polling_strategy=None, store=None, window=None, stop_event=None):
     """
     Primary function to run Mediasite report, download resulting data files, and
     return information pertaining to the results.
@@ -28,25 +103,244 @@ def run_report(recurrence, report_prefix, export_destination, presentation_repor
         report_prefix: the prefix to use for the report, for ex. "bba", "dls"
         export_destination: local directory location for downloaded report files
         presentation_report_entry: presentation report name within Mediasite
+        client: optional pre-built Mediasite API client, for ex. shared by several reports
+        polling_strategy: optional mediasite_jobs.PollingStrategy for waiting on jobs
+        store: optional MetricsStore to record the report summary in
+        window: optional ReportWindow used for naming files, defaults to the window of recurrence
+        stop_event: optional threading.Event which cancels waiting on the report jobs when set
 
     returns:
         mediasite_results: dict with various summary data extracted from the Mediasite API
     """
 
-    run_path = os.path.dirname(os.path.realpath(__file__))
+    #create mediasite api client
+    #note: clients built here are closed once the report is finished
+    if client is None:
+        with build_client() as client:
+            mediasite_results = run_report(recurrence, report_prefix, export_destination, presentation_report_entry, client, polling_strategy, store, window, stop_event)
+            logging.info("Mediasite connection stats: "+str(client.connection_stats()))
+            return mediasite_results
 
-    #open config file with api key/secret information
-    api_config_file = open(run_path+"/"+".mediasite_api_config")
-    api_data = json.load(api_config_file)
+    return run_reports(recurrence, report_prefix, export_destination, [presentation_report_entry], client,
+        polling_strategy, store, window, stop_event=stop_event)[presentation_report_entry]
+
+def run_reports(recurrence, report_prefix, export_destination, presentation_report_entries, client=None, polling_strategy=None, store=None, window=None, max_parallel_downloads=4, stop_event=None):
+    """
+    Function to run several Mediasite reports in one pass, for ex. one report per
+    department. The IDs of every report are found with a single request and every
+    report is executed before waiting on any of them. Jobs of all reports are then
+    waited on in one polling loop where the Export jobs of a report are submitted
+    as soon as its Execute job is complete and each file is downloaded as soon as
+    its Export job is complete.
+
+    params:
+        presentation_report_entries: list of presentation report names within Mediasite
+        max_parallel_downloads: most report files to download at once
+        see run_report for the other params
+
+    returns:
+        dict of presentation report names to their mediasite_results dict
 
+    raises:
+        LookupError: when a presentation report is not found in Mediasite
+    """
     #create mediasite api client
-    client = mediasite_web_api_client.client(
-        api_data["base_url"],
-        api_data["api_secret"],
-        api_data["api_user"],
-        api_data["api_pass"]
-        )
+    #note: clients built here are closed once the reports are finished
+    if client is None:
+        with build_client() as client:
+            all_mediasite_results = run_reports(recurrence, report_prefix, export_destination, presentation_report_entries, client, polling_strategy, store, window, max_parallel_downloads, stop_event)
+            logging.info("Mediasite connection stats: "+str(client.connection_stats()))
+            return all_mediasite_results
+
+    #gather date strings for file names
+    #note: the dates covered by the data are set within the Mediasite report itself
+    if window is None:
+        window = report_window.ReportWindow.from_recurrence(recurrence)
+
+    #perform request
+    #note: request includes odata attribute top to pull all information at once - otherwise the data will not include all results
+    #http://www.odata.org/documentation/odata-version-3-0/odata-version-3-0-core-protocol/
+    pipeline = ReportPipeline(presentation_report_entries, report_prefix, export_destination, window)
+
+    #determine presentation report IDs
+    logging.info("Finding IDs of "+str(len(pipeline.entries))+" presentation reports")
+    pipeline.found(client.do_request("get", "PresentationReports", pipeline.find_query(), ""))
+
+    #execute every presentation report before waiting on any of them
+    logging.info("Executing presentation reports")
+    for presentation_report_entry in pipeline.entries:
+        pipeline.executed(presentation_report_entry,
+            client.do_request("post", pipeline.execute_resource(presentation_report_entry), "", {}))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_parallel_downloads)) as executor:
+        downloads = []
+
+        #export jobs are submitted when their report is generated and files downloaded when they are exported
+        def on_success(job_link_url, job_result):
+            export_requests = pipeline.export_requests(job_link_url)
+            if export_requests is not None:
+                return [pipeline.exported(client.do_request("post", resource, "", data), download_filename)
+                    for resource, data, download_filename in export_requests]
+
+            download_link_url, download_filename = pipeline.export_jobs[job_link_url]
+            downloads.append(executor.submit(download_report_file, download_link_url, download_filename, client))
+            return []
+
+        with instrumentation.timed("mediasite.job_wait"):
+            mediasite_jobs.wait_for_jobs_to_complete(list(pipeline.execute_jobs), client, polling_strategy,
+                stop_event, on_success)
+
+        for pending_download in downloads:
+            pending_download.result()
+
+    return pipeline.results(store)
+
+class ReportPipeline:
+    def __init__(self, presentation_report_entries, report_prefix, export_destination, window):
+        """
+        Tracks the jobs and files of several Mediasite reports run together.
+
+        params:
+            presentation_report_entries: list of presentation report names within Mediasite
+            report_prefix: the prefix to use for the reports, for ex. "bba", "dls"
+            export_destination: local directory location for downloaded report files
+            window: ReportWindow used for naming files
+        """
+        #duplicate names are only run once
+        self.entries = list(dict.fromkeys(presentation_report_entries))
+        self.report_prefix = report_prefix
+        self.window = window
+
+        #files of a single report keep the report prefix alone
+        self.filenames = {}
+        for presentation_report_entry in self.entries:
+            file_prefix = report_prefix
+            if len(self.entries) > 1:
+                file_prefix += "_"+report_file_name(presentation_report_entry)
+            self.filenames[presentation_report_entry] = report_filenames(export_destination, file_prefix, window)
+
+        self.report_ids = {}
+        self.result_ids = {}
+        #report names by Execute job link and (download link, filename) by Export job link
+        self.execute_jobs = {}
+        self.export_jobs = {}
+
+    def find_query(self):
+        """
+        returns:
+            OData query finding every presentation report by name in one request
+        """
+        #note: single quotes are escaped by doubling them within odata strings
+        return "$top="+str(len(self.entries))+"&$filter="+" or ".join(
+            "Name eq '"+presentation_report_entry.replace("'", "''")+"'" for presentation_report_entry in self.entries)
+
+    def found(self, presentation_report_result):
+        """
+        Records the IDs of the presentation reports from the result of find_query.
+
+        raises:
+            LookupError: when a presentation report is not in the result
+        """
+        for presentation_report in json.loads(presentation_report_result)["value"]:
+            self.report_ids.setdefault(presentation_report["Name"], presentation_report["Id"])
+
+        missing = [presentation_report_entry for presentation_report_entry in self.entries
+            if presentation_report_entry not in self.report_ids]
+        if missing:
+            raise LookupError("Mediasite presentation reports not found: "+", ".join(missing))
+
+    def execute_resource(self, presentation_report_entry):
+        return "PresentationReports('"+self.report_ids[presentation_report_entry]+"')/Execute"
+
+    def executed(self, presentation_report_entry, presentation_report_execute):
+        """
+        Records the Execute job of a presentation report from the Execute response text.
+        """
+        presentation_report_execute_json = json.loads(presentation_report_execute)
+        self.result_ids[presentation_report_entry] = presentation_report_execute_json["ResultId"]
+        self.execute_jobs[presentation_report_execute_json["JobLink"]] = presentation_report_entry
+
+    def export_requests(self, job_link_url):
+        """
+        Finds the Export requests of a report whose Execute job is complete.
+
+        returns:
+            list of (resource, data, download filename) for the excel (xml) and xml
+            files of the report or None when job_link_url is not an Execute job
+        """
+        presentation_report_entry = self.execute_jobs.get(job_link_url)
+        if presentation_report_entry is None:
+            return None
+
+        logging.info("Beginning Excel XML and XML file generation for report "+presentation_report_entry)
+        resource = "PresentationReports('"+self.report_ids[presentation_report_entry]+"')/Export"
+        excel_filename, xml_filename = self.filenames[presentation_report_entry]
+        return [(resource, {"ResultId":self.result_ids[presentation_report_entry], "FileFormat":download_type}, download_filename)
+            for download_type, download_filename in (("Excel", excel_filename), ("XML", xml_filename))]
+
+    def exported(self, presentation_report_execute_export, download_filename):
+        """
+        Records the Export job of a file from the Export response text.
+
+        returns:
+            link of the Export job
+        """
+        export_job = json.loads(presentation_report_execute_export)
+        self.export_jobs[export_job["JobLink"]] = (export_job["DownloadLink"], download_filename)
+        return export_job["JobLink"]
+
+    def results(self, store=None):
+        """
+        returns:
+            dict of presentation report names to their mediasite_results dict read
+            from the downloaded files
+        """
+        return {presentation_report_entry:read_report_results(self.report_prefix, presentation_report_entry,
+            self.window, *self.filenames[presentation_report_entry], store)
+            for presentation_report_entry in self.entries}
+
+def report_file_name(presentation_report_entry):
+    """
+    returns:
+        presentation report name made safe for use in file names, for ex. "Biology Dept." as "biology_dept"
+    """
+    return re.sub(r"[^A-Za-z0-9]+", "_", presentation_report_entry).strip("_").lower() or "report"
 
+def report_filenames(export_destination, report_prefix, window):
+    """
+    Function for naming the files a Mediasite report is downloaded to.
+
+    arguments:
+        export_destination: local directory location for downloaded report files
+        report_prefix: the prefix to use for the report, for ex. "bba", "dls"
+        window: ReportWindow of the report
+
+    returns:
+        tuple of the excel (xml) and xml filenames
+    """
+    #filenames and locations for the excel and xml files
+    current_date_file_string = window.file_string
+    excel_filename = export_destination.rstrip('/')+"/mediasite_report_"+\
+        window.recurrence+"_"+report_prefix+'_'+current_date_file_string+".excel.xml"
+    xml_filename = export_destination.rstrip('/')+"/mediasite_report_"+\
+        window.recurrence+"_"+report_prefix+'_'+current_date_file_string+".xml"
+    return excel_filename, xml_filename
+
+def read_report_results(report_prefix, presentation_report_entry, window, excel_filename, xml_filename, store=None):
+    """
+    Function for reading the summary data of a downloaded Mediasite report.
+
+    arguments:
+        report_prefix: the prefix to use for the report, for ex. "bba", "dls"
+        presentation_report_entry: presentation report name within Mediasite
+        window: ReportWindow of the report
+        excel_filename: downloaded excel (xml) file of the report
+        xml_filename: downloaded xml file of the report
+        store: optional MetricsStore to record the report summary in
+
+    returns:
+        mediasite_results: dict with various summary data extracted from the report
+    """
     #initialize our final results dictionary
     mediasite_results = {"mediasite_results_total_time_watched":"",
         "mediasite_results_time_watched_hours":"",
@@ -62,52 +356,18 @@ def run_report(recurrence, report_prefix, export_destination, presentation_repor
         "mediasite_results_email_content":""
         }
 
-    #perform request
-    #note: request includes odata attribute top to pull all information at once - otherwise the data will not include all results
-    #http://www.odata.org/documentation/odata-version-3-0/odata-version-3-0-core-protocol/
-
-    #determine presentation report ID
-    logging.info("Finding ID of presentation report")
-    presentation_report_result = client.do_request("get", "PresentationReports", "$top=1&$filter=Name eq '"+presentation_report_entry+"'", "")
-    presentation_report_id = json.loads(presentation_report_result)["value"][0]["Id"]
-
-    #execute the presentation report
-    logging.info("Executing presentation report")
-    presentation_report_execute = client.do_request("post","PresentationReports('"+presentation_report_id+"')/Execute", "", {})
-    presentation_report_execute_json = json.loads(presentation_report_execute)
-
-    #wait for the report to be generated
-    wait_for_job_to_complete(presentation_report_execute_json["JobLink"], client)
-
-    #gather date strings for request
-    current_date_file_string = time.strftime("%m-%d-%Y")
-    week_ago = datetime.date.today() - datetime.timedelta(days=7)
-    week_ago_date_file_string = week_ago.strftime("%m-%d-%Y")
-
-    #filenames and locations for the excel and xml files
-    excel_filename = export_destination.rstrip('/')+"/mediasite_report_"+\
-        recurrence+"_"+report_prefix+'_'+current_date_file_string+".excel.xml"
-    xml_filename = export_destination.rstrip('/')+"/mediasite_report_"+\
-        recurrence+"_"+report_prefix+'_'+current_date_file_string+".xml"
-
-    #download excel (xml) version of data
-    logging.info("Beginning Excel XML file generation for report")
-    download_report_from_id(presentation_report_id, presentation_report_execute_json["ResultId"], "Excel", excel_filename, client)
-
-    #download xml version of data
-    logging.info("Beginning XML file generation for report")
-    download_report_from_id(presentation_report_id, presentation_report_execute_json["ResultId"], "XML", xml_filename, client)
-
     #parse necessary data from xml file
     logging.info("Reading XML data from report")
-    xml_data = xml.etree.ElementTree.parse(xml_filename)
-    xml_root = xml_data.getroot()
-    mediasite_results["mediasite_results_number_presentations"] = xml_root.find("ResultSummary").find("PresentationsAvailable").text
-    mediasite_results["mediasite_results_total_time_watched"] = xml_root.find("ResultSummary").find("TotalTimeWatched").text
-    mediasite_results["mediasite_results_watched_presentations"] = xml_root.find("ResultSummary").find("PresentationsWatched").text
-    mediasite_results["mediasite_results_presentation_views"] = xml_root.find("ResultSummary").find("TotalViews").text
-    mediasite_results["mediasite_results_active_users"] = xml_root.find("ResultSummary").find("TotalUsers").text
-    mediasite_results["mediasite_results_active_users_peak"] = xml_root.find("ResultSummary").find("PeakConnections").text
+    result_summary = mediasite_xml.read_result_summary(xml_filename)
+    if store is not None:
+        store.add_mediasite_summary(report_prefix, presentation_report_entry,
+            window.end_string, result_summary)
+    mediasite_results["mediasite_results_number_presentations"] = result_summary["PresentationsAvailable"]
+    mediasite_results["mediasite_results_total_time_watched"] = result_summary["TotalTimeWatched"]
+    mediasite_results["mediasite_results_watched_presentations"] = result_summary["PresentationsWatched"]
+    mediasite_results["mediasite_results_presentation_views"] = result_summary["TotalViews"]
+    mediasite_results["mediasite_results_active_users"] = result_summary["TotalUsers"]
+    mediasite_results["mediasite_results_active_users_peak"] = result_summary["PeakConnections"]
 
     #organize our time for display
     #NOTE: hours are in days by default in xml file (not the case in excel xml file)
@@ -132,58 +392,133 @@ def run_report(recurrence, report_prefix, export_destination, presentation_repor
 
     return mediasite_results
 
-def download_report_from_id(presentation_report_id, presentation_report_result_id, download_type, download_filename, client):
+def download_report_file(download_link_url, download_filename, client, chunk_size=download.DEFAULT_CHUNK_SIZE):
     """
-    Function for downloading Mediasite reports using Mediasite API.
+    Function for downloading a generated Mediasite report file. The file is
+    written to a temporary file and renamed into place once complete, resuming
+    with Range requests if the download is interrupted.
 
     arguments:
-        presentation_report_id: Mediasite GUID for relevant report
-        presentation_report_result_id: Mediasite GUID for relevant report result (data)
-        download_type: type of file to request, for ex. "Excel" or "XML"
+        download_link_url: link to the report file provided by the export job
         download_filename: name of the resulting downloaded report data file
         client: pre-configured Mediasite API client to be provided for making download requests
+        chunk_size: number of bytes to read and write at a time
     """
-    #make request for report file to be generated
-    presentation_report_execute_export = client.do_request("post", "PresentationReports('"+presentation_report_id+"')/Export", "", {"ResultId":presentation_report_result_id,"FileFormat":download_type})
-    presentation_report_execute_export_json = json.loads(presentation_report_execute_export)
-
-    #wait for the job to finish
-    wait_for_job_to_complete(presentation_report_execute_export_json["JobLink"], client)
-    logging.info("Attempting to download report from url: "+presentation_report_execute_export_json["DownloadLink"])
+    logging.info("Attempting to download report from url: "+download_link_url)
 
     #download the file as a stream
-    with open(download_filename, 'wb') as handle:
-        presentation_report_job_rsp = client.do_request("get stream",presentation_report_execute_export_json["DownloadLink"],"","")
-        for block in presentation_report_job_rsp.iter_content(1024):
-            handle.write(block)
+    with instrumentation.timed("mediasite.download"):
+        file_size = download.download_stream(
+            lambda headers: client.do_request("get stream",download_link_url,"","",headers),
+            download_filename,
+            chunk_size
+            )
+    instrumentation.count("mediasite.download_bytes", file_size)
 
     logging.info("Successfully downloaded "+download_filename)
 
-def wait_for_job_to_complete(job_link_url, client):
+async def run_report_async(recurrence, report_prefix, export_destination, presentation_report_entry, client=None, polling_strategy=None, store=None, window=None):
+    """
+    Awaitable counterpart of run_report using an async Mediasite API client so
+    that job polls and downloads wait on an event loop rather than a thread.
+
+    params:
+        client: optional pre-built mediasite_web_api_client.async_client, for ex. shared by several reports
+        see run_report for the other params
+
+    returns:
+        mediasite_results: dict with various summary data extracted from the Mediasite API
+    """
+    #create mediasite api client
+    #note: clients built here are closed once the report is finished
+    if client is None:
+        async with build_async_client() as client:
+            mediasite_results = await run_report_async(recurrence, report_prefix, export_destination, presentation_report_entry, client, polling_strategy, store, window)
+            logging.info("Mediasite connection stats: "+str(client.connection_stats()))
+            return mediasite_results
+
+    return (await run_reports_async(recurrence, report_prefix, export_destination, [presentation_report_entry], client,
+        polling_strategy, store, window))[presentation_report_entry]
+
+async def run_reports_async(recurrence, report_prefix, export_destination, presentation_report_entries, client=None, polling_strategy=None, store=None, window=None):
+    """
+    Awaitable counterpart of run_reports using an async Mediasite API client. The
+    reports are executed, exported and downloaded together on the event loop.
+
+    params:
+        client: optional pre-built mediasite_web_api_client.async_client, for ex. shared by several reports
+        see run_reports for the other params
+
+    returns:
+        dict of presentation report names to their mediasite_results dict
     """
-    Function for checking on and waiting for completion or error status of jobs in
-    Mediasite system using Mediasite API.
+    #create mediasite api client
+    #note: clients built here are closed once the reports are finished
+    if client is None:
+        async with build_async_client() as client:
+            all_mediasite_results = await run_reports_async(recurrence, report_prefix, export_destination, presentation_report_entries, client, polling_strategy, store, window)
+            logging.info("Mediasite connection stats: "+str(client.connection_stats()))
+            return all_mediasite_results
+
+    if window is None:
+        window = report_window.ReportWindow.from_recurrence(recurrence)
+    pipeline = ReportPipeline(presentation_report_entries, report_prefix, export_destination, window)
+
+    #determine presentation report IDs
+    logging.info("Finding IDs of "+str(len(pipeline.entries))+" presentation reports")
+    pipeline.found(await client.do_request("get", "PresentationReports", pipeline.find_query(), ""))
+
+    #execute every presentation report before waiting on any of them
+    logging.info("Executing presentation reports")
+    executions = await asyncio.gather(*[client.do_request("post", pipeline.execute_resource(presentation_report_entry), "", {})
+        for presentation_report_entry in pipeline.entries])
+    for presentation_report_entry, presentation_report_execute in zip(pipeline.entries, executions):
+        pipeline.executed(presentation_report_entry, presentation_report_execute)
+
+    downloads = []
+
+    #export jobs are submitted when their report is generated and files downloaded when they are exported
+    async def on_success(job_link_url, job_result):
+        export_requests = pipeline.export_requests(job_link_url)
+        if export_requests is not None:
+            exports = await asyncio.gather(*[client.do_request("post", resource, "", data)
+                for resource, data, download_filename in export_requests])
+            return [pipeline.exported(presentation_report_execute_export, download_filename)
+                for presentation_report_execute_export, (resource, data, download_filename) in zip(exports, export_requests)]
+
+        download_link_url, download_filename = pipeline.export_jobs[job_link_url]
+        downloads.append(asyncio.ensure_future(download_report_file_async(download_link_url, download_filename, client)))
+        return []
+
+    try:
+        with instrumentation.timed("mediasite.job_wait"):
+            await mediasite_jobs.wait_for_jobs_to_complete_async(list(pipeline.execute_jobs), client, polling_strategy,
+                on_success=on_success)
+        await asyncio.gather(*downloads)
+    finally:
+        #downloads still running when a job fails are not needed
+        for download_task in downloads:
+            download_task.cancel()
+
+    return pipeline.results(store)
+
+async def download_report_file_async(download_link_url, download_filename, client, chunk_size=download.DEFAULT_CHUNK_SIZE):
+    """
+    Awaitable counterpart of download_report_file using an async Mediasite API client.
 
     arguments:
-        job_link_url: unique link to Mediasite job which can be used for gathering status
-        client: pre-configured Mediasite API client to be provided for making requests
-    """
-    while 1:
-        #gather information on the job status
-        job_result = client.do_request("get job", job_link_url, "", "")
-        job_result_status = json.loads(job_result)["Status"]
-
-        #if successful we return
-        if job_result_status == "Successful":
-            logging.info("Job was successful")
-            return
-
-        #if the job fails or is canceled for some reason exit
-        elif job_result_status == "Disabled" or job_result_status == "Failed" or job_result_status == "Cancelled":
-            logging.error("Job "+presentation_report_execute_id+" did not complete successfully. Exiting.")
-            sys.exit()
-
-        #if the job is queued or working we wait for the job to finish or fail
-        else:
-            logging.info("Waiting for job to complete. Job status: "+job_result_status)
-            time.sleep(5)
+        see download_report_file
+    """
+    logging.info("Attempting to download report from url: "+download_link_url)
+
+    #download the file as a stream
+    with instrumentation.timed("mediasite.download"):
+        file_size = await download.download_stream_async(
+            lambda headers: client.do_request("get stream",download_link_url,"","",headers),
+            download_filename,
+            chunk_size,
+            connection_errors=async_http.connection_errors()
+            )
+    instrumentation.count("mediasite.download_bytes", file_size)
+
+    logging.info("Successfully downloaded "+download_filename)
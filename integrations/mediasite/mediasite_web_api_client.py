@@ -8,21 +8,62 @@ import base64
 import json
 import ssl
 import requests
+import integrations.common.request_dedup as request_dedup
+import integrations.common.http_session as http_session
+import integrations.common.resilience as resilience
+import integrations.common.async_http as async_http
 requests.packages.urllib3.disable_warnings()
 
 class client:
-	def __init__(self, serviceroot, sfapikey, username, password):
+	def __init__(self, serviceroot, sfapikey, username, password, deduplicator=None, pool_size=10, timeout=(10, 60), keep_alive=True, resilient_caller=None):
 		"""
 		params:
 			serviceroot: root URL to send API requests to
 			sfapikey: Mediasite API key for making requests
 			username: Mediasite API username for making requests
 			password: Mediasite API password for making requests
+			deduplicator: optional RequestDeduplicator shared between report runs
+				so that identical "get" lookups are only sent once
+			pool_size: number of connections to keep open to the Mediasite API
+			timeout: (connect, read) timeout in seconds for requests
+			keep_alive: whether to keep connections open between requests
+			resilient_caller: optional ResilientCaller retrying and rate limiting requests,
+				defaults to the one shared by all Mediasite clients
 		"""
 		self.serviceroot = serviceroot
 		self.sfapikey = sfapikey
 		self.username = username
 		self.password = password
+		self.deduplicator = deduplicator
+		self.resilience = resilient_caller if resilient_caller is not None else resilience.for_service("mediasite")
+
+		#long-lived session so that connections are reused between requests
+		#note: header values required for requests are computed once and sent with every request
+		self.session = http_session.build_session(pool_size, timeout, keep_alive)
+		self.session.headers.update({
+			"sfapikey" : self.sfapikey,
+			"Accept":"application/json",
+			"Authorization":self.get_basic_auth_header_value()
+		})
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+	def close(self):
+		"""
+		Closes the connections held open by the client.
+		"""
+		self.session.close()
+
+	def connection_stats(self):
+		"""
+		returns:
+			dict with counts of connections opened, requests sent and connections reused
+		"""
+		return http_session.connection_stats(self.session)
 
 	#formatting for login credentials needed by Mediasite
 	def get_basic_auth_header_value(self):
@@ -36,7 +77,7 @@ class client:
 		return_string  = "Basic "+str(base64.b64encode(bytes(self.username+":"+self.password,"utf-8")).decode("utf-8"))
 		return return_string
 
-	def do_request(self, request_type, resource, odata_attributes, post_vars):
+	def do_request(self, request_type, resource, odata_attributes, post_vars, headers=None):
 		"""
 		Performs API request based on parameter data
 
@@ -45,32 +86,162 @@ class client:
 			resource:  resource within the API to make requests on, for ex. "Presentations"
 			odata_attributes: odata attributes to use when making the requests
 			post_vars: variables to send when making post requests
+			headers: optional extra headers to send, for ex. a Range header for "get stream"
 		"""
-		self.resource = resource
-		self.odata_attributes = odata_attributes
+		#share the results of identical lookups when a deduplicator is provided
+		#note: job status and streams change over time and are never shared
+		if self.deduplicator is not None and request_type == "get":
+			return self.deduplicator.call(
+				request_dedup.request_key("mediasite", resource, odata_attributes),
+				lambda: self.send_request(request_type, resource, odata_attributes, post_vars, headers)
+				)
+
+		return self.send_request(request_type, resource, odata_attributes, post_vars, headers)
 
+	def send_request(self, request_type, resource, odata_attributes, post_vars, headers=None):
+		"""
+		Sends API request to Mediasite. Uses only its arguments rather than
+		instance attributes so that it may be called from several threads at once.
+
+		params:
+			request_type: type of request to make, for ex. "get","post", etc.
+			resource:  resource within the API to make requests on, for ex. "Presentations"
+			odata_attributes: odata attributes to use when making the requests
+			post_vars: variables to send when making post requests
+			headers: optional extra headers to send with the request
+		"""
 		#What we're requesting
-		url = self.serviceroot + self.resource + "?" + self.odata_attributes
+		url = self.serviceroot + resource + "?" + odata_attributes
 
-		# Header values required for request
-		values = {
-			"sfapikey" : self.sfapikey,
-			"Accept":"application/json",
-			"Authorization":self.get_basic_auth_header_value()
-		}
-
-		try:
-			if request_type == "get":
-				rsp = requests.get(url, headers=values, verify=False)
-				return rsp.text
-			elif request_type == "post":
-				rsp = requests.post(url, headers=values, json=post_vars, verify=False)
-				return rsp.text
-			elif request_type == "get stream":
-				rsp = requests.get(resource, headers=values, verify=False, stream=True)
-				return rsp
-			elif request_type == "get job":
-				rsp = requests.get(resource, headers=values, verify=False)
-				return rsp.text
-		except HTTPError as e:
-			return e.response.status_code
+		#requests are retried and rate limited, raising the error when they do not succeed
+		#note: posts start jobs on the server so they are only retried when known not to be processed
+		if request_type == "get":
+			rsp = self.resilience.call(lambda: self.session.get(url, headers=headers))
+			return rsp.text
+		elif request_type == "post":
+			rsp = self.resilience.call(lambda: self.session.post(url, headers=headers, json=post_vars), idempotent=False)
+			return rsp.text
+		elif request_type == "get stream":
+			rsp = self.resilience.call(lambda: self.session.get(resource, headers=headers, stream=True))
+			return rsp
+		elif request_type == "get job":
+			rsp = self.resilience.call(lambda: self.session.get(resource, headers=headers))
+			return rsp.text
+
+class async_client:
+	def __init__(self, serviceroot, sfapikey, username, password, deduplicator=None, pool_size=10, timeout=(10, 60), keep_alive=True, resilient_caller=None):
+		"""
+		Client for the Mediasite API making requests on an asyncio event loop
+		with the same arguments and do_request results as client, except that
+		"get stream" returns an aiohttp response. Requires aiohttp.
+
+		params:
+			see client, pool_size also limits the number of requests in flight at once
+		"""
+		self.serviceroot = serviceroot
+		self.sfapikey = sfapikey
+		self.username = username
+		self.password = password
+		self.deduplicator = deduplicator
+		self.resilience = resilient_caller if resilient_caller is not None else resilience.for_service("mediasite")
+		self.pool_size = pool_size
+		self.timeout = timeout
+		self.keep_alive = keep_alive
+
+		#session is created on the event loop the first time a request is made
+		self.counters = http_session.ConnectionCounters()
+		self.session = None
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, exc_type, exc_value, traceback):
+		await self.close()
+
+	async def close(self):
+		"""
+		Closes the connections held open by the client.
+		"""
+		if self.session is not None:
+			await self.session.close()
+			self.session = None
+
+	def connection_stats(self):
+		"""
+		returns:
+			dict with counts of connections opened, requests sent and connections reused
+		"""
+		return self.counters.stats()
+
+	get_basic_auth_header_value = client.get_basic_auth_header_value
+
+	def get_session(self):
+		"""
+		returns:
+			aiohttp session of the client, created the first time it is needed
+		"""
+		if self.session is None:
+			self.session = async_http.build_session(self.counters, self.pool_size, self.timeout, self.keep_alive,
+				headers={
+					"sfapikey" : self.sfapikey,
+					"Accept":"application/json",
+					"Authorization":self.get_basic_auth_header_value()
+				})
+		return self.session
+
+	async def do_request(self, request_type, resource, odata_attributes, post_vars, headers=None):
+		"""
+		Performs API request based on parameter data
+
+		params:
+			request_type: type of request to make, for ex. "get","post", etc.
+			resource:  resource within the API to make requests on, for ex. "Presentations"
+			odata_attributes: odata attributes to use when making the requests
+			post_vars: variables to send when making post requests
+			headers: optional extra headers to send, for ex. a Range header for "get stream"
+		"""
+		#share the results of identical lookups when a deduplicator is provided
+		if self.deduplicator is not None and request_type == "get":
+			return await self.deduplicator.call_async(
+				request_dedup.request_key("mediasite", resource, odata_attributes),
+				lambda: self.send_request(request_type, resource, odata_attributes, post_vars, headers)
+				)
+
+		return await self.send_request(request_type, resource, odata_attributes, post_vars, headers)
+
+	async def send_request(self, request_type, resource, odata_attributes, post_vars, headers=None):
+		"""
+		Sends API request to Mediasite.
+
+		params:
+			request_type: type of request to make, for ex. "get","post", etc.
+			resource:  resource within the API to make requests on, for ex. "Presentations"
+			odata_attributes: odata attributes to use when making the requests
+			post_vars: variables to send when making post requests
+			headers: optional extra headers to send with the request
+		"""
+		#What we're requesting
+		url = self.serviceroot + resource + "?" + odata_attributes
+		session = self.get_session()
+		connection_errors = async_http.connection_errors()
+
+		#requests are retried and rate limited, raising the error when they do not succeed
+		#note: posts start jobs on the server so they are only retried when known not to be processed
+		if request_type == "get":
+			rsp = await self.resilience.call_async(lambda: self.read(session.get(url, headers=headers)),
+				connection_errors=connection_errors)
+			return rsp.text
+		elif request_type == "post":
+			rsp = await self.resilience.call_async(lambda: self.read(session.post(url, headers=headers, json=post_vars)),
+				idempotent=False, connection_errors=connection_errors)
+			return rsp.text
+		elif request_type == "get stream":
+			return await self.resilience.call_async(lambda: session.get(resource, headers=headers),
+				connection_errors=connection_errors)
+		elif request_type == "get job":
+			rsp = await self.resilience.call_async(lambda: self.read(session.get(resource, headers=headers)),
+				connection_errors=connection_errors)
+			return rsp.text
+
+	async def read(self, request):
+		return await async_http.read_response(await request)
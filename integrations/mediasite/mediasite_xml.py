@@ -0,0 +1,83 @@
+"""
+LST Periodic Analytics Reporter - Mediasite XML
+Functions for reading Mediasite presentation report XML files incrementally
+using iterparse so that large reports are never held in memory all at once.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import xml.etree.ElementTree
+
+class ResultSummaryNotFound(Exception):
+    """
+    Raised when a report XML file has no ResultSummary element.
+    """
+
+def iter_elements(xml_filename, tags):
+    """
+    Generator of the complete elements of an XML file whose tag is one of tags,
+    at any depth. Every other element is removed from its parent as soon as it
+    ends and yielded elements are removed once the caller moves on, so memory
+    use does not grow with the size of the file.
+
+    arguments:
+        xml_filename: path to the XML file to read
+        tags: tag names of the elements to yield
+
+    yields:
+        xml.etree.ElementTree.Element for each element with one of tags
+    """
+    parents = []
+    #number of open elements with one of tags whose children must be kept
+    open_tagged = 0
+    for event, elem in xml.etree.ElementTree.iterparse(xml_filename, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            if elem.tag in tags:
+                open_tagged += 1
+            continue
+
+        parents.pop()
+        if elem.tag in tags:
+            open_tagged -= 1
+            yield elem
+        elif open_tagged:
+            continue
+
+        #remove elements we have already processed
+        if parents:
+            parents[-1].remove(elem)
+
+def read_result_summary(xml_filename):
+    """
+    Function for reading the ResultSummary of a Mediasite report XML file. Stops
+    reading the file as soon as the ResultSummary element is complete.
+
+    arguments:
+        xml_filename: path to the Mediasite report XML file
+
+    returns:
+        result_summary: dict of ResultSummary child element names to their text
+
+    raises:
+        ResultSummaryNotFound: when the file has no ResultSummary element
+    """
+    for elem in iter_elements(xml_filename, ("ResultSummary",)):
+        return {child.tag:child.text for child in elem}
+
+    raise ResultSummaryNotFound("No ResultSummary found in "+xml_filename)
+
+def iter_detail_rows(xml_filename, row_tag="Presentation"):
+    """
+    Generator of the per-presentation detail rows of a Mediasite report XML
+    file for later analysis. Rows are read and cleared one at a time.
+
+    arguments:
+        xml_filename: path to the Mediasite report XML file
+        row_tag: tag name of the elements holding one detail row each
+
+    yields:
+        dict of child element names to their text for each detail row
+    """
+    for elem in iter_elements(xml_filename, (row_tag,)):
+        yield {child.tag:child.text for child in elem}
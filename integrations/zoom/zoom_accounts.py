@@ -0,0 +1,174 @@
+"""
+LST Periodic Analytics Reporter - Zoom Accounts
+Matcher for filtering Zoom users by the configured account list. The account
+list is compiled once into hash indexes of exact emails, domains and suffixes
+along with a single Aho-Corasick automaton of the substring patterns so that
+each user email is matched in one pass no matter how many accounts are listed.
+Last modified: Oct 2026
+By: Dave Bunten
+"""
+
+import hashlib
+import collections
+
+class SubstringAutomaton:
+    def __init__(self, patterns):
+        """
+        Builds an Aho-Corasick automaton finding any of the patterns within text.
+
+        params:
+            patterns: list of pattern strings, the index of each being reported on a match
+        """
+        #goto transitions, failure links and the pattern indexes ending at each state
+        self.transitions = [{}]
+        self.failures = [0]
+        self.outputs = [[]]
+
+        for pattern_index, pattern in enumerate(patterns):
+            state = 0
+            for character in pattern:
+                next_state = self.transitions[state].get(character)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions[state][character] = next_state
+                    self.transitions.append({})
+                    self.failures.append(0)
+                    self.outputs.append([])
+                state = next_state
+            self.outputs[state].append(pattern_index)
+
+        #breadth first pass for failure links, outputs of the failure state are inherited
+        queue = collections.deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                failure = self.failures[state]
+                while failure and character not in self.transitions[failure]:
+                    failure = self.failures[failure]
+                self.failures[next_state] = self.transitions[failure].get(character, 0)
+                self.outputs[next_state] = self.outputs[next_state]+self.outputs[self.failures[next_state]]
+
+    def find(self, text, first_only=False):
+        """
+        Finds the patterns occurring in text.
+
+        params:
+            text: string to search
+            first_only: whether to stop at the first pattern found
+
+        returns:
+            lowest index of the patterns found in text or None when none are found
+        """
+        found = min(self.outputs[0]) if self.outputs[0] else None
+        if found is not None and first_only:
+            return found
+        state = 0
+        for character in text:
+            while state and character not in self.transitions[state]:
+                state = self.failures[state]
+            state = self.transitions[state].get(character, 0)
+            if self.outputs[state]:
+                state_found = min(self.outputs[state])
+                if first_only:
+                    return state_found
+                found = state_found if found is None else min(found, state_found)
+        return found
+
+class AccountMatcher:
+    def __init__(self, account_list, mode="substring", pattern_column=None):
+        """
+        Compiles the account list for matching user emails.
+
+        In "substring" mode an email matches when any entry of the account list
+        occurs within it, the same as checking each entry in turn. In "anchored"
+        mode entries which are full email addresses only match that address,
+        entries starting with "@" only match that domain, entries starting with
+        "." only match emails ending with them and any other entries are
+        substring patterns.
+
+        params:
+            account_list: list of account emails, domains or patterns
+            mode: "substring" or "anchored"
+            pattern_column: optional column name in which to report the matching entry
+        """
+        if mode not in ("substring", "anchored"):
+            raise ValueError("Unknown account match mode: "+str(mode))
+
+        self.account_list = list(account_list)
+        self.mode = mode
+        self.pattern_column = pattern_column
+
+        #indexes of the entries by kind, keeping the first entry of duplicates
+        self.exact = {}
+        self.domains = {}
+        self.suffixes = {}
+        substring_patterns = []
+        for pattern in self.account_list:
+            if "@" in pattern and not pattern.startswith("@"):
+                self.exact.setdefault(pattern, pattern)
+            elif pattern.startswith("@") and len(pattern) > 1:
+                self.domains.setdefault(pattern[1:], pattern)
+            elif pattern.startswith(".") and len(pattern) > 1:
+                self.suffixes.setdefault(pattern, pattern)
+            else:
+                substring_patterns.append(pattern)
+
+        #in substring mode every entry may occur anywhere in an email so all are searched
+        self.substring_patterns = self.account_list if mode == "substring" else substring_patterns
+        self.automaton = SubstringAutomaton(self.substring_patterns)
+        self.suffix_lengths = sorted({len(suffix) for suffix in self.suffixes}, reverse=True)
+
+    def __len__(self):
+        return len(self.account_list)
+
+    def key(self):
+        """
+        returns:
+            hash of the match mode and account list identifying the users matched,
+            for ex. to store the matched users of one account list apart from others
+        """
+        return hashlib.sha256("\n".join([self.mode]+self.account_list).encode("utf-8")).hexdigest()
+
+    def match(self, email):
+        """
+        Finds the account list entry matching an email. Exact emails are
+        preferred, then domains, then suffixes and then the first listed
+        substring pattern.
+
+        params:
+            email: user email address
+
+        returns:
+            the matching account list entry or None when the email does not match
+        """
+        email = email or ""
+
+        pattern = self.exact.get(email)
+        if pattern is not None:
+            return pattern
+
+        if "@" in email:
+            pattern = self.domains.get(email.rpartition("@")[2])
+            if pattern is not None:
+                return pattern
+
+        for length in self.suffix_lengths:
+            pattern = self.suffixes.get(email[-length:])
+            if pattern is not None:
+                return pattern
+
+        pattern_index = self.automaton.find(email)
+        return None if pattern_index is None else self.substring_patterns[pattern_index]
+
+    def matches(self, email):
+        """
+        returns:
+            whether an email matches any account list entry
+        """
+        email = email or ""
+        if email in self.exact or ("@" in email and email.rpartition("@")[2] in self.domains):
+            return True
+        if any(email[-length:] in self.suffixes for length in self.suffix_lengths):
+            return True
+        return self.automaton.find(email, first_only=True) is not None
@@ -10,30 +10,149 @@ import os
 import sys
 import logging
 import json
-import time
 import math
-import csv
 import datetime
+import asyncio
+import functools
+import collections
+import concurrent.futures
 import integrations.zoom.zoom_web_api_client as zoom_web_api_client
+import integrations.zoom.zoom_accounts as zoom_accounts
+import integrations.common.response_cache as response_cache
+import integrations.common.report_window as report_window
+import integrations.common.aggregation as aggregation
+import integrations.common.json_stream as json_stream
+import integrations.common.export as export
+import integrations.common.resilience as resilience
+import integrations.common.instrumentation as instrumentation
+
+#seconds a cached daily report for the current (still open) month stays valid
+CURRENT_MONTH_CACHE_TTL = 15*60
+
+#days after a month ends during which its cached daily report still expires, since
+#Zoom may still be adding the usage of the last days of the month to the report
+CLOSED_MONTH_GRACE_DAYS = 3
+
+class ZoomReportCancelled(Exception):
+    """
+    Raised when a report is stopped through the provided stop event.
+    """
 
-#function for perfoming our write to CSV work based on provided list of rows and keys
-def write_csv(download_filename, write_list, keys):
+#list of keys we're interested in from the user report data
+USER_REPORT_KEYS = ["user_id",
+    "email",
+    "meetings",
+    "meeting_minutes",
+    "participants"
+    ]
+
+#list of keys we will need to find sums on
+USER_REPORT_SUM_KEYS = ["meetings",
+    "meeting_minutes",
+    "participants"
+    ]
+
+def is_daily_report(result):
     """
-    Function for writing CSV's based on a list of rows with various data
+    Checks whether a daily report response holds report data rather than an error.
 
     arguments:
-        download_filename: file path where resulting CSV will be stored
-        write_list: list of dicts with keys
-        keys: keys to write as columns for in each element of write_list
-    """
-    with open(download_filename, 'w', newline='') as fp:
-        a = csv.DictWriter(fp, delimiter=',',fieldnames=keys, restval='',extrasaction='ignore')
-        a.writeheader()
-        a.writerows(write_list)
-    logging.info("Finished creating Zoom stats file "+download_filename)
+        result: response text from the daily report request
+
+    returns:
+        True when the response includes the "dates" list
+    """
+    try:
+        return isinstance(json.loads(result).get("dates"), list)
+    except (ValueError, AttributeError):
+        return False
+
+def daily_report_ttl(year_number, month_number):
+    """
+    returns:
+        seconds a cached daily report of the month stays valid, None once the month
+        has been over for CLOSED_MONTH_GRACE_DAYS since its data will no longer change
+    """
+    grace_date = datetime.date.today()-datetime.timedelta(days=CLOSED_MONTH_GRACE_DAYS)
+    if report_window.ReportWindow.for_month(int(year_number), int(month_number)).is_closed(grace_date):
+        return None
+    return CURRENT_MONTH_CACHE_TTL
+
+def request_daily_report(client, year_number, month_number):
+    """
+    Function for requesting the Zoom daily report of a month. When the client
+    has a response cache, reports for months which closed more than
+    CLOSED_MONTH_GRACE_DAYS ago are cached without expiry since their data never
+    changes, while other months use a short TTL.
+
+    arguments:
+        client: zoom_web_api_client which is to be pre-built and provided to function
+        year_number: for specifying the year in the Zoom API request
+        month_number: for specifying the month in the Zoom API request
+
+    returns:
+        response text of the daily report request
+    """
+    request_parameters = {"year":year_number,"month":month_number}
+
+    if client.response_cache is None:
+        return client.do_request("report/getdailyreport", request_parameters)
+
+
+    def request_report():
+        with instrumentation.timed("zoom.daily_report_request"):
+            return client.do_request("report/getdailyreport", request_parameters)
+
+    return client.response_cache.fetch("report/getdailyreport", request_parameters,
+        request_report,
+        ttl=daily_report_ttl(year_number, month_number),
+        validate=is_daily_report
+        )
+
+async def request_daily_report_async(client, year_number, month_number):
+    """
+    Awaitable counterpart of request_daily_report using an async Zoom API client.
+
+    returns:
+        response text of the daily report request
+    """
+    request_parameters = {"year":year_number,"month":month_number}
+
+    if client.response_cache is None:
+        return await client.do_request("report/getdailyreport", request_parameters)
+
+
+    async def request_report():
+        with instrumentation.timed("zoom.daily_report_request"):
+            return await client.do_request("report/getdailyreport", request_parameters)
+
+    return await client.response_cache.fetch_async("report/getdailyreport", request_parameters,
+        request_report,
+        ttl=daily_report_ttl(year_number, month_number),
+        validate=is_daily_report
+        )
+
+def daily_report_months(window, store=None):
+    """
+    Function for finding the months whose Zoom daily report is needed for a window.
+
+    arguments:
+        window: ReportWindow of dates to report on
+        store: optional MetricsStore, in which case only months with days missing
+            from the store are needed
+
+    returns:
+        list of (year, month) strings in order
+    """
+    if store is not None:
+        missing_dates = store.missing_zoom_daily_dates(window.dates())
+        logging.info("Requesting Zoom daily data for "+str(len(missing_dates))+" days missing from metrics store")
+        return [(str(year_number), str(month_number)) for year_number, month_number in
+            sorted({(int(date[:4]), int(date[5:7])) for date in missing_dates})]
+    return [(str(year_number), str(month_number)) for year_number, month_number in window.months()]
 
 #function for
-def zoom_daily_report(client, report_prefix, recurrence, zoom_results, export_destination):
+def zoom_daily_report(client, report_prefix, recurrence, zoom_results, export_destination, store=None, window=None, export_format="csv", daily_reports=None):
     """
     Function for performing work to gather Zoom daily report information. Note
     that this is typically used when not interested in specific user reports and
@@ -45,25 +164,24 @@ def zoom_daily_report(client, report_prefix, recurrence, zoom_results, export_de
         recurrence: the recurrence being used in the report used to set date ranges
         zoom_results: used for storing or appending to existing results
         export_destination: used for determining where to store exported csv w/data
+        store: optional MetricsStore holding previously requested daily data
+        window: optional ReportWindow of dates to report on, defaults to the window of recurrence
+        export_format: format of the exported file, "csv", "csv.gz" or "parquet"
+        daily_reports: optional dict of (year, month) strings from daily_report_months to the
+            response text of their daily report when already requested, for ex. by the async reporter
 
     returns:
         zoom_results: dict with various summary data extracted from the Zoom API
     """
 
-    #gather date strings for naming conventions
-    start_date_string = time.strftime("%Y-%m-%d")
-    start_date_file_string = time.strftime("%m-%d-%Y")
+    #gather the report window and date strings for naming conventions
+    if window is None:
+        window = report_window.ReportWindow.from_recurrence(recurrence)
+    start_date_file_string = window.file_string
 
-    #gather monthly information. Note: this is needed even if doing a weekly report
-    #due to constraints with the Zoom API
-    last_day_of_previous_month = datetime.date.today().replace(day=1) - datetime.timedelta(days=1)
-    previous_month_number = last_day_of_previous_month.strftime("%m").lstrip("0")
-    current_month_number = datetime.date.today().strftime("%m").lstrip("0")
-    year_number = last_day_of_previous_month.strftime("%Y")
-
-    #if we're working with a weekly report, gather a list of the applicable dates
-    if recurrence == "weekly":
-        week_list = [(datetime.date.today() - datetime.timedelta(days=x)).strftime("%Y-%m-%d") for x in range(0, 7)]
+    #gather the dates of the report. Note: the Zoom API returns daily data by month
+    #so every month overlapping the window is requested
+    report_dates = window.dates()
 
     #list of keys we're interested in from the return data
     keys = ["date",
@@ -80,6 +198,11 @@ def zoom_daily_report(client, report_prefix, recurrence, zoom_results, export_de
         "meeting_minutes"
         ]
 
+    def month_report(year_number, month_number):
+        if daily_reports is not None:
+            return daily_reports[(year_number, month_number)]
+        return request_daily_report(client, year_number, month_number)
+
     def find_monthly_data(write_list, year_number, month_number, date_list=[]):
         """
         Function for performing requests to gather monthly Zoom data.
@@ -94,62 +217,43 @@ def zoom_daily_report(client, report_prefix, recurrence, zoom_results, export_de
             write_list: a list of data for calculating report information
         """
         #run a daily report request using the year and month number provided
-        result = client.do_request("report/getdailyreport", {"year":year_number,"month":month_number})
-        result_json = json.loads(result)
-        daily_results = result_json["dates"]
-
-        #loop through dailyreport results for storing relevant content into write_list
-        for user_data in daily_results:
-            row = {}
-            #for each date in date_list, gather information. Or if date_list is empty,
-            #gather all data
-            if any(str(user_data["date"]) in week_date for week_date in date_list) or len(date_list) == 0:
-                #for each key, only keep those which are in keys list above
-                for key,value in user_data.items():
-                    if key in keys:
-                        row[key] = value
-                write_list.append(row)
+        result = month_report(year_number, month_number)
+        daily_results = json_stream.JsonArrayStream([result], "dates")
+
+        #keep dailyreport results for each date in date_list, or if date_list is empty,
+        #gather all data. Note: only the columns in keys are loaded into the report table
+        date_set = set(date_list)
+        write_list.extend(user_data for user_data in daily_results
+            if len(date_list) == 0 or str(user_data["date"]) in date_set)
 
         return write_list
 
     #final result data by row
     write_list = []
 
-    #for weekly recurrence reports
-    if recurrence == "weekly":
-        write_list = find_monthly_data(write_list, year_number, current_month_number, week_list)
-        #in the case that we need to gather weekly data from the previous month
-        if len(write_list) < 7:
-            write_list = find_monthly_data(write_list, year_number, previous_month_number, week_list)
-    #for monthly recurrence reports
-    elif recurrence == "monthly":
-        write_list = find_monthly_data(write_list, year_number, previous_month_number)
-
-
-    #initialize our col_sum dict for calculating sums of columns in csv
-    col_sum = {key:0 for key in sum_keys}
-
-    #determine sums row for write_list and the resulting report file/data
-    for row_data in write_list:
-        for key,value in row_data.items():
-
-            #trigger for labeling the totals - will appear as cell 1 of final line in csv
-            if key == "date":
-                col_sum[key] = "totals"
-
-            #for keys in the sum_keys list
-            elif key in col_sum:
-                col_sum[key] += int(value)
-
-    #append the col_sums to the bottom of the write_list for csv
-    write_list.append(col_sum)
+    #when using the metrics store only request months with days missing from the store
+    if store is not None:
+        for missing_year_number, missing_month_number in daily_report_months(window, store) if daily_reports is None else daily_reports:
+            result = month_report(missing_year_number, missing_month_number)
+            store.add_zoom_daily_rows(json_stream.JsonArrayStream([result], "dates"))
 
-    #create filename for csv
-    download_filename = export_destination.rstrip('/')+'/zoom_report_'+\
-        recurrence+'_'+report_prefix+'_'+start_date_file_string+'.csv'
+        write_list = store.zoom_daily_rows(window.start_string, window.end_string)
 
-    #write output as a csv
-    write_csv(download_filename, write_list, keys)
+    #otherwise request every month overlapping the window
+    else:
+        for year_number, month_number in daily_report_months(window):
+            write_list = find_monthly_data(write_list, year_number, month_number, report_dates)
+
+    #create filename for export
+    download_filename = export.export_filename(export_destination.rstrip('/')+'/zoom_report_'+\
+        window.recurrence+'_'+report_prefix+'_'+start_date_file_string, export_format)
+
+    #write output with the col_sums found while writing at the bottom
+    #note: totals label will appear as cell 1 of final line in csv
+    totals = aggregation.RunningTotals(sum_keys)
+    export.write_rows(download_filename, write_list, keys, totals, "date", export_format)
+    col_sum = totals.totals_row("date")
+    logging.info("Finished creating Zoom stats file "+download_filename)
 
     #store results and various other data in a dict which will be returned from function
     zoom_results["zoom_results_new_user"] = str(col_sum["new_user"])
@@ -161,12 +265,222 @@ def zoom_daily_report(client, report_prefix, recurrence, zoom_results, export_de
 
     return zoom_results
 
-def zoom_user_report(client, report_prefix, recurrence, zoom_results, export_destination, account_list):
+def read_users(users, transform=None):
+    """
+    Function for reading the users of one page of the Zoom account report.
+
+    arguments:
+        users: JsonArrayStream of the users of the page
+        transform: optional function of a user dict returning the row to keep or None
+            to leave the user out
+
+    returns:
+        tuple of the other values of the page, the number of users and the rows kept
+    """
+    rows = []
+    user_count = 0
+    for user_data in users:
+        user_count += 1
+        row = user_data if transform is None else transform(user_data)
+        if row is not None:
+            rows.append(row)
+    instrumentation.count("zoom.account_report_users", user_count)
+    return users.fields, user_count, rows
+
+def account_report_page_count(first_page_fields, page_size):
+    """
+    Function for finding the number of pages of the Zoom account report from
+    the page or record count of its first page.
+
+    returns:
+        number of pages or None when the first page includes neither count
+    """
+    page_count = first_page_fields.get("page_count")
+    if page_count is None and first_page_fields.get("total_records") is not None:
+        page_count = math.ceil(int(first_page_fields["total_records"])/page_size)
+    return int(page_count) if page_count is not None else None
+
+def iter_account_report_users(client, from_date_string, to_date_string, page_size=300, max_in_flight_pages=4, transform=None, stop_event=None):
+    """
+    Function for gathering all users from the paginated Zoom account report.
+    The first page is requested alone to find the page count, after which the
+    remaining pages are requested concurrently. When the response does not
+    include a page or record count the pages are probed one at a time until a
+    short page is returned. Users are read from each response as it arrives and
+    passed through transform so that only the rows kept are held in memory, and
+    no more than max_in_flight_pages pages are held before being yielded.
+
+    arguments:
+        client: zoom_web_api_client which is to be pre-built and provided to function
+        from_date_string: start date of the report in the format YYYY-MM-DD
+        to_date_string: end date of the report in the format YYYY-MM-DD
+        page_size: number of users to request per page
+        max_in_flight_pages: maximum number of page requests to have in flight at once
+        transform: optional function of a user dict returning the row to keep or None
+            to leave the user out
+        stop_event: optional threading.Event which stops further pages being requested when set
+
+    yields:
+        user dicts or transformed rows in page order
+
+    raises:
+        ZoomReportCancelled: when stop_event is set before every page is requested
+    """
+    def fetch_page(page_number):
+        if stop_event is not None and stop_event.is_set():
+            raise ZoomReportCancelled("Zoom account report cancelled before page "+str(page_number))
+        with instrumentation.timed("zoom.account_report_page"):
+            return read_page(page_number)
+
+    def read_page(page_number):
+        return read_users(client.stream_request("report/getaccountreport",
+            {"from":from_date_string,
+                "to":to_date_string,
+                "page_size":str(page_size),"page_number":str(page_number)
+                },
+            "users"
+            ), transform)
+
+    first_page_fields, user_result_number, rows = fetch_page(1)
+    total_user_count = user_result_number
+    yield from rows
+
+    #find the number of pages from the page or record count of the first page
+    page_count = account_report_page_count(first_page_fields, page_size)
+
+    if page_count is not None:
+        page_numbers = range(2, page_count+1)
+        logging.info("Requesting "+str(len(page_numbers))+" more pages of account report with up to "+
+            str(max_in_flight_pages)+" requests in flight")
+
+        #pages are yielded in the order requested which keeps rows in page order
+        #and new pages are only requested as earlier pages are yielded
+        max_in_flight_pages = max(1, max_in_flight_pages)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_in_flight_pages) as executor:
+            page_futures = collections.deque()
+            for page_number in page_numbers:
+                page_futures.append(executor.submit(fetch_page, page_number))
+                if len(page_futures) == max_in_flight_pages:
+                    page_fields, user_count, rows = page_futures.popleft().result()
+                    total_user_count += user_count
+                    yield from rows
+            while page_futures:
+                page_fields, user_count, rows = page_futures.popleft().result()
+                total_user_count += user_count
+                yield from rows
+    else:
+        #no count provided so keep requesting until a page is not full
+        page_number = 2
+        while user_result_number == page_size:
+            page_fields, user_result_number, rows = fetch_page(page_number)
+            total_user_count += user_result_number
+            yield from rows
+            page_number += 1
+
+    logging.info("User object rows: "+str(total_user_count))
+
+async def iter_account_report_users_async(client, from_date_string, to_date_string, page_size=300, max_in_flight_pages=4, transform=None):
+    """
+    Awaitable counterpart of iter_account_report_users using an async Zoom API
+    client. Pages after the first are requested as tasks on the event loop with
+    no more than max_in_flight_pages in flight, so a single thread can keep
+    many page requests open at once.
+
+    arguments:
+        client: zoom_web_api_client.async_client which is to be pre-built and provided to function
+        see iter_account_report_users for the other arguments
+
+    yields:
+        user dicts or transformed rows in page order
+    """
+    async def fetch_page(page_number):
+        with instrumentation.timed("zoom.account_report_page"):
+            return read_users(await client.stream_request("report/getaccountreport",
+                {"from":from_date_string,
+                    "to":to_date_string,
+                    "page_size":str(page_size),"page_number":str(page_number)
+                    },
+                "users"
+                ), transform)
+
+    first_page_fields, user_result_number, rows = await fetch_page(1)
+    total_user_count = user_result_number
+    for row in rows:
+        yield row
+
+    page_count = account_report_page_count(first_page_fields, page_size)
+
+    if page_count is not None:
+        logging.info("Requesting "+str(max(0, page_count-1))+" more pages of account report with up to "+
+            str(max_in_flight_pages)+" requests in flight")
+
+        #pages are yielded in the order requested and new pages are only requested as earlier pages are yielded
+        max_in_flight_pages = max(1, max_in_flight_pages)
+        page_tasks = collections.deque()
+        try:
+            for page_number in range(2, page_count+1):
+                page_tasks.append(asyncio.ensure_future(fetch_page(page_number)))
+                if len(page_tasks) == max_in_flight_pages:
+                    page_fields, user_count, rows = await page_tasks.popleft()
+                    total_user_count += user_count
+                    for row in rows:
+                        yield row
+            while page_tasks:
+                page_fields, user_count, rows = await page_tasks.popleft()
+                total_user_count += user_count
+                for row in rows:
+                    yield row
+        finally:
+            #pages still in flight when the caller stops reading are not needed
+            for page_task in page_tasks:
+                page_task.cancel()
+    else:
+        #no count provided so keep requesting until a page is not full
+        page_number = 2
+        while user_result_number == page_size:
+            page_fields, user_result_number, rows = await fetch_page(page_number)
+            total_user_count += user_result_number
+            for row in rows:
+                yield row
+            page_number += 1
+
+    logging.info("User object rows: "+str(total_user_count))
+
+async def fetch_account_report_users_async(client, from_date_string, to_date_string, page_size=300, max_in_flight_pages=4, transform=None):
+    """
+    Function for gathering all users from the paginated Zoom account report into
+    a list using an async Zoom API client. See iter_account_report_users_async.
+
+    returns:
+        user_results: list of user dicts or transformed rows in page order
+    """
+    return [row async for row in iter_account_report_users_async(client, from_date_string, to_date_string,
+        page_size, max_in_flight_pages, transform)]
+
+def user_row_filter(account_matcher, keys):
+    """
+    Function for creating the filter of the Zoom account report users kept in the user report.
+
+    arguments:
+        account_matcher: AccountMatcher of the accounts to keep
+        keys: columns of the rows to keep
+
+    returns:
+        function of a user dict returning its row of keys when it matches, otherwise None
+    """
+    def keep_user(user_data):
+        if account_matcher.matches(user_data["email"]):
+            return {key:user_data[key] for key in keys if key in user_data}
+        return None
+
+    return keep_user
+
+def zoom_user_report(client, report_prefix, recurrence, zoom_results, export_destination, account_list, max_in_flight_pages=4, store=None, window=None, export_format="csv", user_rows=None, stop_event=None):
     """
     Function for performing work to gather Zoom user report information. Note
     that this is typically used when not interested in more generic monthly reports
-    and as such will gather different data.
-
+    and as such will gather different data.
+
     NOTE: that weekly reports can be run from any date and will gather data based
     #on 7 day period whereas monthly assumes the previous month from the current date
 
@@ -176,103 +490,215 @@ def zoom_user_report(client, report_prefix, recurrence, zoom_results, export_des
         recurrence: the recurrence being used in the report used to set date ranges
         zoom_results: used for storing or appending to existing results
         export_destination: used for determining where to store exported csv w/data
-        account_list: list of Zoom user accounts by email which we're interested in
+        account_list: list of Zoom user accounts by email which we're interested in or
+            an AccountMatcher compiled from such a list
+        max_in_flight_pages: maximum number of account report pages to request at once
+        store: optional MetricsStore holding previously requested user data
+        window: optional ReportWindow of dates to report on, defaults to the window of recurrence
+        export_format: format of the exported file, "csv", "csv.gz" or "parquet"
+        user_rows: optional rows of the account list users which have already been
+            requested, for ex. by zoom_user_report_async, rather than requesting them
+        stop_event: optional threading.Event which stops the report when set
 
     returns:
         zoom_results: dict with various summary data extracted from the Zoom API
     """
-    #gather date strings for request based on recurrence
-    if recurrence == "weekly":
-        start_date = datetime.date.today()
-        previous_date = datetime.date.today() - datetime.timedelta(days=7)
-    elif recurrence == "monthly":
-        start_date = (datetime.date.today().replace(day=1) - datetime.timedelta(days=1))
-        previous_date = start_date.replace(day=1)
+    #gather date strings for request based on the report window
+    #note: start_date is the most recent date of the report and previous_date the earliest
+    if window is None:
+        window = report_window.ReportWindow.from_recurrence(recurrence)
 
-    start_date_string = start_date.strftime("%Y-%m-%d")
-    start_date_file_string = start_date.strftime("%m-%d-%Y")
-    previous_date_string = previous_date.strftime("%Y-%m-%d")
-    previous_date_file_string = previous_date.strftime("%m-%d-%Y")
+    start_date_string = window.end_string
+    start_date_file_string = window.file_string
+    previous_date_string = window.start_string
 
-    #list of keys we're interested in from the return data
-    keys = ["user_id",
-        "email",
-        "meetings",
-        "meeting_minutes",
-        "participants"
-        ]
+    keys = USER_REPORT_KEYS
+    sum_keys = USER_REPORT_SUM_KEYS
 
-    #list of keys we will need to find sums on
-    sum_keys = ["meetings",
-        "meeting_minutes",
-        "participants"
-        ]
+    #compile the account list once for matching every user
+    if isinstance(account_list, zoom_accounts.AccountMatcher):
+        account_matcher = account_list
+    else:
+        account_matcher = zoom_accounts.AccountMatcher(account_list)
 
-    user_results = []
-    user_result_number = 300
-    page_count = 1
-
-    #parse the result for the data we need using pages as necessary
-    while user_result_number == 300:
-        result = client.do_request("report/getaccountreport",
-            {"from":previous_date_string,
-                "to":start_date_string,
-                "page_size":"300","page_number":str(page_count)
-                }
-        )
-        result_json = json.loads(result)
-        user_results.extend(result_json["users"])
-        user_result_number = len(result_json["users"])
-        page_count += 1
+    #rows for closed periods which are already in the metrics store are not requested again
+    #note: rows are stored by the account list and match mode they were filtered by
+    if store is not None and store.has_zoom_user_period(report_prefix, account_matcher.key(), previous_date_string, start_date_string):
+        logging.info("Using Zoom user rows from metrics store")
+        write_list = store.zoom_user_rows(report_prefix, account_matcher.key(), previous_date_string, start_date_string)
+    else:
+        if user_rows is not None:
+            write_list = user_rows
+        else:
+            #parse the result for the data we need using pages as necessary, keeping only
+            #the users of the account list and the columns in keys
+            #note: rows are written and stored as they arrive
+            write_list = iter_account_report_users(client, previous_date_string,
+                start_date_string, max_in_flight_pages=max_in_flight_pages,
+                transform=user_row_filter(account_matcher, keys), stop_event=stop_event)
+
+        #store the rows in batches while they are written
+        if store is not None:
+            write_list = store.storing_zoom_user_rows(report_prefix, account_matcher.key(),
+                previous_date_string, start_date_string, write_list)
+
+    #optionally report which account list entry matched each row
+    if account_matcher.pattern_column:
+        keys = keys+[account_matcher.pattern_column]
+        write_list = (dict(row, **{account_matcher.pattern_column:account_matcher.match(row["email"])})
+            for row in write_list)
+
+    #create filename for export
+    download_filename = export.export_filename(export_destination.rstrip('/')+'/zoom_report_'+\
+        window.recurrence+'_'+report_prefix+'_'+start_date_file_string, export_format)
+
+    #write output with the col_sums found while writing at the bottom
+    totals = aggregation.RunningTotals(sum_keys, "email", aggregation.email_domain)
+    export.write_rows(download_filename, write_list, keys, totals, "email", export_format)
+    col_sum = totals.totals_row("email")
+    logging.info("Finished creating Zoom stats file "+download_filename)
 
-    logging.info("User object rows: "+str(len(user_results)))
+    #log meeting totals by email domain for a breakdown of the accounts
+    for domain, domain_sums in totals.groups.items():
+        logging.debug("Zoom totals for domain "+str(domain)+": "+str(domain_sums))
 
-    #final result data by row
-    write_list = []
+    logging.info("Storing data from report")
 
-    #loop through the result users listing and filter by the account_list above
-    for user_data in user_results:
-        if any(sub in user_data["email"] for sub in account_list):
-            row = {}
-            #for each key, only keep those which are in keys list above
-            for key,value in user_data.items():
-                if key in keys:
-                    row[key] = value
-            write_list.append(row)
+    zoom_results["zoom_results_meetings"] = str(col_sum["meetings"])
+    zoom_results["zoom_results_participants"] = str(col_sum["participants"])
+    zoom_results["zoom_results_meeting_minutes"] = str(col_sum["meeting_minutes"])
+    zoom_results["zoom_results_meeting_hours"] = str(math.ceil(int(zoom_results["zoom_results_meeting_minutes"])/60))
+    zoom_results["zoom_results_csv_filepath"] = download_filename
 
-    #initialize our col_sum dict for calculating sums of columns in csv
-    col_sum = {key:0 for key in sum_keys}
+    return zoom_results
 
-    #determine sums row for write_list and the resulting report file/data
-    for row_data in write_list:
-        for key,value in row_data.items():
+async def zoom_user_report_async(client, report_prefix, recurrence, zoom_results, export_destination, account_list, max_in_flight_pages=4, store=None, window=None, export_format="csv"):
+    """
+    Awaitable counterpart of zoom_user_report requesting the account report
+    pages with an async Zoom API client. The rows of the account list users are
+    gathered before they are written.
 
-            if key == "email":
-                col_sum[key] = "totals"
+    arguments:
+        client: zoom_web_api_client.async_client which is to be pre-built and provided to function
+        see zoom_user_report for the other arguments
 
-            elif key in col_sum:
-                    col_sum[key] += int(value)
+    returns:
+        zoom_results: dict with various summary data extracted from the Zoom API
+    """
+    if window is None:
+        window = report_window.ReportWindow.from_recurrence(recurrence)
 
-    write_list.append(col_sum)
+    if not isinstance(account_list, zoom_accounts.AccountMatcher):
+        account_list = zoom_accounts.AccountMatcher(account_list)
 
-    #create filename for csv
-    download_filename = export_destination.rstrip('/')+'/zoom_report_'+\
-        recurrence+'_'+report_prefix+'_'+start_date_file_string+'.csv'
+    #rows for closed periods which are already in the metrics store are not requested again
+    user_rows = None
+    if store is None or not store.has_zoom_user_period(report_prefix, account_list.key(), window.start_string, window.end_string):
+        user_rows = await fetch_account_report_users_async(client, window.start_string, window.end_string,
+            max_in_flight_pages=max_in_flight_pages, transform=user_row_filter(account_list, USER_REPORT_KEYS))
 
-    #write output as a csv
-    write_csv(download_filename, write_list, keys)
+    return zoom_user_report(None, report_prefix, recurrence, zoom_results, export_destination, account_list,
+        max_in_flight_pages, store, window, export_format, user_rows)
 
-    logging.info("Storing data from report")
+async def zoom_daily_report_async(client, report_prefix, recurrence, zoom_results, export_destination, store=None, window=None, export_format="csv"):
+    """
+    Awaitable counterpart of zoom_daily_report requesting the daily report of
+    every month of the window at once with an async Zoom API client.
 
-    zoom_results["zoom_results_meetings"] = str(col_sum["meetings"])
-    zoom_results["zoom_results_participants"] = str(col_sum["participants"])
-    zoom_results["zoom_results_meeting_minutes"] = str(col_sum["meeting_minutes"])
-    zoom_results["zoom_results_meeting_hours"] = str(math.ceil(int(zoom_results["zoom_results_meeting_minutes"])/60))
-    zoom_results["zoom_results_csv_filepath"] = download_filename
+    arguments:
+        client: zoom_web_api_client.async_client which is to be pre-built and provided to function
+        see zoom_daily_report for the other arguments
 
-    return zoom_results
+    returns:
+        zoom_results: dict with various summary data extracted from the Zoom API
+    """
+    if window is None:
+        window = report_window.ReportWindow.from_recurrence(recurrence)
+
+    months = daily_report_months(window, store)
+    daily_reports = await asyncio.gather(*[request_daily_report_async(client, year_string, month_string)
+        for year_string, month_string in months])
+
+    return zoom_daily_report(None, report_prefix, recurrence, zoom_results, export_destination, store,
+        window, export_format, dict(zip(months, daily_reports)))
+
+@functools.lru_cache(maxsize=None)
+def load_api_config():
+    """
+    Loads the Zoom API key/secret configuration file. The file is only read
+    once per process no matter how many reports are run.
+
+    returns:
+        api_data: dict of Zoom API configuration data
+    """
+    run_path = os.path.dirname(__file__)
+
+    #open config file with api key/secret information
+    with open(run_path+"/"+".zoom_api_config") as api_config_file:
+        api_data = json.load(api_config_file)
 
-def run_report(recurrence, report_prefix, export_destination, account_list=[]):
+    return api_data
+
+def build_client(deduplicator=None, bypass_cache=False):
+    """
+    Builds client for Zoom API using the Zoom API configuration file.
+
+    arguments:
+        deduplicator: optional RequestDeduplicator shared between report runs
+        bypass_cache: whether to skip the on-disk response cache for daily reports
+
+    returns:
+        client: zoom_web_api_client ready for making requests
+    """
+    return build_client_of(zoom_web_api_client.client, deduplicator, bypass_cache)
+
+def build_async_client(deduplicator=None, bypass_cache=False):
+    """
+    Builds async client for Zoom API using the Zoom API configuration file.
+
+    arguments:
+        see build_client
+
+    returns:
+        client: zoom_web_api_client.async_client ready for making requests
+    """
+    return build_client_of(zoom_web_api_client.async_client, deduplicator, bypass_cache)
+
+def build_client_of(client_class, deduplicator=None, bypass_cache=False):
+    """
+    Builds a client of client_class using the Zoom API configuration file.
+
+    returns:
+        client: client_class ready for making requests
+    """
+    api_data = load_api_config()
+
+    #on-disk cache for daily reports, kept apart for each API URL and key
+    #note: entries are named by a hash of these so the key is not written to disk
+    cache = response_cache.ResponseCache(
+        api_data.get("response_cache_dir", os.path.dirname(__file__)+"/"+".response_cache"),
+        api_data.get("response_cache_max_bytes", 256*1024*1024),
+        bypass_cache,
+        api_data["root_request_url"]+"\n"+api_data["api_key"]
+        )
+
+    #create zoom client
+    client = client_class(
+        api_data["root_request_url"],
+        api_data["api_key"],
+        api_data["api_secret"],
+        api_data["data_type"],
+        deduplicator,
+        api_data.get("pool_size", 10),
+        tuple(api_data.get("timeout", (10, 60))),
+        api_data.get("keep_alive", True),
+        cache,
+        resilience.for_service("zoom", api_data.get("resilience"))
+        )
+
+    return client
+
+def run_report(recurrence, report_prefix, export_destination, account_list=[], client=None, max_in_flight_pages=4, bypass_cache=False, store=None, window=None, export_format="csv", stop_event=None):
     """
     Builds client for Zoom API and determines what type of report to run based
     on account_list count.
@@ -281,27 +707,66 @@ def run_report(recurrence, report_prefix, export_destination, account_list=[]):
         recurrence: the recurrence being used in the report used to set date ranges
         report_prefix: used to specify the type of report (for ex. BBA, DLS, etc.)
         export_destination: used for determining where to store exported csv w/data
-        account_list: list of Zoom user accounts by email which we're interested in
+        account_list: list of Zoom user accounts by email which we're interested in or
+            an AccountMatcher compiled from such a list
+        client: optional pre-built zoom_web_api_client, for ex. shared by several reports
+        max_in_flight_pages: maximum number of account report pages to request at once
+        bypass_cache: whether to skip the on-disk response cache when building the client
+        store: optional MetricsStore used for storing rows and skipping data already stored
+        window: optional ReportWindow of dates to report on, defaults to the window of recurrence
+        export_format: format of the exported file, "csv", "csv.gz" or "parquet"
+        stop_event: optional threading.Event which stops requesting user report pages when set
 
     returns:
         zoom_results: dict with various summary data extracted from the Zoom API
     """
-    run_path = os.path.dirname(__file__)
+    #create zoom client
+    #note: clients built here are closed once the report is finished
+    if client is None:
+        with build_client(bypass_cache=bypass_cache) as client:
+            zoom_results = run_report(recurrence, report_prefix, export_destination, account_list, client, max_in_flight_pages, bypass_cache, store, window, export_format, stop_event)
+            logging.info("Zoom connection stats: "+str(client.connection_stats()))
+            return zoom_results
 
-    #open config file with api key/secret information
-    api_config_file = open(run_path+"/"+".zoom_api_config")
-    api_data = json.load(api_config_file)
+    #if provided an account list with accounts create user-based reports rather than
+    #monthly reports
+    if len(account_list) > 0:
+        zoom_results = zoom_user_report(client, report_prefix, recurrence, empty_results(), export_destination, account_list, max_in_flight_pages, store, window, export_format, stop_event=stop_event)
+    else:
+        zoom_results = zoom_daily_report(client, report_prefix, recurrence, empty_results(), export_destination, store, window, export_format)
+
+    return zoom_results
+
+async def run_report_async(recurrence, report_prefix, export_destination, account_list=[], client=None, max_in_flight_pages=4, bypass_cache=False, store=None, window=None, export_format="csv"):
+    """
+    Awaitable counterpart of run_report using an async Zoom API client so that
+    account report pages and daily reports are requested from a single thread.
 
+    arguments:
+        client: optional pre-built zoom_web_api_client.async_client, for ex. shared by several reports
+        see run_report for the other arguments
+
+    returns:
+        zoom_results: dict with various summary data extracted from the Zoom API
+    """
     #create zoom client
-    client = zoom_web_api_client.client(
-        api_data["root_request_url"],
-        api_data["api_key"],
-        api_data["api_secret"],
-        api_data["data_type"]
-        )
+    #note: clients built here are closed once the report is finished
+    if client is None:
+        async with build_async_client(bypass_cache=bypass_cache) as client:
+            zoom_results = await run_report_async(recurrence, report_prefix, export_destination, account_list, client, max_in_flight_pages, bypass_cache, store, window, export_format)
+            logging.info("Zoom connection stats: "+str(client.connection_stats()))
+            return zoom_results
 
-    #construct results placeholders
-    zoom_results = {"zoom_results_new_users":"",
+    if len(account_list) > 0:
+        return await zoom_user_report_async(client, report_prefix, recurrence, empty_results(), export_destination, account_list, max_in_flight_pages, store, window, export_format)
+    return await zoom_daily_report_async(client, report_prefix, recurrence, empty_results(), export_destination, store, window, export_format)
+
+def empty_results():
+    """
+    returns:
+        zoom_results: dict of results placeholders
+    """
+    return {"zoom_results_new_users":"",
         "zoom_results_meetings":"",
         "zoom_results_participants":"",
         "zoom_results_meeting_minutes":"",
@@ -309,12 +774,3 @@ def run_report(recurrence, report_prefix, export_destination, account_list=[]):
         "zoom_results_csv_filepath":"",
         "zoom_results_email_content":""
         }
-
-    #if provided an account list with accounts create user-based reports rather than
-    #monthly reports
-    if len(account_list) > 0:
-        zoom_results = zoom_user_report(client, report_prefix, recurrence, zoom_results, export_destination, account_list)
-    else:
-        zoom_results = zoom_daily_report(client, report_prefix, recurrence, zoom_results, export_destination)
-
-    return zoom_results
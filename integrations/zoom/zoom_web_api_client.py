@@ -6,21 +6,59 @@ By: Dave Bunten
 
 import json
 import requests
+import integrations.common.request_dedup as request_dedup
+import integrations.common.http_session as http_session
+import integrations.common.json_stream as json_stream
+import integrations.common.resilience as resilience
+import integrations.common.async_http as async_http
 requests.packages.urllib3.disable_warnings()
 
 class client:
-	def __init__(self, root_request_url, key, secret, data_type):
+	def __init__(self, root_request_url, key, secret, data_type, deduplicator=None, pool_size=10, timeout=(10, 60), keep_alive=True, response_cache=None, resilient_caller=None):
 		"""
 		params:
 			root_request_url: root URL to send API requests to
 			key: Zoom API key to use when making requests
 			secret: Zoom API secret to use when making requests
 			data_type: data_type to use when Zoom API returns data, for ex. "XML","JSON"
+			deduplicator: optional RequestDeduplicator shared between report runs
+				so that identical requests are only sent once
+			pool_size: number of connections to keep open to the Zoom API
+			timeout: (connect, read) timeout in seconds for requests
+			keep_alive: whether to keep connections open between requests
+			response_cache: optional ResponseCache for reports which may be cached
+			resilient_caller: optional ResilientCaller retrying and rate limiting requests,
+				defaults to the one shared by all Zoom clients
 		"""
 		self.root_request_url = root_request_url
 		self.key = key
 		self.secret = secret
 		self.data_type = data_type
+		self.deduplicator = deduplicator
+		self.response_cache = response_cache
+		self.resilience = resilient_caller if resilient_caller is not None else resilience.for_service("zoom")
+
+		#long-lived session so that connections are reused between requests
+		self.session = http_session.build_session(pool_size, timeout, keep_alive)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+	def close(self):
+		"""
+		Closes the connections held open by the client.
+		"""
+		self.session.close()
+
+	def connection_stats(self):
+		"""
+		returns:
+			dict with counts of connections opened, requests sent and connections reused
+		"""
+		return http_session.connection_stats(self.session)
 
 	def do_request(self, resource, request_parameters):
 		"""
@@ -30,12 +68,25 @@ class client:
 			resource: resource within the API to make requests on, for ex. "Meetings"
 			request_parameters: request parameters to use when performing the request
 		"""
-		self.resource = resource
-		self.request_parameters = request_parameters
+		#share the results of identical requests when a deduplicator is provided
+		if self.deduplicator is not None:
+			return self.deduplicator.call(
+				request_dedup.request_key("zoom", resource, request_parameters),
+				lambda: self.send_request(resource, request_parameters)
+				)
 
-        #create URL based on what we're requesting
-		url = self.root_request_url + self.resource
+		return self.send_request(resource, request_parameters)
 
+	def request_values(self, request_parameters):
+		"""
+		Creates the values sent with a request.
+
+		params:
+			request_parameters: request parameters to use when performing the request
+
+		returns:
+			dict of the API key/secret and data type along with the request parameters
+		"""
         # Header values required for Zoom API request
 		values = {
 			"api_key":self.key,
@@ -44,13 +95,159 @@ class client:
 			}
 
         #add the request params to the values dictionary to be sent in request
-		values.update(self.request_parameters)
+		values.update(request_parameters)
+
+		return values
+
+	def stream_request(self, resource, request_parameters, array_key, chunk_size=64*1024):
+		"""
+		Performs API request reading the records of one array of the JSON
+		response as they arrive. When a deduplicator is provided the response
+		text is shared with other callers and the records are read from it.
+
+		params:
+			resource: resource within the API to make requests on, for ex. "Meetings"
+			request_parameters: request parameters to use when performing the request
+			array_key: key of the array of records in the response, for ex. "users"
+			chunk_size: bytes read from the response at a time
+
+		returns:
+			JsonArrayStream of the records with the other response values in its fields
+		"""
+		if self.deduplicator is not None:
+			return json_stream.JsonArrayStream([self.do_request(resource, request_parameters)], array_key)
+
+		url = self.root_request_url + resource
+		values = self.request_values(request_parameters)
+
+		#report requests only read data so they may be retried
+		rsp = self.resilience.call(lambda: self.session.post(url, data=values, stream=True))
+		return json_stream.JsonArrayStream(rsp.iter_content(chunk_size), array_key, rsp.close)
+
+	def send_request(self, resource, request_parameters):
+		"""
+		Sends API request to Zoom. Uses only its arguments rather than instance
+		attributes so that it may be called from several threads at once.
+
+		params:
+			resource: resource within the API to make requests on, for ex. "Meetings"
+			request_parameters: request parameters to use when performing the request
+		"""
+        #create URL based on what we're requesting
+		url = self.root_request_url + resource
+		values = self.request_values(request_parameters)
 
         #attempt to make request and return results if successful
-        #else return the error
-		try:
-			rsp = requests.post(url, data=values, verify=False)
-			content = rsp.text
-			return content
-		except HTTPError as e:
-			return e.response.status_code
+        #else raise the error after retrying, report requests only read data so they may be retried
+		rsp = self.resilience.call(lambda: self.session.post(url, data=values))
+		return rsp.text
+
+class async_client:
+	def __init__(self, root_request_url, key, secret, data_type, deduplicator=None, pool_size=10, timeout=(10, 60), keep_alive=True, response_cache=None, resilient_caller=None):
+		"""
+		Client for the Zoom API making requests on an asyncio event loop with
+		the same arguments and do_request results as client. Requires aiohttp.
+
+		params:
+			see client, pool_size also limits the number of requests in flight at once
+		"""
+		self.root_request_url = root_request_url
+		self.key = key
+		self.secret = secret
+		self.data_type = data_type
+		self.deduplicator = deduplicator
+		self.response_cache = response_cache
+		self.resilience = resilient_caller if resilient_caller is not None else resilience.for_service("zoom")
+		self.pool_size = pool_size
+		self.timeout = timeout
+		self.keep_alive = keep_alive
+
+		#session is created on the event loop the first time a request is made
+		self.counters = http_session.ConnectionCounters()
+		self.session = None
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, exc_type, exc_value, traceback):
+		await self.close()
+
+	async def close(self):
+		"""
+		Closes the connections held open by the client.
+		"""
+		if self.session is not None:
+			await self.session.close()
+			self.session = None
+
+	def connection_stats(self):
+		"""
+		returns:
+			dict with counts of connections opened, requests sent and connections reused
+		"""
+		return self.counters.stats()
+
+	def get_session(self):
+		"""
+		returns:
+			aiohttp session of the client, created the first time it is needed
+		"""
+		if self.session is None:
+			self.session = async_http.build_session(self.counters, self.pool_size, self.timeout, self.keep_alive)
+		return self.session
+
+	request_values = client.request_values
+
+	async def do_request(self, resource, request_parameters):
+		"""
+		Performs API request based on parameter data
+
+		params:
+			resource: resource within the API to make requests on, for ex. "Meetings"
+			request_parameters: request parameters to use when performing the request
+		"""
+		#share the results of identical requests when a deduplicator is provided
+		if self.deduplicator is not None:
+			return await self.deduplicator.call_async(
+				request_dedup.request_key("zoom", resource, request_parameters),
+				lambda: self.send_request(resource, request_parameters)
+				)
+
+		return await self.send_request(resource, request_parameters)
+
+	async def stream_request(self, resource, request_parameters, array_key):
+		"""
+		Performs API request reading the records of one array of the JSON response.
+		note: the response is read in full before its records are decoded, which
+		keeps the event loop free while a page downloads
+
+		params:
+			resource: resource within the API to make requests on, for ex. "Meetings"
+			request_parameters: request parameters to use when performing the request
+			array_key: key of the array of records in the response, for ex. "users"
+
+		returns:
+			JsonArrayStream of the records with the other response values in its fields
+		"""
+		return json_stream.JsonArrayStream([await self.do_request(resource, request_parameters)], array_key)
+
+	async def send_request(self, resource, request_parameters):
+		"""
+		Sends API request to Zoom.
+
+		params:
+			resource: resource within the API to make requests on, for ex. "Meetings"
+			request_parameters: request parameters to use when performing the request
+		"""
+		url = self.root_request_url + resource
+		values = {name:str(value) for name, value in self.request_values(request_parameters).items()}
+
+		#report requests only read data so they may be retried
+		rsp = await self.resilience.call_async(
+			lambda: self.post(url, values),
+			connection_errors=async_http.connection_errors()
+			)
+		return rsp.text
+
+	async def post(self, url, values):
+		return await async_http.read_response(await self.get_session().post(url, data=values))
@@ -17,94 +17,609 @@ import os
 import sys
 import logging
 import argparse
-import webbrowser
-import html
 import time
 import datetime
 import json
-from string import Template
-import integrations.mediasite.mediasite_reporter as mediasite_reporter
-import integrations.zoom.zoom_reporter as zoom_reporter
-import integrations.google.google_archiver as google_archiver
+import glob
+import threading
+import concurrent.futures
+import integrations.mediasite.mediasite_jobs as mediasite_jobs
+import integrations.zoom.zoom_accounts as zoom_accounts
+import integrations.common.request_dedup as request_dedup
+import integrations.common.metrics_store as metrics_store
+import integrations.common.report_window as report_window
+import integrations.common.instrumentation as instrumentation
+import integrations.common.email_render as email_render
+import integrations.common.lazy_import as lazy_import
 
-def run_periodic_analytics_reporter(config_file_path, logfile_path):
+#integrations are imported the first time they are used so that their dependencies
+#(requests, the Google API client libraries) are only loaded by stages which run
+mediasite_reporter = lazy_import.LazyModule("integrations.mediasite.mediasite_reporter")
+zoom_reporter = lazy_import.LazyModule("integrations.zoom.zoom_reporter")
+google_archiver = lazy_import.LazyModule("integrations.google.google_archiver")
+google_sheet_writer = lazy_import.LazyModule("integrations.google.google_sheet_writer")
+
+#stages of a run, the collection stages gathering data which the google stage archives and emails
+COLLECTION_STAGES = ("zoom", "mediasite")
+STAGES = COLLECTION_STAGES+("google",)
+
+class StageError(Exception):
+    """
+    Raised when a collection stage fails, naming the stage which failed.
+    """
+    def __init__(self, stage_name, error):
+        super().__init__("Stage "+stage_name+" failed: "+repr(error))
+        self.stage_name = stage_name
+        self.error = error
+
+def run_stage(stage_name, stage_function, *args):
+    """
+    Function for running a single stage of the report and logging its timing.
+
+    arguments:
+        stage_name: name of the stage used for logging, for ex. "zoom"
+        stage_function: function which performs the work of the stage
+        args: arguments to provide to stage_function
+
+    returns:
+        results of stage_function
+    """
+    logging.info("Starting stage "+stage_name)
+    start_time = time.perf_counter()
+    try:
+        with instrumentation.timed("stage."+stage_name):
+            return stage_function(*args)
+    finally:
+        logging.info("Stage "+stage_name+" finished in "+
+            "{:.2f}".format(time.perf_counter() - start_time)+" seconds")
+
+def request_resilience_metrics():
+    """
+    returns:
+        dict of the retry, throttle and circuit counts of each service, empty when
+        no API client was used
+    """
+    #the resilience layer is only imported along with the API clients
+    resilience = lazy_import.loaded_module("integrations.common.resilience")
+    return resilience.service_metrics() if resilience is not None else {}
+
+def gather_results(config_data, concurrent_stages=False, clients={}, bypass_cache=False, store=None, window=None, stages=COLLECTION_STAGES):
+    """
+    Function for running the Zoom and Mediasite collection stages and merging
+    their results. The stages talk to different services and share no data, so
+    when concurrent_stages is set they are run in parallel threads.
+
+    arguments:
+        config_data: dict of configuration data loaded from JSON file
+        concurrent_stages: whether to run the collection stages in parallel
+        clients: optional dict of pre-built API clients by stage name, for ex. "zoom"
+        bypass_cache: whether to skip cached API responses
+        store: optional MetricsStore for storing rows and skipping data already stored
+        window: optional ReportWindow of dates to report on, defaults to the window of recurrence
+        stages: names of the collection stages to run, the results of others are left out
+
+    returns:
+        all_results: composite dict of Mediasite and Zoom results
+
+    raises:
+        StageError: when any of the collection stages fails
+    """
+    #set when a stage fails so that the other stages stop early
+    stop_event = threading.Event()
+
+    #collection stages by name along with the function and arguments to run them
+    stage_arguments = {
+        "zoom":lambda: (zoom_reporter.run_report,
+            config_data["recurrence"],
+            config_data["reporting_prefix"],
+            config_data["export_destination"],
+            build_account_matcher(config_data),
+            clients.get("zoom"),
+            config_data.get("zoom_max_in_flight_pages", 4),
+            bypass_cache,
+            store,
+            window,
+            config_data.get("export_format", "csv"),
+            stop_event
+            ),
+        "mediasite":lambda: (mediasite_reporter.run_report,
+            config_data["recurrence"],
+            config_data["reporting_prefix"],
+            config_data["export_destination"],
+            config_data["mediasite_presentation_report_name"],
+            clients.get("mediasite"),
+            mediasite_jobs.PollingStrategy(**config_data.get("mediasite_job_polling", {})),
+            store,
+            window,
+            stop_event
+            )
+        }
+    stages = {stage_name:stage_arguments[stage_name]() for stage_name in COLLECTION_STAGES if stage_name in stages}
+
+    stage_results = {}
+
+    if concurrent_stages and len(stages) > 1:
+        logging.info("Gathering Zoom and Mediasite analytics concurrently")
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(stages),
+            thread_name_prefix="stage")
+        stage_futures = {executor.submit(run_stage, stage_name, *stage): stage_name
+            for stage_name, stage in stages.items()}
+        try:
+            #wait for all stages, stopping early if any of them fails
+            done, not_done = concurrent.futures.wait(stage_futures,
+                return_when=concurrent.futures.FIRST_EXCEPTION)
+            for future in done:
+                if future.exception() is not None:
+                    raise StageError(stage_futures[future], future.exception()) from future.exception()
+                stage_results[stage_futures[future]] = future.result()
+        finally:
+            #stop the other stages and wait for them so that the store and clients
+            #are no longer in use once the run fails
+            stop_event.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+    else:
+        for stage_name, stage in stages.items():
+            try:
+                stage_results[stage_name] = run_stage(stage_name, *stage)
+            except Exception as e:
+                raise StageError(stage_name, e) from e
+
+    #create composite results dict for parsing results in email template
+    all_results = {}
+    for stage_name in ("mediasite", "zoom"):
+        all_results.update(stage_results.get(stage_name, {}))
+
+    return all_results
+
+def build_account_matcher(config_data):
+    """
+    Compiles the Zoom account list of the configuration data for matching users.
+
+    arguments:
+        config_data: dict of configuration data loaded from JSON file
+
+    returns:
+        account_matcher: AccountMatcher of zoom_account_list using zoom_account_match_mode
+            and reporting matches in a "matched_account" column when zoom_report_matched_account is set
+    """
+    return zoom_accounts.AccountMatcher(config_data["zoom_account_list"],
+        config_data.get("zoom_account_match_mode", "substring"),
+        "matched_account" if config_data.get("zoom_report_matched_account", False) else None
+        )
+
+def open_metrics_store(config_data):
+    """
+    Opens the local store of metrics named in the configuration data.
+
+    arguments:
+        config_data: dict of configuration data loaded from JSON file
+
+    returns:
+        store: MetricsStore at metrics_store_path or the default location
+    """
+    return metrics_store.MetricsStore(config_data.get("metrics_store_path",
+        os.path.dirname(os.path.realpath(__file__))+"/data/lst_periodic_metrics.sqlite"))
+
+def run_periodic_analytics_reporter(config_file_path, logfile_path, concurrent_stages=False, clients={}, upload_log=True, bypass_cache=False, window=None, outbox=None, sheet_writer=None, stages=STAGES):
     """
     Function for gathering, communicating and archiving various data.
 
     arguments:
         config_file_path: file path to a JSON configuration file
         logfile_path: file path where logs will be stored locally
+        concurrent_stages: whether to run the Zoom and Mediasite stages in parallel
+        clients: optional dict of pre-built API clients by name ("zoom", "mediasite", "google")
+        upload_log: whether to upload the log to Google Drive once finished
+        bypass_cache: whether to skip cached API responses
+        window: optional ReportWindow of dates to report on, defaults to the window of
+            the configured recurrence
+        outbox: optional list the rendered email is added to instead of being sent
+        sheet_writer: optional BufferedSheetWriter the spreadsheet row is added to instead
+            of being written
+        stages: names of the stages to run, without "google" nothing is archived or sent
+
+    returns:
+        config_data: dict of configuration data loaded from JSON file
     """
 
     #load configuration data from JSON file
-    config_file = open(config_file_path)
-    config_data = json.load(config_file)
-
-    #create report information using zoom
-    logging.info("Gathering Zoom analytics")
-    zoom_results = zoom_reporter.run_report(config_data["recurrence"],
-        config_data["reporting_prefix"],
-        config_data["export_destination"],
-        config_data["zoom_account_list"]
-        )
+    with open(config_file_path) as config_file:
+        config_data = json.load(config_file)
 
-    #create report information using mediasite
-    logging.info("Gathering Mediasite analytics")
-    mediasite_results = mediasite_reporter.run_report(config_data["recurrence"],
-        config_data["reporting_prefix"],
-        config_data["export_destination"],
-        config_data["mediasite_presentation_report_name"]
-        )
+    #gather the dates of the report shared by every stage
+    if window is None:
+        window = report_window.ReportWindow.from_recurrence(config_data["recurrence"])
+    logging.info("Reporting on "+window.start_string+" through "+window.end_string)
 
-    #gather date string for email
-    if config_data["recurrence"] == "weekly":
-        report_date_string = '{dt.month}/{dt.day}/{dt.year}'.format(dt = datetime.datetime.now())
-    elif config_data["recurrence"] == "monthly":
-        last_day_of_previous_month = datetime.date.today().replace(day=1) - datetime.timedelta(days=1)
-        report_date_string = last_day_of_previous_month.strftime("%m/%Y").lstrip("0")
+    #local store of metrics so that only data missing from it is requested
+    store = open_metrics_store(config_data)
 
-    #create composite results dict for parsing results in email template
-    all_results = mediasite_results.copy()
-    all_results.update(zoom_results)
-    all_results["email_report_date_string"] = report_date_string
+    #create report information using zoom and mediasite
+    try:
+        all_results = gather_results(config_data, concurrent_stages, clients, bypass_cache, store, window,
+            [stage_name for stage_name in COLLECTION_STAGES if stage_name in stages])
+    finally:
+        store.close()
+
+    #exported files are left in the export destination when the google stage is skipped
+    if "google" not in stages:
+        logging.info("Skipping stage google, results were exported to "+config_data["export_destination"])
+        return config_data
+
+    #add the date string to the composite results for parsing in email template
+    all_results["email_report_date_string"] = window.email_date_string
 
     #archive results with google (includes spreadsheet additions and file backups)
     logging.info("Archiving results in Google")
-    google_archiver.run_archiver(config_data["recurrence"],
+    drive_links = google_archiver.run_archiver(config_data["recurrence"],
         config_data["google_spreadsheet_id"],
         config_data["google_mediasite_archive_folder_id"],
         config_data["google_zoom_archive_folder_id"],
         config_data["google_spreadsheet_data_elements"],
-        all_results
+        all_results,
+        clients.get("google"),
+        window,
+        sheet_writer,
+        config_data.get("google_spreadsheet_range", "A:B")
         )
+    #links to the archived files can be used in the email template
+    all_results.update(drive_links)
 
-    #create subject content using the current date and the template provided from the config file
-    email_subj_template = Template(config_data["email_subj_template"])
-    email_subj = email_subj_template.safe_substitute(email_report_date_string=all_results["email_report_date_string"])
-
-    #create body content using the current data and the template provided from the config file
-    email_body_template = Template("".join(config_data["email_body_template"]))
-    email_body = email_body_template.safe_substitute(all_results)
-
-    #send the email using gmail api
-    logging.info("Sending report email")
-    google_archiver.mailto(config_data["email_to"],
-        config_data["email_reply_to"],
-        config_data["email_cc"],
-        email_subj,
-        email_body
-        )
+    #render the email using the compiled templates provided from the config file
+    email = email_render.render_email(config_data, all_results)
+
+    #send the email using gmail api, or leave it for a batched send
+    #note: the email is only sent when every collection stage ran so that it is complete
+    if not all(stage_name in stages for stage_name in COLLECTION_STAGES):
+        logging.info("Not sending report email since some collection stages were skipped")
+    elif outbox is not None:
+        email["config"] = config_file_path
+        outbox.append(email)
+    else:
+        logging.info("Sending report email")
+        google_archiver.mailto(email["to"],
+            email["reply_to"],
+            email["cc"],
+            email["subject"],
+            email["body"],
+            clients.get("google")
+            )
 
     logging.info("Finished downloading data files and generating analytics email.")
+    logging.info("Request retry and throttle counts: "+json.dumps(request_resilience_metrics()))
 
     #upload the log to google drive as well once finished
-    google_archiver.log_upload(logfile_path, config_data["google_log_folder_id"])
+    if upload_log:
+        google_archiver.log_upload(logfile_path, config_data["google_log_folder_id"], clients.get("google"))
+
+    return config_data
+
+def find_config_files(config_paths):
+    """
+    Function for expanding a list of configuration files and directories into
+    a list of configuration files.
+
+    arguments:
+        config_paths: list of JSON configuration files or directories containing them
+
+    returns:
+        config_files: sorted list of JSON configuration file paths
+    """
+    config_files = []
+    for config_path in config_paths:
+        if os.path.isdir(config_path):
+            config_files.extend(glob.glob(os.path.join(config_path, "*.json")))
+        else:
+            config_files.append(config_path)
+
+    return sorted(set(config_files))
+
+def run_batch(config_paths, logfile_path, max_workers=4, concurrent_stages=False, bypass_cache=False, window=None, email_batch_size=10, stages=STAGES):
+    """
+    Function for running many report configurations in one process. API
+    configuration files are read once, clients are shared by all reports and
+    identical upstream requests are only sent once.
+
+    arguments:
+        config_paths: list of JSON configuration files or directories containing them
+        logfile_path: file path where logs will be stored locally
+        max_workers: maximum number of reports to run at once
+        concurrent_stages: whether to run the Zoom and Mediasite stages in parallel
+        bypass_cache: whether to skip cached API responses
+        window: optional ReportWindow of dates to report on for every configuration
+        email_batch_size: most report emails sent in one Gmail batch request
+        stages: names of the stages to run for every configuration
+
+    returns:
+        summary: dict with the successes and failures of each report
+    """
+    config_files = find_config_files(config_paths)
+    logging.info("Running batch of "+str(len(config_files))+" report configurations")
+
+    #build clients once for use by every report, only for the stages which run
+    deduplicator = request_dedup.RequestDeduplicator()
+    clients = {}
+    if "zoom" in stages:
+        clients["zoom"] = zoom_reporter.build_client(deduplicator, bypass_cache)
+    if "mediasite" in stages:
+        clients["mediasite"] = mediasite_reporter.build_client(deduplicator)
+
+    #spreadsheet rows and emails are gathered from each report and sent together once all have finished
+    outbox = []
+    sheet_writer = None
+    if "google" in stages:
+        clients["google"] = google_archiver.get_session()
+        sheet_writer = google_sheet_writer.BufferedSheetWriter(clients["google"])
+
+    def run_config(config_file_path):
+        start_time = time.perf_counter()
+        config_data = run_periodic_analytics_reporter(config_file_path, logfile_path,
+            concurrent_stages, clients, upload_log=False, bypass_cache=bypass_cache, window=window, outbox=outbox,
+            sheet_writer=sheet_writer, stages=stages)
+        return config_data, time.perf_counter() - start_time
+
+    summary = {"succeeded":[], "failed":[]}
+    log_folder_ids = set()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+        thread_name_prefix="report") as executor:
+        config_futures = {executor.submit(run_config, config_file_path): config_file_path
+            for config_file_path in config_files}
+        for future in concurrent.futures.as_completed(config_futures):
+            config_file_path = config_futures[future]
+            try:
+                config_data, duration = future.result()
+            except Exception as e:
+                logging.exception("Report for "+config_file_path+" failed")
+                summary["failed"].append({"config":config_file_path, "error":repr(e)})
+            else:
+                logging.info("Report for "+config_file_path+" finished in "+
+                    "{:.2f}".format(duration)+" seconds")
+                summary["succeeded"].append({"config":config_file_path, "seconds":round(duration, 2)})
+                if "google" in stages:
+                    log_folder_ids.add(config_data["google_log_folder_id"])
+
+    #write the spreadsheet rows of every report with one request per kind of write
+    if sheet_writer is not None and sheet_writer.pending():
+        try:
+            summary["spreadsheet_rows"] = sheet_writer.flush()
+        except Exception as e:
+            logging.exception("Writing spreadsheet rows failed")
+            summary["spreadsheet_error"] = repr(e)
+
+    #send every report email through one Gmail service in batches
+    send_results = []
+    if outbox:
+        logging.info("Sending "+str(len(outbox))+" report emails")
+        try:
+            send_results = google_archiver.send_emails(outbox, clients["google"], email_batch_size)
+        except Exception as e:
+            logging.exception("Sending report emails failed")
+            send_results = [e]*len(outbox)
+        for email, send_result in zip(outbox, send_results):
+            if isinstance(send_result, Exception):
+                logging.error("Report email for "+email["config"]+" failed: "+repr(send_result))
+                summary["failed"].append({"config":email["config"], "error":"email: "+repr(send_result)})
+
+    summary["emails_sent"] = sum(1 for send_result in send_results if not isinstance(send_result, Exception))
+    summary["compiled_templates"] = len(email_render.templates)
+    summary["deduplicated_requests"] = deduplicator.hits
+    for stage_name in COLLECTION_STAGES:
+        if stage_name in clients:
+            summary[stage_name+"_connections"] = clients[stage_name].connection_stats()
+            clients[stage_name].close()
+    summary["request_resilience"] = request_resilience_metrics()
+
+    #write one summary of the batch next to the log
+    summary_path = os.path.splitext(logfile_path)[0]+"_summary.json"
+    with open(summary_path, "w") as summary_file:
+        json.dump(summary, summary_file, indent=4)
+
+    logging.info("Batch finished with "+str(len(summary["succeeded"]))+" succeeded and "+
+        str(len(summary["failed"]))+" failed reports. Summary written to "+summary_path)
+
+    #upload the log once per log folder now that every report has finished
+    for google_log_folder_id in sorted(log_folder_ids):
+        google_archiver.log_upload(logfile_path, google_log_folder_id, clients["google"])
+
+    return summary
+
+def run_backfill(config_file_path, window, period, max_workers=4, bypass_cache=False):
+    """
+    Function for archiving historical Zoom data for a configuration. The window
+    is split into periods which are reported on in parallel, periods which were
+    already archived are skipped and the spreadsheet rows for every period are
+    written together at the end.
+
+    NOTE: the dates covered by Mediasite data are set within the Mediasite report
+    itself, so Mediasite is not part of a backfill and its spreadsheet columns are
+    left empty.
+
+    arguments:
+        config_file_path: file path to a JSON configuration file
+        window: ReportWindow of all dates to backfill
+        period: the period to split the window into, "weekly" or "monthly"
+        max_workers: maximum number of periods to run at once
+        bypass_cache: whether to skip cached API responses
+
+    returns:
+        summary: dict with the archived, skipped and failed periods
+    """
+    #load configuration data from JSON file
+    with open(config_file_path) as config_file:
+        config_data = json.load(config_file)
+
+    store = open_metrics_store(config_data)
+    account_matcher = build_account_matcher(config_data)
+    zoom_client = zoom_reporter.build_client(bypass_cache=bypass_cache)
+    google_client = google_archiver.get_session()
+
+    #skip periods which were already archived
+    periods = []
+    summary = {"archived":[], "skipped":[], "failed":[]}
+    for period_window in window.split(period):
+        if store.is_period_archived(config_data["reporting_prefix"], config_data["google_spreadsheet_id"],
+            period_window.start_string, period_window.end_string):
+            summary["skipped"].append(period_window.start_string)
+        else:
+            periods.append(period_window)
+
+    logging.info("Backfilling "+str(len(periods))+" periods, skipping "+str(len(summary["skipped"]))+
+        " periods already archived")
+
+    def run_period(period_window):
+        zoom_results = zoom_reporter.run_report(period_window.recurrence,
+            config_data["reporting_prefix"],
+            config_data["export_destination"],
+            account_matcher,
+            zoom_client,
+            config_data.get("zoom_max_in_flight_pages", 4),
+            bypass_cache,
+            store,
+            period_window,
+            config_data.get("export_format", "csv")
+            )
+        google_archiver.upload_result_files(config_data["google_mediasite_archive_folder_id"],
+            config_data["google_zoom_archive_folder_id"],
+            zoom_results,
+            google_client
+            )
+        return google_archiver.build_spreadsheet_row(period_window,
+            config_data["google_spreadsheet_data_elements"], zoom_results)
+
+    #run the periods in parallel keeping the rows in period order
+    rows = []
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+            thread_name_prefix="backfill") as executor:
+            period_futures = [(period_window, executor.submit(run_period, period_window)) for period_window in periods]
+            for period_window, future in period_futures:
+                try:
+                    rows.append(future.result())
+                    summary["archived"].append(period_window.start_string)
+                except Exception as e:
+                    logging.exception("Backfill of "+period_window.start_string+" through "+period_window.end_string+" failed")
+                    summary["failed"].append({"period":period_window.start_string, "error":repr(e)})
+
+        #write the rows for every period together, updating periods already in the spreadsheet
+        if rows:
+            sheet_writer = google_sheet_writer.BufferedSheetWriter(google_client)
+            for row in rows:
+                sheet_writer.add(config_data["google_spreadsheet_id"], row, config_data.get("google_spreadsheet_range", "A:B"))
+            summary["spreadsheet_rows"] = sheet_writer.flush()
+            store.mark_periods_archived(config_data["reporting_prefix"], config_data["google_spreadsheet_id"],
+                [(period_window.start_string, period_window.end_string) for period_window in periods
+                    if period_window.start_string in summary["archived"]])
+    finally:
+        zoom_client.close()
+        store.close()
+
+    logging.info("Backfill finished with "+str(len(summary["archived"]))+" archived, "+
+        str(len(summary["skipped"]))+" skipped and "+str(len(summary["failed"]))+" failed periods")
+    logging.info("Request retry and throttle counts: "+json.dumps(request_resilience_metrics()))
+
+    return summary
+
+#configuration keys needed by each stage of a run
+REQUIRED_CONFIG_KEYS = {
+    "run":("recurrence", "reporting_prefix", "export_destination"),
+    "zoom":("zoom_account_list",),
+    "mediasite":("mediasite_presentation_report_name",),
+    "google":("google_spreadsheet_id", "google_mediasite_archive_folder_id", "google_zoom_archive_folder_id",
+        "google_log_folder_id", "google_spreadsheet_data_elements", "email_to", "email_reply_to", "email_cc",
+        "email_subj_template", "email_body_template")
+    }
+
+def plan_run(config_file_path, stages=STAGES, window=None, period=None):
+    """
+    Function for describing what a run of a configuration would do without
+    running any stage, importing any integration or making any request.
+
+    arguments:
+        config_file_path: file path to a JSON configuration file
+        stages: names of the stages which would run
+        window: optional ReportWindow of dates to report on, defaults to the window of
+            the configured recurrence
+        period: optional backfill period ("weekly" or "monthly") to split the window into
+
+    returns:
+        plan: dict with the dates, stages and destinations of the run and any
+            configuration keys missing for its stages
+    """
+    with open(config_file_path) as config_file:
+        config_data = json.load(config_file)
+
+    missing_keys = [key for stage_name in ("run",)+tuple(stages)
+        for key in REQUIRED_CONFIG_KEYS[stage_name] if key not in config_data]
+    plan = {"config":config_file_path, "stages":list(stages), "missing_config_keys":missing_keys}
+    if "recurrence" not in config_data and window is None:
+        return plan
+
+    if window is None:
+        window = report_window.ReportWindow.from_recurrence(config_data["recurrence"])
+    plan["window"] = [window.start_string, window.end_string]
+    plan["export_destination"] = config_data.get("export_destination")
+    plan["export_format"] = config_data.get("export_format", "csv")
+    if period is not None:
+        plan["periods"] = [[period_window.start_string, period_window.end_string] for period_window in window.split(period)]
+    if "google" in stages:
+        plan["google_spreadsheet_id"] = config_data.get("google_spreadsheet_id")
+        plan["email_to"] = config_data.get("email_to") if all(stage_name in stages for stage_name in COLLECTION_STAGES) else None
+
+    return plan
 
 if __name__ == "__main__":
     """
     args:
         --file: json configuration file for setting details of report
+        --batch: json configuration files or directories of them to run together
+        --start/--end: explicit dates (YYYY-MM-DD) to report on instead of the recurrence
+        --backfill: period ("weekly" or "monthly") to split --start/--end into for backfilling
+        --metrics-textfile: Prometheus textfile to write the run metrics to
+        --statsd: host:port of a StatsD server to send the run metrics to
+        --only: stages to run ("zoom", "mediasite" and/or "google"), skipping the others
+        --dry-run: check the configuration and show what would run without running it
     """
+    #parse arguments sent to program using ArgumentParser
+    #note: arguments are parsed before anything else so that --help and argument errors return at once
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-f','--file',help='A JSON configuration file')
+    parser.add_argument('-b','--batch',nargs='+',
+        help='JSON configuration files or directories of them to run in one process')
+    parser.add_argument('-w','--workers',type=int,default=4,
+        help='Maximum number of batch reports to run at once')
+    parser.add_argument('-c','--concurrent',action='store_true',
+        help='Run the Zoom and Mediasite collection stages in parallel')
+    parser.add_argument('--no-cache',action='store_true',
+        help='Skip the on-disk cache of Zoom daily report responses')
+    parser.add_argument('--start',help='First date to report on (YYYY-MM-DD)')
+    parser.add_argument('--end',help='Last date to report on (YYYY-MM-DD)')
+    parser.add_argument('--backfill',choices=['weekly','monthly'],
+        help='Archive history from --start to --end split into weekly or monthly periods')
+    parser.add_argument('--metrics-textfile',
+        help='Prometheus textfile (.prom) to write the run metrics to')
+    parser.add_argument('--statsd',
+        help='host:port of a StatsD server to send the run metrics to')
+    parser.add_argument('--only',nargs='+',choices=STAGES,
+        help='Only run these stages; without google nothing is archived or emailed')
+    parser.add_argument('--dry-run',action='store_true',
+        help='Check the configuration and show what would run without running any stage')
+    args = parser.parse_args()
+
+    #explicit report window shared by every stage
+    window = None
+    if args.start or args.end:
+        if not (args.start and args.end):
+            parser.error("--start and --end must be provided together")
+        window = report_window.ReportWindow.from_strings(args.start, args.end)
+    elif args.backfill:
+        parser.error("--backfill requires --start and --end")
+    if args.backfill and args.only:
+        parser.error("--backfill always runs the zoom and google stages and cannot be used with --only")
+
+    #stages to run keeping their usual order
+    stages = tuple(stage_name for stage_name in STAGES if args.only is None or stage_name in args.only)
+
     #gather our runpath for future use with various files
     run_path = os.path.dirname(os.path.realpath(__file__))
 
@@ -115,7 +630,8 @@ if __name__ == "__main__":
     #logger for log file
     logging_format = '%(asctime)s - %(levelname)s - %(message)s'
     logging_datefmt = '%m/%d/%Y - %I:%M:%S %p'
-    logging.basicConfig(filename=logfile_path,
+    #note: dry runs only log to the console
+    logging.basicConfig(filename=None if args.dry_run else logfile_path,
         filemode='w',
         format=logging_format,
         datefmt=logging_datefmt,
@@ -126,17 +642,51 @@ if __name__ == "__main__":
     console = logging.StreamHandler()
     formatter = logging.Formatter(logging_format,
         datefmt=logging_datefmt)
-    console.setFormatter(formatter)
-    logging.getLogger().addHandler(console)
+    if not args.dry_run:
+        console.setFormatter(formatter)
+        logging.getLogger().addHandler(console)
 
-    #parse arguments sent to program using ArgumentParser
-    parser = argparse.ArgumentParser()
-    parser.add_argument('-f','--file',help='A JSON configuration file')
-    args = parser.parse_args()
+    #if asked for a dry run describe each configuration without running any stage
+    if args.dry_run:
+        config_files = find_config_files(args.batch) if args.batch else [args.file] if args.file else []
+        config_files = [config_file_path for config_file_path in config_files if os.path.exists(config_file_path)]
+        if not config_files:
+            logging.error("Error: required configuration JSON file path not found.")
+            sys.exit(1)
+        plans = [plan_run(config_file_path, ("zoom", "google") if args.backfill else stages, window, args.backfill)
+            for config_file_path in config_files]
+        for plan in plans:
+            logging.info("Dry run plan: "+json.dumps(plan))
+        sys.exit(1 if any(plan["missing_config_keys"] for plan in plans) else 0)
 
-    #if our provided config file exists, start running analytics based on config
-    if os.path.exists(args.file):
-        run_periodic_analytics_reporter(args.file, logfile_path)
-    else:
-        #else we did not find the provided config file
-        logging.error("Error: required configuration JSON file path not found.")
+    try:
+        #if asked to backfill history for a config file
+        if args.backfill and args.file and os.path.exists(args.file):
+            summary = run_backfill(args.file, window, args.backfill, args.workers, args.no_cache)
+            if summary["failed"]:
+                sys.exit(1)
+        #if provided a batch of config files run them together
+        elif args.batch:
+            summary = run_batch(args.batch, logfile_path, args.workers, args.concurrent, args.no_cache, window,
+                stages=stages)
+            if summary["failed"]:
+                sys.exit(1)
+        #if our provided config file exists, start running analytics based on config
+        elif args.file and os.path.exists(args.file):
+            try:
+                run_periodic_analytics_reporter(args.file, logfile_path, args.concurrent, bypass_cache=args.no_cache, window=window,
+                    upload_log="google" in stages, stages=stages)
+            except StageError as e:
+                logging.exception("Error: "+str(e))
+                sys.exit(1)
+        else:
+            #else we did not find the provided config file
+            logging.error("Error: required configuration JSON file path not found.")
+    finally:
+        #write stage timings and counters next to the log and to any metrics exporters
+        run_report = instrumentation.write_run_report(os.path.splitext(logfile_path)[0]+"_run_report.json",
+            {"request_resilience":request_resilience_metrics()})
+        if args.metrics_textfile:
+            instrumentation.write_prometheus_textfile(args.metrics_textfile, run_report)
+        if args.statsd:
+            instrumentation.send_statsd(args.statsd, run_report)